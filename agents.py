@@ -0,0 +1,320 @@
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from metrics import span, record_llm_call
+
+if TYPE_CHECKING:
+    from crewai import Crew
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a template below changes so cached LLM outputs are not reused
+PROMPT_TEMPLATE_VERSION = "4"
+
+
+class AgentSpec:
+    """Static definition of an agent and its task prompt template.
+
+    `description` and `expected_output` may contain `{placeholders}` that are
+    filled per request through `Crew.kickoff(inputs=...)`.
+    """
+
+    __slots__ = ("name", "role", "goal", "backstory", "description", "expected_output")
+
+    def __init__(self, name, role, goal, backstory, description, expected_output):
+        self.name = name
+        self.role = role
+        self.goal = goal
+        self.backstory = backstory
+        self.description = description
+        self.expected_output = expected_output
+
+
+AGENT_SPECS: Dict[str, AgentSpec] = {
+    "flights": AgentSpec(
+        name="flights",
+        role="AI Flight Analyst",
+        goal="Analyze flight options and recommend the best one considering price, duration, stops, and overall convenience.",
+        backstory="AI expert that provides in-depth analysis comparing flight options based on multiple factors.",
+        description="""
+        Recommend the best flight from the available options, based on the details provided below:
+
+        **Reasoning for Recommendation:**
+        - **Price:** Provide a detailed explanation about why this flight offers the best value compared to others.
+        - **Duration:** Explain why this flight has the best duration in comparison to others.
+        - **Stops:** Discuss why this flight has minimal or optimal stops.
+        - **Travel Class:** Describe why this flight provides the best comfort and amenities.
+
+        Use the provided flight data as the basis for your recommendation. Be sure to justify your choice using clear reasoning for each attribute. Do not repeat the flight details in your response.
+
+
+Data to analyze (tables are pipe-separated; `all:` gives values shared by every row):
+{formatted_data}""",
+        expected_output="A structured recommendation explaining the best flights choice based on the analysis of provided details.",
+    ),
+    "hotels": AgentSpec(
+        name="hotels",
+        role="AI Hotel Analyst",
+        goal="Analyze hotel options and recommend the best one considering price, rating, location, and amenities.",
+        backstory="AI expert that provides in-depth analysis comparing hotel options based on multiple factors.",
+        description="""
+        Based on the following analysis, generate a detailed recommendation for the best hotel. Your response should include clear reasoning based on price, rating, location, and amenities.
+
+        **AI Hotel Recommendation**
+        We recommend the best hotel based on the following analysis:
+
+        **Reasoning for Recommendation**:
+        - **Price:** The recommended hotel is the best option for the price compared to others, offering the best value for the amenities and services provided.
+        - **Rating:** With a higher rating compared to the alternatives, it ensures a better overall guest experience. Explain why this makes it the best choice.
+        - **Location:** The hotel is in a prime location, close to important attractions, making it convenient for travelers.
+        - **Amenities:** The hotel offers amenities like Wi-Fi, pool, fitness center, free breakfast, etc. Discuss how these amenities enhance the experience, making it suitable for different types of travelers.
+
+        **Reasoning Requirements**:
+        - Ensure that each section clearly explains why this hotel is the best option based on the factors of price, rating, location, and amenities.
+        - Compare it against the other options and explain why this one stands out.
+        - Provide concise, well-structured reasoning to make the recommendation clear to the traveler.
+        - Your recommendation should help a traveler make an informed decision based on multiple factors, not just one.
+
+
+Data to analyze (tables are pipe-separated; `all:` gives values shared by every row):
+{formatted_data}""",
+        expected_output="A structured recommendation explaining the best hotels choice based on the analysis of provided details.",
+    ),
+    "flight_matrix": AgentSpec(
+        name="flight_matrix",
+        role="AI Fare Analyst",
+        goal="Find the best day and route to fly from a flexible-date price matrix, balancing fare and travel time.",
+        backstory="AI expert in airfare trends who compares prices across nearby dates and alternative routes.",
+        description="""
+        Below is a price matrix of flight searches across several departure dates and/or origin-destination pairs.
+        Each cell lists the cheapest fare, the shortest duration and how many options were found.
+
+        **Reasoning for Recommendation:**
+        - **Best Day/Route:** Identify the cell that offers the best overall value and say why.
+        - **Price Trend:** Describe how fares change across dates and routes and by how much.
+        - **Trade-offs:** Mention when paying slightly more buys a much shorter trip.
+
+        Ignore cells that report an error. Do not repeat the full matrix in your response.
+
+
+Price matrix (pipe-separated):
+{formatted_data}""",
+        expected_output="A structured recommendation of the best travel date and route based on the price matrix.",
+    ),
+    "itinerary": AgentSpec(
+        name="itinerary",
+        role="AI Travel Planner",
+        goal="Create a detailed itinerary for the user based on flight and hotel information",
+        backstory="AI travel expert generating a day-by-day itinerary including flight details, hotel stays, and must-visit locations in the destination.",
+        description="""
+        Based on the following details, create a {days}-day itinerary for the user:
+
+        **Flight Details**:
+        {flights_text}
+
+        **Hotel Details**:
+        {hotels_text}
+
+        **Destination**: {destination}
+
+        **Travel Dates**: {check_in_date} to {check_out_date} ({days} days)
+
+        {local_knowledge}
+
+        The itinerary should include:
+        - Flight arrival and departure information
+        - Hotel check-in and check-out details
+        - Day-by-day breakdown of activities
+        - Must-visit attractions and estimated visit times
+        - Restaurant recommendations for meals
+        - Tips for local transportation
+
+        **Format Requirements**:
+        - Use markdown formatting with clear headings (# for main headings, ## for days, ### for sections)
+        - Include emojis for different types of activities ( for landmarks, 🍽️ for restaurants, etc.)
+        - Use bullet points for listing activities
+        - Include estimated timings for each activity
+        - Format the itinerary to be visually appealing and easy to read
+        """,
+        expected_output="A well-structured, visually appealing itinerary in markdown format, including flight, hotel, and day-wise breakdown with emojis, headers, and bullet points.",
+    ),
+    "itinerary_skeleton": AgentSpec(
+        name="itinerary_skeleton",
+        role="AI Trip Architect",
+        goal="Outline a multi-day trip as one short theme and area per day so each day can be planned independently",
+        backstory="AI travel expert who structures trips so neighbourhoods, pacing and arrival/departure logistics fit together.",
+        description="""
+        Outline a {days}-day trip to {destination} from {check_in_date} to {check_out_date}.
+
+        **Flight Details**:
+        {flights_text}
+
+        **Hotel Details**:
+        {hotels_text}
+
+        {local_knowledge}
+
+        Give every day one short theme (e.g. "Old town and markets") and the main area or neighbourhood it covers.
+        Day 1 must account for arrival and the last day for departure. Do not repeat a theme.
+
+        Respond with JSON only, no prose and no code fences, in exactly this shape with {days} entries:
+        {"days": [{"day": 1, "theme": "...", "area": "..."}]}
+        """,
+        expected_output="A JSON object with a `days` list of {days} entries, each with day, theme and area.",
+    ),
+    "itinerary_day": AgentSpec(
+        name="itinerary_day",
+        role="AI Day Planner",
+        goal="Plan a single day in detail: timed activities, must-visit attractions, meals and local transport",
+        backstory="AI local guide who turns a day theme into a realistic, well-paced schedule.",
+        description="""
+        Plan one day in {destination} with the theme "{theme}", focused on {area}.
+        {notes}
+        {local_knowledge}
+
+        Include 4 to 7 activities from morning to evening: must-visit attractions with estimated visit times,
+        restaurant recommendations for meals, and tips for getting around locally.
+
+        Respond with JSON only, no prose and no code fences, in exactly this shape:
+        {"activities": [{"time": "09:00", "title": "...", "description": "...", "category": "landmark"}]}
+        Use one of these categories: landmark, food, nature, shopping, culture, transport, hotel, flight, leisure.
+        """,
+        expected_output="A JSON object with an `activities` list; each activity has time, title, description and category.",
+    ),
+}
+
+
+def build_crew(spec: AgentSpec, llm_model) -> "Crew":
+    """Construct a single-agent, single-task Crew from a spec."""
+    # Deferred: importing crewai dominates API start-up time
+    from crewai import Agent, Task, Crew, Process
+
+    agent = Agent(
+        role=spec.role,
+        goal=spec.goal,
+        backstory=spec.backstory,
+        llm=llm_model,
+        verbose=False
+    )
+    task = Task(
+        description=spec.description,
+        agent=agent,
+        expected_output=spec.expected_output
+    )
+    return Crew(
+        agents=[agent],
+        tasks=[task],
+        process=Process.sequential,
+        verbose=False
+    )
+
+
+class CrewPool:
+    """Reusable prebuilt Crews for one spec.
+
+    A Crew mutates its agent and task while running, so each kickoff leases a
+    Crew exclusively. Up to `size` Crews are kept for reuse; if they are all
+    leased, an extra one is built for that request and then discarded.
+    """
+
+    def __init__(self, spec: AgentSpec, llm_factory: Callable[[], Any], size: int):
+        self.spec = spec
+        self.llm_factory = llm_factory
+        self.size = size
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def _build(self) -> "Crew":
+        with self._lock:
+            self.built += 1
+        with span("crew_build", agent=self.spec.name):
+            return build_crew(self.spec, self.llm_factory())
+
+    @contextmanager
+    def lease(self):
+        with self._lock:
+            crew = self._idle.popleft() if self._idle else None
+            if crew is not None:
+                self.reused += 1
+        if crew is None:
+            crew = self._build()
+        try:
+            yield crew
+        finally:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(crew)
+
+    def warm(self):
+        """Prebuild Crews up to the pool size."""
+        crews = [self._build() for _ in range(self.size - len(self._idle))]
+        with self._lock:
+            self._idle.extend(crews)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "idle": len(self._idle), "built": self.built, "reused": self.reused}
+
+
+def reset_token_usage(crew):
+    """Zero the token totals crewai keeps on each Agent for its whole life.
+
+    Pooled Crews are reused, so without this `output.token_usage` would be
+    the running total of every earlier kickoff on the same Crew. Reset in
+    place: the agent executor's token callback holds the same object.
+    """
+    for agent in crew.agents:
+        process = getattr(agent, "_token_process", None)
+        if process is not None:
+            process.__init__()
+
+
+class AgentRegistry:
+    """Prebuilt analyst and planner Crews, one pool per spec and LLM mode.
+
+    `llm_factories` maps an agent name to its own (llm_factory, streaming_llm_factory)
+    pair, for agents that need different LLM settings such as a longer timeout.
+    """
+
+    def __init__(
+        self,
+        llm_factory: Callable[[], Any],
+        streaming_llm_factory: Callable[[], Any],
+        pool_size: int = 4,
+        specs: Dict[str, AgentSpec] = AGENT_SPECS,
+        llm_factories: Optional[Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]]] = None,
+    ):
+        self.specs = specs
+        self.pools: Dict[tuple, CrewPool] = {}
+        for name, spec in specs.items():
+            factory, streaming_factory = (llm_factories or {}).get(name, (llm_factory, streaming_llm_factory))
+            self.pools[(name, False)] = CrewPool(spec, factory, pool_size)
+            self.pools[(name, True)] = CrewPool(spec, streaming_factory, pool_size)
+
+    def role(self, name: str) -> str:
+        return self.specs[name].role if name in self.specs else name
+
+    def kickoff(self, name: str, inputs: Dict[str, Any], stream: bool = False) -> str:
+        """Blocking: run the `name` agent with `inputs` bound into its prompt template."""
+        pool = self.pools.get((name, stream))
+        if pool is None:
+            raise ValueError(f"Invalid data type for AI recommendation: {name}")
+        with pool.lease() as crew:
+            reset_token_usage(crew)
+            with span("kickoff", agent=name, stream=stream):
+                output = crew.kickoff(inputs=inputs)
+            # The task description now holds the prompt with inputs interpolated
+            record_llm_call(name, crew.tasks[0].description, output)
+            return str(output)
+
+    def warm(self):
+        for (name, stream), pool in self.pools.items():
+            if not stream:
+                pool.warm()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {f"{name}{':stream' if stream else ''}": pool.stats() for (name, stream), pool in self.pools.items()}
@@ -1,18 +1,34 @@
 import os
-import uvicorn
+import json
+import time
 import asyncio
 import logging
-import streamlit as st
-import requests
-import os
 from dotenv import load_dotenv
-from pydantic import BaseModel
-from serpapi import GoogleSearch
-from crewai import Agent, Task, Crew, Process, LLM
 from functools import lru_cache
 from typing import List, Dict, Optional
-from fastapi import FastAPI, HTTPException
-from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from datetime import datetime, timedelta
+from cache import SearchCache, LLMCache, run_blocking
+from models import (
+    FlightRequest, HotelRequest, ItineraryRequest, TripRequest, AIResponse,
+    BatchFlightRequest, PriceCell, BatchFlightResponse, WatchRequest
+)
+from records import parse_flight_records, parse_hotel_records
+from ranking import rank_flights, rank_hotels, fallback_recommendation
+from prompt_format import compact_prompt, compact_text
+from singleflight import SingleFlight, open_leases
+from streaming import sse_event, stream_kickoff, event_stream
+from scheduler import WorkloadScheduler, QueueFullError, RateLimiter
+from agents import AgentRegistry, PROMPT_TEMPLATE_VERSION
+from itinerary import ItineraryPipeline, render_markdown, trip_dates
+from destinations import DestinationIndex, DEFAULT_INDEX, DEFAULT_SOURCE
+from serpapi_client import AsyncSerpApiClient, SerpApiError
+from price_watch import WatchStore, PriceWatcher
+from warmup import WarmUp
+from resilience import Upstream, CircuitOpenError, DeadlineExceededError, deadline_scope
+from logs import setup_logging, log_payload, capture
+from metrics import REQUEST_LATENCY, span, setup_tracing, register_stats, render_latest
 
 load_dotenv()
 
@@ -20,168 +36,266 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
 SERP_API_KEY = os.getenv("SERPER_API_KEY")
 
-# Initialize Logger
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Initialize Logger: records are formatted on a background thread; large payloads
+# are sampled and summarized, and optionally captured in full for replay
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    payload_mode=os.getenv("PAYLOAD_LOG_MODE", "summary"),
+    payload_sample_rate=float(os.getenv("PAYLOAD_LOG_SAMPLE_RATE", "1.0")),
+    payload_max_chars=int(os.getenv("PAYLOAD_LOG_MAX_CHARS", "2000")),
+    capture_path=os.getenv("PAYLOAD_CAPTURE_PATH"),
+    capture_max_bytes=int(os.getenv("PAYLOAD_CAPTURE_MAX_MB", "50")) * 1024 * 1024,
+)
 logger = logging.getLogger(__name__)
 
-@lru_cache(maxsize=1)
-def initialize_llm():
-    """Initialize and cache the LLM instance to avoid repeated initializations."""
+# Shared cache tier for running several workers: a SQLite file (one host) or a
+# redis:// URL. It backs both caches and the cross-process single-flight leases.
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL")
+
+# SerpAPI response cache; set SEARCH_CACHE_PATH to keep entries across restarts
+search_cache = SearchCache(
+    engine_ttls={
+        "google_flights": float(os.getenv("SEARCH_CACHE_TTL_FLIGHTS", "300")),
+        "google_hotels": float(os.getenv("SEARCH_CACHE_TTL_HOTELS", "900")),
+    },
+    maxsize=int(os.getenv("SEARCH_CACHE_MAXSIZE", "512")),
+    path=os.getenv("SEARCH_CACHE_PATH", SHARED_CACHE_URL),
+)
+
+# Separate bounded worker pools so slow LLM work cannot starve SerpAPI searches
+scheduler = WorkloadScheduler()
+scheduler.add_pool("search", int(os.getenv("SEARCH_WORKERS", "8")), int(os.getenv("SEARCH_QUEUE", "64")))
+scheduler.add_pool("analysis", int(os.getenv("ANALYSIS_WORKERS", "4")), int(os.getenv("ANALYSIS_QUEUE", "32")))
+scheduler.add_pool("itinerary", int(os.getenv("ITINERARY_WORKERS", "4")), int(os.getenv("ITINERARY_QUEUE", "32")))
+
+# SerpAPI transport: "async" uses a pooled asyncio client, "thread" the blocking GoogleSearch
+SERPAPI_CLIENT = os.getenv("SERPAPI_CLIENT", "async")
+serpapi_client = AsyncSerpApiClient(
+    base_url=os.getenv("SERPAPI_BASE_URL", "https://serpapi.com"),
+    timeout=float(os.getenv("SERPAPI_TIMEOUT", "30")),
+    max_retries=int(os.getenv("SERPAPI_MAX_RETRIES", "2")),
+)
+
+# Per-upstream circuit breakers and time limits. Searches still running after the recent
+# p95 get one hedged duplicate (within HEDGE_BUDGET of all searches); LLM calls are billed
+# and hold a worker thread, so they are only hedged with HEDGE_LLM=1.
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", "0.1"))
+serpapi_upstream = Upstream(
+    "serpapi",
+    timeout=float(os.getenv("SEARCH_TIMEOUT", "45")),
+    failure_threshold=BREAKER_FAILURES,
+    reset_timeout=BREAKER_RESET_SECONDS,
+    hedge=os.getenv("HEDGE_SEARCHES", "1") == "1",
+    hedge_budget=HEDGE_BUDGET,
+    excluded=(QueueFullError,),
+)
+llm_upstream = Upstream(
+    "gemini",
+    failure_threshold=BREAKER_FAILURES,
+    reset_timeout=BREAKER_RESET_SECONDS,
+    hedge=os.getenv("HEDGE_LLM", "0") == "1",
+    hedge_budget=HEDGE_BUDGET,
+    excluded=(QueueFullError,),
+)
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "30"))
+ITINERARY_TIMEOUT = float(os.getenv("ITINERARY_TIMEOUT", "120"))
+# Time budget for one API request; a client can shorten it with X-Request-Timeout (seconds)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "180"))
+
+# Concurrent identical searches and LLM calls share one in-flight task, across
+# worker processes too when a shared cache tier is configured
+inflight = SingleFlight(
+    leases=open_leases(SHARED_CACHE_URL) if SHARED_CACHE_URL else None,
+    lease_ttl=float(os.getenv("SINGLEFLIGHT_LEASE_TTL", "120")),
+)
+
+# Agent outputs keyed on (role, prompt template version, input data, model).
+# LLM_CACHE_PRICE_BUCKET > 0 turns on near-duplicate matching of prices.
+LLM_MODEL = "gemini/gemini-2.0-flash"
+llm_cache = LLMCache(
+    ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+    maxsize=int(os.getenv("LLM_CACHE_MAXSIZE", "256")),
+    path=os.getenv("LLM_CACHE_PATH", SHARED_CACHE_URL),
+    price_bucket=float(os.getenv("LLM_CACHE_PRICE_BUCKET", "0")),
+)
+
+# Per-request HTTP timeout for Gemini, so a stalled call frees its worker thread. It
+# defaults to ANALYSIS_TIMEOUT: a longer one would keep abandoned calls holding
+# analysis workers after their requests had already fallen back. Itinerary agents
+# write far longer answers and get their own limit, bounded by ITINERARY_TIMEOUT
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", str(ANALYSIS_TIMEOUT)))
+ITINERARY_LLM_TIMEOUT = float(os.getenv("ITINERARY_LLM_TIMEOUT", str(ITINERARY_TIMEOUT)))
+
+# crewai takes seconds to import, so it is loaded by the background warm-up (or the
+# first request) rather than at module import; health checks answer in the meantime
+@lru_cache(maxsize=None)
+def build_llm(timeout: float, stream: bool = False):
+    """Initialize and cache one LLM instance per timeout and streaming mode."""
+    from crewai import LLM
     return LLM(
-        model="gemini/gemini-2.0-flash",
+        model=LLM_MODEL,
         provider="google",
-        api_key=GEMINI_API_KEY
+        api_key=GEMINI_API_KEY,
+        timeout=timeout,
+        stream=stream
     )
 
+def initialize_llm():
+    """Initialize and cache the LLM instance to avoid repeated initializations."""
+    return build_llm(LLM_TIMEOUT)
 
-class FlightClassInfo:
-    def __init__(self, departure_airport, arrival_airport, duration, airplane, airline, airline_logo, travel_class, flight_number, legroom, extensions):
-        self.departure_airport = departure_airport
-        self.arrival_airport = arrival_airport
-        self.duration = duration
-        self.airplane = airplane
-        self.airline = airline
-        self.airline_logo = airline_logo
-        self.travel_class = travel_class
-        self.flight_number = flight_number
-        self.legroom = legroom
-        self.extensions = extensions
-
-class HotelClassInfo:
-    def __init__(self, name, description, rate_per_night, hotel_class, overall_rating, amenities, address=None):
-        self.name = name
-        self.description = description
-        self.rate_per_night = rate_per_night
-        self.hotel_class = hotel_class
-        self.overall_rating = overall_rating
-        self.amenities = amenities
-        self.address = address  # optional
-
-class FlightRequest(BaseModel):
-    origin: str
-    destination: str
-    outbound_date: str
-    return_date: str
-    type: str
-
-class HotelRequest(BaseModel):
-    location: str
-    check_in_date: str
-    check_out_date: str
-
-class ItineraryRequest(BaseModel):
-    destination: str
-    check_in_date: str
-    check_out_date: str
-    flights: str
-    hotels: str
-
-class FlightInfo(BaseModel):
-    airline: str
-    price: str
-    duration: str
-    stops: str
-    departure: str
-    arrival: str
-    travel_class: str
-    return_date: str
-    airline_logo: str
-
-class HotelInfo(BaseModel):
-    name: str
-    price: str
-    rating: float
-    location: str
-    link: str
-
-class AIResponse(BaseModel):
-    flights: List[FlightInfo] = []
-    hotels: List[HotelInfo] = []
-    ai_flight_recommendation: str = ""
-    ai_hotel_recommendation: str = ""
-    itinerary: str = ""
-
-
-app = FastAPI(title="Travel Planning API", version="1.0.1")
-
+def initialize_streaming_llm():
+    """Initialize and cache a token-streaming LLM instance for the SSE endpoints."""
+    return build_llm(LLM_TIMEOUT, stream=True)
 
-def parse_hotel_info_list(hotel_data_list: List[dict], location: str = "Unknown") -> List[HotelInfo]:
-    parsed_hotels = []
-    for hotel_data in hotel_data_list:
-        if not isinstance(hotel_data, dict):
-            logger.warning(f"Skipping non-dict hotel_data: {hotel_data}")
-            continue
-        parsed_hotels.append(
-            HotelInfo(
-                name=hotel_data.get("name", "No name"),
-                link=hotel_data.get("link") or hotel_data.get("serpapi_property_details_link", ""),
-                location=location,
-                price=str(hotel_data.get("rate_per_night", {}).get("extracted_lowest", "0")),
-                rating=hotel_data.get("overall_rating") or 0.0
-            )
-        )
-    return parsed_hotels
+def initialize_itinerary_llms():
+    """(LLM factory, streaming LLM factory) for the itinerary planners."""
+    return (lambda: build_llm(ITINERARY_LLM_TIMEOUT), lambda: build_llm(ITINERARY_LLM_TIMEOUT, stream=True))
 
-def parse_flight_object(data: Dict, return_date: Optional[str] = "") -> FlightInfo:
-    flights = data.get("flights", [])
-    layovers = data.get("layovers", [])
+# Prebuilt analyst/planner Crews reused across requests; only the prompt inputs change
+agent_registry = AgentRegistry(
+    llm_factory=initialize_llm,
+    streaming_llm_factory=initialize_streaming_llm,
+    pool_size=int(os.getenv("AGENT_POOL_SIZE", "4")),
+    llm_factories={name: initialize_itinerary_llms() for name in ("itinerary", "itinerary_skeleton", "itinerary_day")},
+)
 
-    # Airline and logo from the first flight (can be extended for multi-leg)
-    airline = flights[0]["airline"] if flights else "N/A"
-    airline_logo = flights[0]["airline_logo"] if flights else ""
 
-    # Price and duration
-    price = f"${data.get('price', 'N/A')}"
-    total_flight_duration = sum(flight.get("duration", 0) for flight in flights)
+app = FastAPI(title="Travel Planning API", version="1.0.1")
 
-    # Stops information
-    stops = f"{len(layovers)} stop(s)" if layovers else "Non-stop"
+# Optional OpenTelemetry export, enabled by OTEL_EXPORTER_OTLP_ENDPOINT
+setup_tracing()
 
-    # Departure and Arrival
-    if flights:
-        departure_airport = flights[0]["departure_airport"]
-        arrival_airport = flights[-1]["arrival_airport"]
-        departure = f"{departure_airport['id']} - {departure_airport['name']}"
-        arrival = f"{arrival_airport['id']} - {arrival_airport['name']}"
-    else:
-        departure = "N/A"
-        arrival = "N/A"
-
-    # Travel class
-    travel_class = flights[0].get("travel_class", "N/A") if flights else "N/A"
-
-    # Return date (only if type is not one-way)
-    flight_type = data.get("type", "oneway").lower()
-    return_date_val = return_date if flight_type != "oneway" else "N/A"
-
-    return FlightInfo(
-        airline=airline,
-        price=price,
-        duration=f"{total_flight_duration} minutes",
-        stops=stops,
-        departure=departure,
-        arrival=arrival,
-        travel_class=travel_class,
-        return_date=return_date_val,
-        airline_logo=airline_logo
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /watches/{watch_id} is one series
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.labels(request.method, endpoint, str(status)).observe(time.perf_counter() - started)
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request, exc: QueueFullError):
+    logger.warning(f"Shedding load: {exc}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
     )
 
-def parse_all_flights(response: Dict, return_date: Optional[str] = "") -> List[FlightInfo]:
-    best_flights = [parse_flight_object(flight, return_date) for flight in response.get("best_flights", [])]
-    other_flights = [parse_flight_object(flight, return_date) for flight in response.get("other_flights", [])]
-    all_flights = best_flights + other_flights
-    return all_flights
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    try:
+        seconds = float(request.headers.get("x-request-timeout", REQUEST_DEADLINE_SECONDS))
+    except ValueError:
+        seconds = REQUEST_DEADLINE_SECONDS
+    with deadline_scope(min(seconds, REQUEST_DEADLINE_SECONDS) if seconds > 0 else REQUEST_DEADLINE_SECONDS):
+        return await call_next(request)
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request, exc: CircuitOpenError):
+    logger.warning(f"Failing fast: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request, exc: DeadlineExceededError):
+    logger.warning(f"Deadline exceeded: {exc}")
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.on_event("startup")
+async def start_price_watcher():
+    if WATCH_ENABLED:
+        price_watcher.start()
+
+@app.on_event("startup")
+async def start_warmup():
+    warmup.start()
+
+@app.on_event("startup")
+async def purge_expired_cache_entries():
+    # Rows left behind by earlier runs; later ones are purged as new entries are written
+    for cache in (search_cache, llm_cache):
+        purged = await run_blocking(cache.purge_expired)
+        if purged:
+            logger.info(f"Purged {purged} expired cache entries")
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await price_watcher.stop()
+    scheduler.shutdown()
+    await serpapi_client.aclose()
+    search_cache.close()
+    llm_cache.close()
+    inflight.close()
+
+
+# Only the best RANK_TOP_K distinct options (plus summary stats) are sent to the analyst
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "5"))
+
+def rank_flight_results(response: Dict, return_date: Optional[str] = ""):
+    with span("parse_flights"):
+        records = parse_flight_records(response, return_date)
+    with span("rank_flights"):
+        return rank_flights(records, top_k=RANK_TOP_K)
+
+def rank_hotel_results(hotel_data_list: Optional[List[dict]], location: str = "Unknown"):
+    with span("parse_hotels"):
+        records = parse_hotel_records(hotel_data_list or [], location)
+    with span("rank_hotels"):
+        return rank_hotels(records, top_k=RANK_TOP_K)
+
+
+async def run_search(params, limiter: Optional[RateLimiter] = None):
+    """Generic function to run SerpAPI searches asynchronously.
+
+    With `limiter`, a token is taken only when SerpAPI is actually called, not for cache hits.
+    """
+    with span("run_search", engine=params.get("engine")):
+        cached = await search_cache.get_async(params)
+        if cached is not None:
+            logger.info(f"Search cache hit for {params.get('engine')}")
+            return cached
+        return await inflight.do(
+            f"search:{SearchCache.make_key(params)}", lambda: _fetch_search(params, limiter),
+            lambda: search_cache.peek_async(params)
+        )
 
-async def run_search(params):
-    """Generic function to run SerpAPI searches asynchronously."""
+async def _fetch_search(params, limiter=None):
+    if limiter is not None:
+        await limiter.acquire()
+    if SERPAPI_CLIENT == "thread":
+        from serpapi import GoogleSearch
+        # GoogleSearch adds keys to the dict it is given, so hand it a copy
+        attempt = lambda: scheduler.run("search", lambda: GoogleSearch(dict(params)).get_dict())
+    else:
+        attempt = lambda: scheduler.run_async("search", lambda: serpapi_client.search(params))
     try:
-        return await asyncio.to_thread(lambda: GoogleSearch(params).get_dict())
+        started = time.perf_counter()
+        with span("serpapi", engine=params.get("engine"), client=SERPAPI_CLIENT):
+            results = await serpapi_upstream.call(attempt)
+    except (QueueFullError, CircuitOpenError, DeadlineExceededError):
+        raise
     except Exception as e:
         logger.exception(f"SerpAPI search error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Search API error: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Search API error: {str(e)}")
+    elapsed = time.perf_counter() - started
+    await search_cache.set_async(params, results, elapsed)
+    capture("serpapi", params=params, response=results, elapsed=round(elapsed, 4))
+    return results
 
-async def search_flights(flight_request: FlightRequest):
+async def search_flights(flight_request: FlightRequest, limiter: Optional[RateLimiter] = None):
     """Fetch real-time flight details from Google Flights using SerpAPI."""
     logger.info(f"Searching flights: {flight_request.origin} to {flight_request.destination}")
 
@@ -198,13 +312,19 @@ async def search_flights(flight_request: FlightRequest):
         "currency": "USD",
 
     }
-    logger.info(params)
-    search_results = await run_search(params)
+    log_payload(logger, "Flight search params", params)
+    search_results = await run_search(params, limiter)
     flights = search_results
     return flights
 
 async def search_hotels(hotel_request: HotelRequest):
     """Fetch hotel information from SerpAPI."""
+    search_results = await search_hotel_results(hotel_request)
+    hotels = search_results.get("properties")
+    return hotels
+
+async def search_hotel_results(hotel_request: HotelRequest):
+    """The full SerpAPI hotel response, including an `error` when the search failed."""
     logger.info(f"Searching hotels for: {hotel_request.location}")
 
     params = {
@@ -220,180 +340,669 @@ async def search_hotels(hotel_request: HotelRequest):
         "rating": 8
     }
 
-    search_results = await run_search(params)
-    hotels = search_results.get("properties")
-    return hotels
+    return await run_search(params)
+
+async def cached_llm_call(role, data, fn):
+    """Serve an agent output from the LLM cache, coalescing concurrent misses."""
+    key = llm_cache.make_key(role, PROMPT_TEMPLATE_VERSION, data, LLM_MODEL)
+    cached = await llm_cache.get_async(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {role}")
+        return cached
+
+    async def run():
+        started = time.perf_counter()
+        output = await fn()
+        await llm_cache.set_async(key, output)
+        capture("llm", role=role, data=data, output=output, elapsed=round(time.perf_counter() - started, 4))
+        return output
+
+    return await inflight.do(f"llm:{key}", run, lambda: llm_cache.peek_async(key))
+
+async def stream_llm_call(agent_name, data, inputs, result_event, workload, fallback=None):
+    """Yield SSE events for an agent output: `token` chunks on a cache miss, then the full result.
+
+    With `fallback`, an LLM failure ends the stream with `fallback()` as the result, flagged `degraded`.
+    """
+    role = agent_registry.role(agent_name)
+    key = llm_cache.make_key(role, PROMPT_TEMPLATE_VERSION, data, LLM_MODEL)
+    cached = await llm_cache.get_async(key)
+    if cached is not None:
+        yield sse_event(result_event, {"text": cached})
+        return
+
+    kickoff = lambda: agent_registry.kickoff(agent_name, inputs, stream=True)
+    try:
+        async for kind, text in llm_upstream.stream(lambda: stream_kickoff(kickoff, lambda fn: scheduler.run(workload, fn))):
+            if kind == "token":
+                yield sse_event("token", {"text": text})
+            else:
+                await llm_cache.set_async(key, text)
+                yield sse_event(result_event, {"text": text})
+    except QueueFullError:
+        raise
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.warning(f"Streaming {agent_name} failed, answering with the fallback: {e!r}")
+        yield sse_event(result_event, {"text": fallback(), "degraded": True})
 
 async def get_ai_recommendation(data_type, formatted_data):
+    role = agent_registry.role(data_type)
+    return await cached_llm_call(role, formatted_data, lambda: _run_ai_recommendation(data_type, formatted_data))
+
+async def _run_ai_recommendation(data_type, formatted_data):
     logger.info(f"Getting {data_type} analysis from AI")
-    logger.info(formatted_data)
-    llm_model = initialize_llm()
-
-    # Configure agent based on data type
-    if data_type == "flights":
-        role = "AI Flight Analyst"
-        goal = "Analyze flight options and recommend the best one considering price, duration, stops, and overall convenience."
-        backstory = f"AI expert that provides in-depth analysis comparing flight options based on multiple factors."
-        description = """
-        Recommend the best flight from the available options, based on the details provided below:
-
-        **Reasoning for Recommendation:**
-        - **Price:** Provide a detailed explanation about why this flight offers the best value compared to others.
-        - **Duration:** Explain why this flight has the best duration in comparison to others.
-        - **Stops:** Discuss why this flight has minimal or optimal stops.
-        - **Travel Class:** Describe why this flight provides the best comfort and amenities.
-
-        Use the provided flight data as the basis for your recommendation. Be sure to justify your choice using clear reasoning for each attribute. Do not repeat the flight details in your response.
-        """
-    elif data_type == "hotels":
-        role = "AI Hotel Analyst"
-        goal = "Analyze hotel options and recommend the best one considering price, rating, location, and amenities."
-        backstory = f"AI expert that provides in-depth analysis comparing hotel options based on multiple factors."
-        description = """
-        Based on the following analysis, generate a detailed recommendation for the best hotel. Your response should include clear reasoning based on price, rating, location, and amenities.
-
-        **AI Hotel Recommendation**
-        We recommend the best hotel based on the following analysis:
-
-        **Reasoning for Recommendation**:
-        - **Price:** The recommended hotel is the best option for the price compared to others, offering the best value for the amenities and services provided.
-        - **Rating:** With a higher rating compared to the alternatives, it ensures a better overall guest experience. Explain why this makes it the best choice.
-        - **Location:** The hotel is in a prime location, close to important attractions, making it convenient for travelers.
-        - **Amenities:** The hotel offers amenities like Wi-Fi, pool, fitness center, free breakfast, etc. Discuss how these amenities enhance the experience, making it suitable for different types of travelers.
-
-        **Reasoning Requirements**:
-        - Ensure that each section clearly explains why this hotel is the best option based on the factors of price, rating, location, and amenities.
-        - Compare it against the other options and explain why this one stands out.
-        - Provide concise, well-structured reasoning to make the recommendation clear to the traveler.
-        - Your recommendation should help a traveler make an informed decision based on multiple factors, not just one.
-        """
-    else:
-        raise ValueError("Invalid data type for AI recommendation")
-
-    # Create the agent and task
-    analyze_agent = Agent(
-        role=role,
-        goal=goal,
-        backstory=backstory,
-        llm=llm_model,
-        verbose=False
+    log_payload(logger, f"{data_type} analysis input", formatted_data)
+    inputs = recommendation_inputs(formatted_data)
+    return await llm_upstream.call(
+        lambda: scheduler.run("analysis", agent_registry.kickoff, data_type, inputs), timeout=ANALYSIS_TIMEOUT
     )
 
-    analyze_task = Task(
-        description=f"{description}\n\nData to analyze:\n{formatted_data}",
-        agent=analyze_agent,
-        expected_output=f"A structured recommendation explaining the best {data_type} choice based on the analysis of provided details."
+async def recommendation_or_fallback(data_type, formatted_data, fallback):
+    """(text, degraded): the AI recommendation, or `fallback()` when analysis fails, times out or its circuit is open."""
+    try:
+        return await get_ai_recommendation(data_type, formatted_data), False
+    except QueueFullError:
+        raise
+    except Exception as e:
+        logger.warning(f"{data_type} analysis unavailable, answering with the ranked fallback: {e!r}")
+        return fallback(), True
+
+async def ranked_recommendation(kind, ranking):
+    return await recommendation_or_fallback(
+        kind, ranking.prompt_data(), lambda: fallback_recommendation(kind, ranking)
     )
 
-    # Define CrewAI Workflow for the agent
-    analyst_crew = Crew(
-        agents=[analyze_agent],
-        tasks=[analyze_task],
-        process=Process.sequential,
-        verbose=False
+# Approximate token budgets for the data embedded in analyst and itinerary prompts;
+# over budget, text is shortened and low-value columns, then lowest-ranked rows, dropped.
+# 0 serializes compactly without trimming.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+ITINERARY_INPUT_TOKEN_BUDGET = int(os.getenv("ITINERARY_INPUT_TOKEN_BUDGET", "400"))
+
+def recommendation_inputs(formatted_data):
+    return {"formatted_data": compact_prompt(formatted_data, PROMPT_TOKEN_BUDGET or None)}
+
+def itinerary_prompt_text(text):
+    """Flight or hotel details as sent to the planner: selected options as a table, pasted text normalized."""
+    return compact_text(text, ITINERARY_INPUT_TOKEN_BUDGET or None)
+
+# Curated POIs for itinerary prompts, compiled from data/destinations.json on first use
+destination_index = DestinationIndex(
+    path=os.getenv("DESTINATION_INDEX_PATH", DEFAULT_INDEX),
+    source=os.getenv("DESTINATION_SOURCE_PATH", DEFAULT_SOURCE),
+) if os.getenv("DESTINATION_INDEX_ENABLED", "1") == "1" else None
+
+# Build the agent Crews (importing crewai) and open the destination index after startup;
+# /readyz reports 503 until this is done. With WARMUP_ENABLED=0 both load on first use.
+warmup = WarmUp()
+if os.getenv("WARMUP_ENABLED", "1") == "1":
+    warmup.add("agents", lambda: agent_registry.warm())
+    if destination_index is not None:
+        warmup.add("destination_index", destination_index.open, required=False)
+
+def local_knowledge(destination):
+    return destination_index.trip_knowledge(destination) if destination_index is not None else ""
+
+def itinerary_inputs(destination, flights_text, hotels_text, check_in_date, check_out_date):
+    # Convert the string dates to datetime objects
+    check_in = datetime.strptime(check_in_date, "%Y-%m-%d")
+    check_out = datetime.strptime(check_out_date, "%Y-%m-%d")
+
+    return {
+        "days": (check_out - check_in).days,
+        "flights_text": itinerary_prompt_text(flights_text),
+        "hotels_text": itinerary_prompt_text(hotels_text),
+        "destination": destination,
+        "check_in_date": check_in_date,
+        "check_out_date": check_out_date,
+        "local_knowledge": local_knowledge(destination),
+    }
+
+# "structured" outlines the trip, then plans each day with its own LLM call;
+# "single" asks one agent for the whole markdown itinerary
+ITINERARY_MODE = os.getenv("ITINERARY_MODE", "structured")
+
+async def run_itinerary_agent(name, data, inputs):
+    return await cached_llm_call(
+        agent_registry.role(name),
+        data,
+        lambda: llm_upstream.call(
+            lambda: scheduler.run("itinerary", agent_registry.kickoff, name, inputs), timeout=ITINERARY_TIMEOUT
+        )
     )
 
-    # Execute CrewAI Process
-    crew_results = await asyncio.to_thread(analyst_crew.kickoff)
-    return str(crew_results)
+# Each itinerary day is its own LLM call, so trip length is capped
+ITINERARY_MAX_DAYS = int(os.getenv("ITINERARY_MAX_DAYS", "30"))
+itinerary_pipeline = ItineraryPipeline(
+    run_itinerary_agent,
+    concurrency=int(os.getenv("ITINERARY_DAY_CONCURRENCY", "4")),
+    index=destination_index,
+    max_days=ITINERARY_MAX_DAYS
+)
+
+def check_trip_dates(check_in_date, check_out_date):
+    """Reject malformed, reversed or overly long stays with a 400."""
+    try:
+        trip_dates(check_in_date, check_out_date, ITINERARY_MAX_DAYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 async def generate_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date):
     """Generate a detailed travel itinerary based on flight and hotel information."""
-    try:
-        # Convert the string dates to datetime objects
-        check_in = datetime.strptime(check_in_date, "%Y-%m-%d")
-        check_out = datetime.strptime(check_out_date, "%Y-%m-%d")
-
-        # Calculate the difference in days
-        days = (check_out - check_in).days
-
-        llm_model = initialize_llm()
+    itinerary, _ = await generate_itinerary_plan(destination, flights_text, hotels_text, check_in_date, check_out_date)
+    return itinerary
 
-        analyze_agent = Agent(
-            role="AI Travel Planner",
-            goal="Create a detailed itinerary for the user based on flight and hotel information",
-            backstory="AI travel expert generating a day-by-day itinerary including flight details, hotel stays, and must-visit locations in the destination.",
-            llm=llm_model,
-            verbose=False
-        )
+async def generate_itinerary_plan(destination, flights_text, hotels_text, check_in_date, check_out_date):
+    """Markdown itinerary plus, in structured mode, the typed day-by-day plan it was rendered from.
 
-        analyze_task = Task(
-            description=f"""
-            Based on the following details, create a {days}-day itinerary for the user:
-
-            **Flight Details**:
-            {flights_text}
-
-            **Hotel Details**:
-            {hotels_text}
-
-            **Destination**: {destination}
-
-            **Travel Dates**: {check_in_date} to {check_out_date} ({days} days)
-
-            The itinerary should include:
-            - Flight arrival and departure information
-            - Hotel check-in and check-out details
-            - Day-by-day breakdown of activities
-            - Must-visit attractions and estimated visit times
-            - Restaurant recommendations for meals
-            - Tips for local transportation
-
-            **Format Requirements**:
-            - Use markdown formatting with clear headings (# for main headings, ## for days, ### for sections)
-            - Include emojis for different types of activities ( for landmarks, 🍽️ for restaurants, etc.)
-            - Use bullet points for listing activities
-            - Include estimated timings for each activity
-            - Format the itinerary to be visually appealing and easy to read
-            """,
-            agent=analyze_agent,
-            expected_output="A well-structured, visually appealing itinerary in markdown format, including flight, hotel, and day-wise breakdown with emojis, headers, and bullet points."
+    If the LLM steps fail outright, a plan built from default day themes and
+    curated places is returned instead, marked `degraded`.
+    """
+    check_trip_dates(check_in_date, check_out_date)
+    try:
+        if ITINERARY_MODE == "single":
+            return await _single_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date), None
+        plan = await itinerary_pipeline.generate(
+            destination, itinerary_prompt_text(flights_text), itinerary_prompt_text(hotels_text),
+            check_in_date, check_out_date
         )
+    except QueueFullError:
+        raise
+    except Exception as e:
+        logger.warning(f"Itinerary generation failed, answering with the curated fallback: {e!r}")
+        plan = itinerary_pipeline.fallback_plan(destination, check_in_date, check_out_date)
+    return render_markdown(plan, flights_text, hotels_text), plan
+
+async def _single_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date):
+    data = {
+        "destination": destination,
+        "flights": flights_text,
+        "hotels": hotels_text,
+        "check_in_date": check_in_date,
+        "check_out_date": check_out_date,
+        "local_knowledge": local_knowledge(destination),
+    }
+    return await cached_llm_call(
+        agent_registry.role("itinerary"),
+        data,
+        lambda: _run_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date)
+    )
 
-        itinerary_planner_crew = Crew(
-            agents=[analyze_agent],
-            tasks=[analyze_task],
-            process=Process.sequential,
-            verbose=False
-        )
+async def _run_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date):
+    inputs = itinerary_inputs(destination, flights_text, hotels_text, check_in_date, check_out_date)
+    return await llm_upstream.call(
+        lambda: scheduler.run("itinerary", agent_registry.kickoff, "itinerary", inputs), timeout=ITINERARY_TIMEOUT
+    )
 
-        crew_results = await asyncio.to_thread(itinerary_planner_crew.kickoff)
-        return str(crew_results)
+def model_response(model):
+    """Serialize a response model in one pass with pydantic's JSON encoder.
 
-    except Exception as e:
-        return f"An error occurred: {e}"
+    Returning the model would have FastAPI dump it to Python objects and run
+    json.dumps over them, which costs more than parsing a large option list.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
 
 @app.post("/search_flights/", response_model=AIResponse)
 async def get_flight_recommendations(flight_request: FlightRequest):
     flights = await search_flights(flight_request)
-    logger.info(flights)
-    flights_text = parse_all_flights(flights, flight_request.return_date)
-    ai_recommendation = await get_ai_recommendation("flights", flights_text)
-    return AIResponse(flights=flights_text, ai_flight_recommendation=ai_recommendation)
+    log_payload(logger, "Flight search results", flights)
+    ranking = rank_flight_results(flights, flight_request.return_date)
+    ai_recommendation, degraded = await ranked_recommendation("flights", ranking)
+    return model_response(AIResponse(
+        flights=ranking.options(),
+        ai_flight_recommendation=ai_recommendation,
+        degraded=["ai_flight_recommendation"] if degraded else []
+    ))
 
 @app.post("/search_hotels/", response_model=AIResponse)
 async def get_hotel_recommendations(hotel_request: HotelRequest):
     hotels = await search_hotels(hotel_request)
-    logger.info(hotels)
-    hotels_text = parse_hotel_info_list(hotels, hotel_request.location)
-    ai_recommendation = await get_ai_recommendation("hotels", hotels_text)
-    return AIResponse(hotels=hotels_text, ai_hotel_recommendation=ai_recommendation)
+    log_payload(logger, "Hotel search results", hotels)
+    ranking = rank_hotel_results(hotels, hotel_request.location)
+    ai_recommendation, degraded = await ranked_recommendation("hotels", ranking)
+    return model_response(AIResponse(
+        hotels=ranking.options(),
+        ai_hotel_recommendation=ai_recommendation,
+        degraded=["ai_hotel_recommendation"] if degraded else []
+    ))
 
 @app.post("/generate_itinerary/", response_model=AIResponse)
 async def get_itinerary(itinerary_request: ItineraryRequest):
-    itinerary = await generate_itinerary(
+    itinerary, plan = await generate_itinerary_plan(
         itinerary_request.destination,
         itinerary_request.flights,
         itinerary_request.hotels,
         itinerary_request.check_in_date,
         itinerary_request.check_out_date
     )
-    return AIResponse(itinerary=itinerary)
+    return AIResponse(
+        itinerary=itinerary,
+        itinerary_plan=plan,
+        degraded=["itinerary"] if plan is not None and plan.degraded else []
+    )
+
+def sse_response(events):
+    return StreamingResponse(
+        event_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/search_flights/stream")
+async def stream_flight_recommendations(flight_request: FlightRequest):
+    """SSE variant of /search_flights/: parsed flights first, then the recommendation as it is generated."""
+    async def events():
+        flights = await search_flights(flight_request)
+        ranking = rank_flight_results(flights, flight_request.return_date)
+        yield sse_event("flights", ranking.options())
+        prompt_data = ranking.prompt_data()
+        async for event in stream_llm_call(
+            "flights",
+            prompt_data,
+            recommendation_inputs(prompt_data),
+            "ai_flight_recommendation",
+            "analysis",
+            fallback=lambda: fallback_recommendation("flights", ranking)
+        ):
+            yield event
+
+    return sse_response(events())
+
+@app.post("/search_hotels/stream")
+async def stream_hotel_recommendations(hotel_request: HotelRequest):
+    """SSE variant of /search_hotels/: parsed hotels first, then the recommendation as it is generated."""
+    async def events():
+        hotels = await search_hotels(hotel_request)
+        ranking = rank_hotel_results(hotels, hotel_request.location)
+        yield sse_event("hotels", ranking.options())
+        prompt_data = ranking.prompt_data()
+        async for event in stream_llm_call(
+            "hotels",
+            prompt_data,
+            recommendation_inputs(prompt_data),
+            "ai_hotel_recommendation",
+            "analysis",
+            fallback=lambda: fallback_recommendation("hotels", ranking)
+        ):
+            yield event
+
+    return sse_response(events())
+
+async def stream_structured_itinerary(destination, flights_text, hotels_text, check_in_date, check_out_date):
+    """SSE events for the structured pipeline.
+
+    `skeleton` lists the outlined days, a `day` event follows as each day is
+    planned, and `itinerary` ends the stream with the markdown and the whole plan.
+    """
+    try:
+        async for kind, value in itinerary_pipeline.stream(
+            destination, itinerary_prompt_text(flights_text), itinerary_prompt_text(hotels_text),
+            check_in_date, check_out_date
+        ):
+            if kind == "skeleton":
+                yield sse_event("skeleton", {"days": [day.model_dump() for day in value]})
+            elif kind == "day":
+                yield sse_event("day", value.model_dump())
+            else:
+                plan = value
+    except QueueFullError:
+        raise
+    except Exception as e:
+        logger.warning(f"Itinerary generation failed, answering with the curated fallback: {e!r}")
+        plan = itinerary_pipeline.fallback_plan(destination, check_in_date, check_out_date)
+    yield sse_event("itinerary", {
+        "text": render_markdown(plan, flights_text, hotels_text),
+        "plan": plan.model_dump(),
+        "degraded": plan.degraded,
+    })
+
+@app.post("/generate_itinerary/stream")
+async def stream_itinerary(itinerary_request: ItineraryRequest):
+    """SSE variant of /generate_itinerary/, following ITINERARY_MODE like the JSON endpoint.
+
+    Structured mode streams the outline and then each day as it is planned;
+    single mode streams the one agent's markdown as it is written.
+    """
+    check_trip_dates(itinerary_request.check_in_date, itinerary_request.check_out_date)
+    if ITINERARY_MODE != "single":
+        return sse_response(stream_structured_itinerary(
+            itinerary_request.destination,
+            itinerary_request.flights,
+            itinerary_request.hotels,
+            itinerary_request.check_in_date,
+            itinerary_request.check_out_date
+        ))
+    data = {
+        "destination": itinerary_request.destination,
+        "flights": itinerary_request.flights,
+        "hotels": itinerary_request.hotels,
+        "check_in_date": itinerary_request.check_in_date,
+        "check_out_date": itinerary_request.check_out_date,
+        "local_knowledge": local_knowledge(itinerary_request.destination),
+    }
+    inputs = itinerary_inputs(
+        itinerary_request.destination,
+        itinerary_request.flights,
+        itinerary_request.hotels,
+        itinerary_request.check_in_date,
+        itinerary_request.check_out_date
+    )
+    fallback_plan = lambda: itinerary_pipeline.fallback_plan(
+        itinerary_request.destination, itinerary_request.check_in_date, itinerary_request.check_out_date
+    )
+    return sse_response(stream_llm_call(
+        "itinerary",
+        data,
+        inputs,
+        "itinerary",
+        "itinerary",
+        fallback=lambda: render_markdown(fallback_plan(), itinerary_request.flights, itinerary_request.hotels)
+    ))
+
+def format_selection_for_itinerary(options, recommendation, limit=3):
+    """Render the top-ranked options plus the AI pick as itinerary prompt input."""
+    selected = [option.model_dump(exclude={"airline_logo", "link"}) for option in options[:limit]]
+    return f"{json.dumps(selected, indent=2)}\n\nAI recommendation:\n{recommendation}"
+
+@app.post("/plan_trip/", response_model=AIResponse)
+@app.post("/complete_search/", response_model=AIResponse)
+async def plan_trip(trip_request: TripRequest):
+    """Search flights and hotels, analyze both and build an itinerary in one call."""
+    flight_request = trip_request.flight_request
+    hotel_request = trip_request.hotel_request
+    # Fail before spending searches on a stay the itinerary step would reject
+    check_trip_dates(hotel_request.check_in_date, hotel_request.check_out_date)
+
+    # Independent stages run concurrently: searches, then both analyses
+    flight_results, hotel_results = await asyncio.gather(
+        search_flights(flight_request),
+        search_hotels(hotel_request)
+    )
+    flight_ranking = rank_flight_results(flight_results, flight_request.return_date)
+    hotel_ranking = rank_hotel_results(hotel_results, hotel_request.location)
+
+    (flight_recommendation, flights_degraded), (hotel_recommendation, hotels_degraded) = await asyncio.gather(
+        ranked_recommendation("flights", flight_ranking),
+        ranked_recommendation("hotels", hotel_ranking)
+    )
+
+    itinerary, plan = await generate_itinerary_plan(
+        trip_request.destination or hotel_request.location,
+        format_selection_for_itinerary(flight_ranking.top_infos(), flight_recommendation),
+        format_selection_for_itinerary(hotel_ranking.top_infos(), hotel_recommendation),
+        hotel_request.check_in_date,
+        hotel_request.check_out_date
+    )
+    return model_response(AIResponse(
+        flights=flight_ranking.options(),
+        hotels=hotel_ranking.options(),
+        ai_flight_recommendation=flight_recommendation,
+        ai_hotel_recommendation=hotel_recommendation,
+        itinerary=itinerary,
+        itinerary_plan=plan,
+        degraded=[
+            field for field, degraded in (
+                ("ai_flight_recommendation", flights_degraded),
+                ("ai_hotel_recommendation", hotels_degraded),
+                ("itinerary", plan is not None and plan.degraded),
+            ) if degraded
+        ]
+    ))
+
+# Batch searches fan out over a bounded number of concurrent SerpAPI calls
+BATCH_MAX_CELLS = int(os.getenv("BATCH_MAX_CELLS", "30"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+batch_rate_limiter = RateLimiter(
+    rate=float(os.getenv("BATCH_RATE_PER_SEC", "5")),
+    burst=int(os.getenv("BATCH_RATE_BURST", "5"))
+)
+
+def batch_grid(batch_request: BatchFlightRequest) -> List[FlightRequest]:
+    """One FlightRequest per route and departure date within ±flex_days, keeping the trip length."""
+    try:
+        outbound = datetime.strptime(batch_request.outbound_date, "%Y-%m-%d")
+        return_date = datetime.strptime(batch_request.return_date, "%Y-%m-%d")
+        shifts = [timedelta(days=offset) for offset in range(-batch_request.flex_days, batch_request.flex_days + 1)]
+        dates = [
+            ((outbound + shift).strftime("%Y-%m-%d"), (return_date + shift).strftime("%Y-%m-%d"))
+            for shift in shifts
+        ]
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Dates must be valid YYYY-MM-DD dates")
+    return [
+        FlightRequest(
+            origin=route.origin,
+            destination=route.destination,
+            outbound_date=outbound_date,
+            return_date=return_date,
+            type=batch_request.type
+        )
+        for route in batch_request.routes
+        for outbound_date, return_date in dates
+    ]
+
+async def search_price_cell(flight_request: FlightRequest, semaphore: asyncio.Semaphore) -> PriceCell:
+    """Search one grid cell and reduce it to its cheapest fare and shortest duration."""
+    cell = PriceCell(
+        origin=flight_request.origin.strip().upper(),
+        destination=flight_request.destination.strip().upper(),
+        outbound_date=flight_request.outbound_date,
+        return_date=flight_request.return_date
+    )
+    try:
+        async with semaphore:
+            flights = await search_flights(flight_request, limiter=batch_rate_limiter)
+    except (HTTPException, QueueFullError, CircuitOpenError, DeadlineExceededError) as e:
+        cell.error = str(getattr(e, "detail", e))
+        return cell
+
+    if flights.get("error"):
+        cell.error = flights["error"]
+        return cell
+    records = [r for r in parse_flight_records(flights, flight_request.return_date) if r.price is not None]
+    cell.options = len(records)
+    if records:
+        cheapest = min(records, key=lambda r: r.price)
+        cell.cheapest_price = cheapest.price
+        cell.best_airline = cheapest.airline
+        cell.shortest_duration = min(r.duration for r in records)
+    return cell
+
+def matrix_prompt_data(cells: List[PriceCell]) -> Dict:
+    """Compact rows for the fare analyst, one per cell."""
+    return {
+        "columns": ["route", "outbound", "return", "cheapest_usd", "shortest_min", "airline", "options"],
+        "rows": [
+            [f"{c.origin}-{c.destination}", c.outbound_date, c.return_date,
+             c.cheapest_price, c.shortest_duration, c.best_airline, c.options]
+            if c.error is None else [f"{c.origin}-{c.destination}", c.outbound_date, c.return_date, "error"]
+            for c in cells
+        ],
+    }
+
+def matrix_fallback(priced: List[PriceCell]) -> str:
+    """Deterministic summary of the cheapest cells, for when the fare analyst is unavailable."""
+    ordered = sorted(priced, key=lambda c: (c.cheapest_price, c.outbound_date, c.origin, c.destination))
+    lines = ["AI analysis is unavailable right now; these are the cheapest fares found:"]
+    for c in ordered[:3]:
+        airline = f" with {c.best_airline}" if c.best_airline else ""
+        lines.append(
+            f"- {c.origin}-{c.destination}, {c.outbound_date} to {c.return_date}: ${c.cheapest_price:g}{airline}"
+            + (f", shortest trip {c.shortest_duration} min" if c.shortest_duration else "")
+        )
+    return "\n".join(lines)
+
+@app.post("/batch_search_flights/", response_model=BatchFlightResponse)
+async def batch_search_flights(batch_request: BatchFlightRequest):
+    """Search every route × flexible-date combination and analyze the price matrix once."""
+    if batch_request.flex_days < 0:
+        raise HTTPException(status_code=400, detail="flex_days must not be negative")
+    if not batch_request.routes:
+        raise HTTPException(status_code=400, detail="At least one route is required")
+    # Check the size before building anything, so a huge flex_days is rejected at once
+    size = len(batch_request.routes) * (2 * batch_request.flex_days + 1)
+    if size > BATCH_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {size} searches, the limit is {BATCH_MAX_CELLS}"
+        )
+    grid = batch_grid(batch_request)
+
+    logger.info(f"Batch flight search over {len(grid)} route/date combinations")
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    cells = await asyncio.gather(*(search_price_cell(request, semaphore) for request in grid))
+
+    priced = [c for c in cells if c.cheapest_price is not None]
+    if not priced:
+        return BatchFlightResponse(cells=cells, ai_recommendation="No fares found for any route or date.")
+    ai_recommendation, degraded = await recommendation_or_fallback(
+        "flight_matrix", matrix_prompt_data(cells), lambda: matrix_fallback(priced)
+    )
+    return BatchFlightResponse(
+        cells=cells,
+        cheapest=min(priced, key=lambda c: c.cheapest_price),
+        ai_recommendation=ai_recommendation,
+        degraded=["ai_recommendation"] if degraded else []
+    )
+
+# Price watches re-run saved searches in the background under one SerpAPI budget
+WATCH_ENABLED = os.getenv("WATCH_ENABLED", "1") == "1"
+WATCH_MIN_INTERVAL_MINUTES = float(os.getenv("WATCH_MIN_INTERVAL_MINUTES", "15"))
+
+async def watch_search(kind, request):
+    if kind == "flights":
+        flight_request = FlightRequest(**request)
+        results = await search_flights(flight_request)
+    else:
+        hotel_request = HotelRequest(**request)
+        results = await search_hotel_results(hotel_request)
+    # An error payload would rank as "no options" and overwrite the snapshot with a
+    # spurious availability change; fail the refresh so the last snapshot is kept
+    if isinstance(results, dict) and results.get("error"):
+        raise SerpApiError(results["error"])
+    if kind == "flights":
+        return rank_flight_results(results, flight_request.return_date)
+    return rank_hotel_results(results.get("properties"), hotel_request.location)
+
+async def watch_recommendation(kind, ranking):
+    recommendation, _ = await ranked_recommendation(kind, ranking)
+    return recommendation
+
+price_watcher = PriceWatcher(
+    WatchStore(os.getenv("WATCH_DB_PATH", "price_watches.db")),
+    search_fn=watch_search,
+    recommend_fn=watch_recommendation,
+    budget=RateLimiter(rate=float(os.getenv("WATCH_SEARCHES_PER_MINUTE", "10")) / 60, burst=1),
+    tick=float(os.getenv("WATCH_TICK_SECONDS", "30")),
+    jitter=float(os.getenv("WATCH_JITTER", "0.1")),
+    price_change_pct=float(os.getenv("WATCH_PRICE_CHANGE_PCT", "5")),
+)
+
+async def watch_details(watch):
+    return {**watch, "alerts": await run_blocking(price_watcher.store.alerts, watch["id"])}
+
+@app.post("/watches/")
+async def create_watch(watch_request: WatchRequest):
+    """Track a flight or hotel search; it is refreshed in the background every interval."""
+    if (watch_request.flight_request is None) == (watch_request.hotel_request is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of flight_request or hotel_request")
+    if watch_request.interval_minutes < WATCH_MIN_INTERVAL_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval_minutes must be at least {WATCH_MIN_INTERVAL_MINUTES:g}"
+        )
+    if watch_request.flight_request is not None:
+        kind, request = "flights", watch_request.flight_request
+    else:
+        kind, request = "hotels", watch_request.hotel_request
+    return await price_watcher.add(kind, request.model_dump(), watch_request.interval_minutes * 60)
+
+@app.get("/watches/")
+async def list_watches():
+    return await run_blocking(price_watcher.store.list)
+
+@app.get("/watches/{watch_id}")
+async def get_watch(watch_id: str):
+    watch = await run_blocking(price_watcher.store.get, watch_id)
+    if watch is None:
+        raise HTTPException(status_code=404, detail="Watch not found")
+    return await watch_details(watch)
+
+@app.post("/watches/{watch_id}/check")
+async def check_watch(watch_id: str):
+    """Refresh a watch now instead of waiting for its next scheduled run."""
+    watch = await run_blocking(price_watcher.store.get, watch_id)
+    if watch is None:
+        raise HTTPException(status_code=404, detail="Watch not found")
+    await price_watcher.check(watch)
+    return await watch_details(await run_blocking(price_watcher.store.get, watch_id))
+
+@app.delete("/watches/{watch_id}")
+async def delete_watch(watch_id: str):
+    if not await run_blocking(price_watcher.store.delete, watch_id):
+        raise HTTPException(status_code=404, detail="Watch not found")
+    return {"deleted": watch_id}
+
+@app.get("/scheduler_stats/")
+async def get_scheduler_stats():
+    return {
+        **scheduler.stats(),
+        "agent_pools": agent_registry.stats(),
+        "serpapi_client": serpapi_client.stats(),
+        "upstreams": {"serpapi": serpapi_upstream.stats(), "gemini": llm_upstream.stats()},
+        "price_watcher": price_watcher.stats(),
+        "destination_index": destination_index.stats() if destination_index is not None else None
+    }
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop is responsive."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the agent stack is loaded, so requests will not pay for the warm-up."""
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.stats())
+
+@app.get("/cache_stats/")
+async def get_cache_stats():
+    return {"search": search_cache.stats(), "llm": llm_cache.stats(), "inflight": inflight.stats()}
+
+# Cache, executor, agent-pool and watcher counters become gauges at scrape time
+register_stats("cache", "cache", lambda: {"search": search_cache.stats(), "llm": llm_cache.stats(), "inflight": inflight.stats()})
+register_stats("pool", "pool", scheduler.stats)
+register_stats("agent_pool", "agent", agent_registry.stats)
+register_stats("upstream", "upstream", lambda: {"serpapi": serpapi_upstream.stats(), "gemini": llm_upstream.stats()})
+register_stats("component", "component", lambda: {
+    "serpapi_client": serpapi_client.stats(),
+    "price_watcher": price_watcher.stats(),
+})
+
+@app.get("/metrics")
+async def get_metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 # Run FastAPI Server
 if __name__ == "__main__":
-    logger.info("Starting Travel Planning API server")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import uvicorn
+
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and not SHARED_CACHE_URL:
+        # Workers inherit the environment, so they all pick up the same file
+        os.environ["SHARED_CACHE_URL"] = "travel_cache.db"
+        logger.info("No SHARED_CACHE_URL set; workers share the SQLite cache travel_cache.db")
+    logger.info(f"Starting Travel Planning API server with {workers} worker(s)")
+    # uvicorn needs an import string to spawn workers; each one imports this module afresh.
+    # On SIGTERM in-flight requests get GRACEFUL_SHUTDOWN_SECONDS to finish before shutdown hooks run.
+    uvicorn.run(
+        "app:app" if workers > 1 else app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+    )
 
 
 # API URLs
@@ -401,4 +1010,6 @@ API_BASE_URL = "http://localhost:8000"
 API_URL_FLIGHTS = f"{API_BASE_URL}/search_flights/"
 API_URL_HOTELS = f"{API_BASE_URL}/search_hotels/"
 API_URL_COMPLETE = f"{API_BASE_URL}/complete_search/"
+API_URL_PLAN_TRIP = f"{API_BASE_URL}/plan_trip/"
+API_URL_BATCH_FLIGHTS = f"{API_BASE_URL}/batch_search_flights/"
 API_URL_ITINERARY = f"{API_BASE_URL}/generate_itinerary/"
\ No newline at end of file
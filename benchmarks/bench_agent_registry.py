@@ -0,0 +1,71 @@
+"""Per-request Agent/Task/Crew setup cost: rebuilding every time vs leasing from AgentRegistry.
+
+Kickoff itself is not run, so no LLM calls are made. Usage:
+
+    python benchmarks/bench_agent_registry.py --iterations 200
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crewai import LLM
+from agents import AGENT_SPECS, CrewPool, build_crew
+
+SAMPLE_INPUTS = {"formatted_data": "[FlightInfo(airline='IndiGo', price='$120', duration='85 minutes', stops='Non-stop')]"}
+
+
+def rebuild_per_request(spec, llm):
+    crew = build_crew(spec, llm)
+    crew._interpolate_inputs(SAMPLE_INPUTS)
+
+
+def make_leased(pool):
+    def leased_per_request(spec, llm):
+        with pool.lease() as crew:
+            crew._interpolate_inputs(SAMPLE_INPUTS)
+    return leased_per_request
+
+
+def measure(label, fn, spec, llm, iterations):
+    fn(spec, llm)  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(spec, llm)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(iterations):
+        fn(spec, llm)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<22} {elapsed / iterations * 1000:9.3f} ms/request  "
+        f"peak {(peak - before) / 1024:9.1f} KiB  retained {(after - before) / 1024:9.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--agent", default="flights", choices=sorted(AGENT_SPECS))
+    args = parser.parse_args()
+
+    llm = LLM(model="gemini/gemini-2.0-flash", api_key="benchmark")
+    spec = AGENT_SPECS[args.agent]
+    pool = CrewPool(spec, lambda: llm, size=1)
+    pool.warm()
+
+    print(f"agent={args.agent} iterations={args.iterations}")
+    measure("rebuild (before)", rebuild_per_request, spec, llm, args.iterations)
+    measure("registry lease (after)", make_leased(pool), spec, llm, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
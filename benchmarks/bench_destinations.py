@@ -0,0 +1,113 @@
+"""Itinerary prompt size and latency with and without the destination knowledge index.
+
+Reports the cost of building and querying the index, then the interpolated
+itinerary, skeleton and day prompts for a sample trip with and without the
+curated slice. With --live and GOOGLE_API_KEY set, each prompt is also sent
+to Gemini and the latency and completion tokens are reported, which is where
+the index pays off: the model no longer has to research places, hours and
+visit times itself. Usage:
+
+    python benchmarks/bench_destinations.py --destination "New Delhi" --days 4 [--live]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crewai.utilities.string_utils import interpolate_only
+
+from agents import AGENT_SPECS
+from destinations import DestinationIndex, build_index, DEFAULT_SOURCE
+from tokens import estimate_tokens
+
+FLIGHTS = "IndiGo 6E 2131, BLR 06:00 -> DEL 08:45, non-stop; return 19:30 -> 22:10"
+HOTELS = "The Lalit New Delhi, Connaught Place, $120/night, rating 4.4"
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def live_call(prompt):
+    import litellm
+    started = time.perf_counter()
+    response = litellm.completion(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.environ["GOOGLE_API_KEY"],
+        messages=[{"role": "user", "content": prompt}],
+    )
+    return time.perf_counter() - started, response.usage.completion_tokens
+
+
+def prompts(index, destination, days):
+    start = date(2030, 3, 10)
+    trip = {
+        "days": days,
+        "destination": destination,
+        "flights_text": FLIGHTS,
+        "hotels_text": HOTELS,
+        "check_in_date": start.isoformat(),
+        "check_out_date": (start + timedelta(days=days)).isoformat(),
+    }
+    day = {"destination": destination, "theme": "Mughal monuments", "area": "Old Delhi", "notes": ""}
+    with_index = index is not None
+    return {
+        "itinerary (single)": interpolate_only(
+            AGENT_SPECS["itinerary"].description,
+            {**trip, "local_knowledge": index.trip_knowledge(destination) if with_index else ""},
+        ),
+        "skeleton": interpolate_only(
+            AGENT_SPECS["itinerary_skeleton"].description,
+            {**trip, "local_knowledge": index.trip_knowledge(destination) if with_index else ""},
+        ),
+        "day": interpolate_only(
+            AGENT_SPECS["itinerary_day"].description,
+            {**day, "local_knowledge": index.day_knowledge(destination, day["area"], day["theme"]) if with_index else ""},
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--destination", default="New Delhi")
+    parser.add_argument("--days", type=int, default=4)
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    args = parser.parse_args()
+    live = args.live and bool(os.getenv("GOOGLE_API_KEY"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "destinations.db")
+        counts, build_s = timed(lambda: build_index(args.source, path))
+        print(f"build     {build_s * 1000:8.2f} ms  {counts['destinations']} destinations, "
+              f"{counts['pois']} POIs, {os.path.getsize(path) / 1024:.0f} KiB")
+
+        index = DestinationIndex(path, source=None)
+        _, cold_s = timed(lambda: index.day_knowledge(args.destination, "Old Delhi", "Mughal monuments"))
+        _, warm_s = timed(lambda: index.day_knowledge(args.destination, "Old Delhi", "Mughal monuments"), repeat=1000)
+        print(f"lookup    {cold_s * 1000:8.2f} ms cold (open + first query), {warm_s * 1e6:.1f} µs warm")
+        if index.resolve(args.destination) is None:
+            print(f"'{args.destination}' is not in the index; prompts below are identical")
+
+        baseline, enriched = prompts(None, args.destination, args.days), prompts(index, args.destination, args.days)
+        print()
+        for name in baseline:
+            before, after = estimate_tokens(baseline[name]), estimate_tokens(enriched[name])
+            line = f"{name:<20} prompt tokens {before:>5} -> {after:>5}"
+            if live:
+                before_s, before_out = live_call(baseline[name])
+                after_s, after_out = live_call(enriched[name])
+                line += (f"  completion tokens {before_out:>5} -> {after_out:>5}"
+                         f"  gemini {before_s:6.2f}s -> {after_s:6.2f}s")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""End-to-end load test of the API with SerpAPI and Gemini replaced by local fakes.
+
+Starts the FastAPI app under uvicorn in this process, pointed at the stub
+SerpAPI server (synthetic or recorded fixtures) and with the analyst and
+planner agents backed by FakeLLM. Each endpoint is then driven at the given
+concurrency and latency percentiles, throughput and memory are reported and
+written to a JSON file for comparison across commits. Usage:
+
+    python benchmarks/bench_load.py --requests 200 --concurrency 20 --serp-latency 0.3 --llm-latency 0.8
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import platform
+import threading
+import subprocess
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from stub_serpapi import StubSerpApiServer, load_fixtures
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - falls back to peak RSS only
+    psutil = None
+
+ENDPOINTS = ("flights", "hotels", "itinerary")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def rss_mb():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if platform.system() == "Darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def request_body(endpoint, i):
+    """Distinct dates per request so caches and single-flight do not collapse the load."""
+    start = date(2030, 1, 1) + timedelta(days=i % 300)
+    end = start + timedelta(days=4)
+    if endpoint == "flights":
+        return "/search_flights/", {
+            "origin": "BLR", "destination": "DEL", "type": "1",
+            "outbound_date": start.isoformat(), "return_date": end.isoformat(),
+        }
+    if endpoint == "hotels":
+        return "/search_hotels/", {
+            "location": f"New Delhi {i}", "check_in_date": start.isoformat(), "check_out_date": end.isoformat(),
+        }
+    return "/generate_itinerary/", {
+        "destination": f"New Delhi {i}", "check_in_date": start.isoformat(), "check_out_date": end.isoformat(),
+        "flights": "IndiGo BLR 06:00 -> DEL 08:45, $92, non-stop",
+        "hotels": "The Lalit New Delhi, $120/night, rating 4.4",
+    }
+
+
+def configure_environment(args, serp_url):
+    os.environ.update({
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "bench"),
+        "SERPER_API_KEY": os.getenv("SERPER_API_KEY", "bench"),
+        "SERPAPI_BASE_URL": serp_url,
+        "WATCH_ENABLED": "0",
+        "WATCH_DB_PATH": ":memory:",
+        "LOG_LEVEL": args.log_level,
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+    if not args.cache:
+        os.environ.update({"SEARCH_CACHE_MAXSIZE": "0", "LLM_CACHE_MAXSIZE": "0"})
+
+
+def install_fake_llm(app_module, args):
+    from agents import AgentRegistry
+    from fake_llm import FakeLLM
+
+    def factory(stream=False):
+        return lambda: FakeLLM(
+            latency=args.llm_latency,
+            tokens_per_sec=args.llm_tokens_per_sec,
+            output_tokens=args.llm_output_tokens,
+            jitter=args.llm_jitter,
+            stream=stream,
+            error_rate=args.llm_error_rate,
+            slow_rate=args.llm_slow_rate,
+            slow_latency=args.llm_slow_latency,
+            timeout=app_module.LLM_TIMEOUT,
+        )
+
+    app_module.initialize_llm = factory()
+    app_module.agent_registry = AgentRegistry(
+        llm_factory=factory(), streaming_llm_factory=factory(stream=True),
+        pool_size=app_module.agent_registry.pools[("flights", False)].size,
+    )
+
+
+def start_api(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drive(base_url, endpoint, total, concurrency, timeout):
+    limit = asyncio.Semaphore(concurrency)
+    latencies, errors = [], {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def one(i):
+            path, body = request_body(endpoint, i)
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - started
+            if status == "200":
+                latencies.append(elapsed)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_s": round(percentile(latencies, 50), 4),
+        "p95_s": round(percentile(latencies, 95), 4),
+        "p99_s": round(percentile(latencies, 99), 4),
+        "max_s": round(latencies[-1], 4) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated: flights,hotels,itinerary")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--serp-latency", type=float, default=0.3)
+    parser.add_argument("--serp-options", type=int, default=50)
+    parser.add_argument("--fixtures", help="capture file or directory of recorded SerpAPI responses")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds to first token")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=80.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=250)
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--serp-error-rate", type=float, default=0.0, help="share of SerpAPI requests that fail")
+    parser.add_argument("--serp-slow-rate", type=float, default=0.0, help="share of SerpAPI requests in the slow tail")
+    parser.add_argument("--serp-slow-latency", type=float, default=5.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls that fail")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="share of LLM calls in the slow tail")
+    parser.add_argument("--llm-slow-latency", type=float, default=30.0)
+    parser.add_argument("--cache", action="store_true", help="leave the search/LLM caches enabled")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    serp = StubSerpApiServer(
+        latency=args.serp_latency, options=args.serp_options, fixtures=fixtures, error_rate=args.serp_error_rate,
+        slow_rate=args.serp_slow_rate, slow_latency=args.serp_slow_latency,
+    ).start()
+    configure_environment(args, serp.url)
+
+    import app as app_module
+    install_fake_llm(app_module, args)
+
+    port = free_port()
+    server, thread = start_api(app_module.app, port)
+    base_url = f"http://127.0.0.1:{port}"
+    rss_start = rss_mb()
+
+    results = {}
+    print(f"{'endpoint':<10} {'ok':>9} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  errors")
+    for endpoint in endpoints:
+        result = asyncio.run(drive(base_url, endpoint, args.requests, args.concurrency, args.timeout))
+        result["rss_mb"] = round(rss_mb(), 1)
+        results[endpoint] = result
+        print(
+            f"{endpoint:<10} {result['ok']:>4}/{result['requests']:<4} {result['rps']:>8.2f} "
+            f"{result['p50_s']:>7.3f}s {result['p95_s']:>7.3f}s {result['p99_s']:>7.3f}s  {result['errors'] or '-'}"
+        )
+
+    server.should_exit = True
+    thread.join(timeout=10)
+    serp.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "serpapi_requests": serp.requests,
+        "memory": {"rss_start_mb": round(rss_start, 1), "rss_end_mb": round(rss_mb(), 1), "peak_rss_mb": round(peak_rss_mb(), 1)},
+        "endpoints": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"load-{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSerpAPI stub requests: {serp.requests}; memory {report['memory']}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Flight/hotel parsing cost: validated pydantic models per option vs compact slot records.
+
+The "endpoint" rows time what /search_flights/ and /search_hotels/ do with a
+SerpAPI payload up to the response body: the legacy endpoint parsed into
+models and let FastAPI serialize its response_model; the current one parses
+records, ranks them and serializes the AIResponse with `model_response`.
+
+Usage:
+
+    python benchmarks/bench_parsing.py --sizes 10 100 1000 10000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import flights_response, hotels_response
+from models import AIResponse, FlightInfo, HotelInfo
+from records import parse_flight_records, parse_hotel_records
+from ranking import rank_flights, rank_hotels
+
+
+def legacy_parse_flights(response, return_date=""):
+    """The original per-option parser: string formatting plus full pydantic validation."""
+    parsed = []
+    for data in response.get("best_flights", []) + response.get("other_flights", []):
+        flights = data.get("flights", [])
+        layovers = data.get("layovers", [])
+        parsed.append(FlightInfo(
+            airline=flights[0]["airline"] if flights else "N/A",
+            price=f"${data.get('price', 'N/A')}",
+            duration=f"{sum(flight.get('duration', 0) for flight in flights)} minutes",
+            stops=f"{len(layovers)} stop(s)" if layovers else "Non-stop",
+            departure=f"{flights[0]['departure_airport']['id']} - {flights[0]['departure_airport']['name']}" if flights else "N/A",
+            arrival=f"{flights[-1]['arrival_airport']['id']} - {flights[-1]['arrival_airport']['name']}" if flights else "N/A",
+            travel_class=flights[0].get("travel_class", "N/A") if flights else "N/A",
+            return_date=return_date if data.get("type", "oneway").lower() != "oneway" else "N/A",
+            airline_logo=flights[0]["airline_logo"] if flights else "",
+        ))
+    return parsed
+
+
+def legacy_parse_hotels(properties, location="Unknown"):
+    return [
+        HotelInfo(
+            name=hotel.get("name", "No name"),
+            link=hotel.get("link") or hotel.get("serpapi_property_details_link", ""),
+            location=location,
+            price=str(hotel.get("rate_per_night", {}).get("extracted_lowest", "0")),
+            rating=hotel.get("overall_rating") or 0.0,
+        )
+        for hotel in properties
+    ]
+
+
+def legacy_respond(**fields):
+    """FastAPI's response_model handling: validate, dump to Python objects, json.dumps."""
+    content = AIResponse.model_validate(AIResponse(**fields)).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def respond(**fields):
+    """app.model_response: one pass through pydantic's JSON encoder."""
+    return AIResponse(**fields).model_dump_json()
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def retained_kib(fn):
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size / 1024
+
+
+def report(kind, n, cases, repeat):
+    for label, fn in cases:
+        seconds, _ = timed(fn, repeat)
+        print(f"{kind:<8}{n:>7}  {label:<24}{seconds * 1000:10.3f} ms  {seconds / n * 1e6:8.2f} us/option"
+              f"  {retained_kib(fn):10.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'payload':<8}{'options':>7}  {'parser':<24}{'best time':>13}  {'per option':>13}  {'retained':>13}")
+    for n in args.sizes:
+        flights = flights_response(n)
+        report("flights", n, [
+            ("legacy pydantic", lambda: legacy_parse_flights(flights, "2025-03-17")),
+            ("records", lambda: parse_flight_records(flights, "2025-03-17")),
+            ("legacy endpoint", lambda: legacy_respond(flights=legacy_parse_flights(flights, "2025-03-17"))),
+            ("endpoint (ranked)",
+             lambda: respond(flights=rank_flights(parse_flight_records(flights, "2025-03-17")).options())),
+        ], args.repeat)
+        hotels = hotels_response(n)["properties"]
+        report("hotels", n, [
+            ("legacy pydantic", lambda: legacy_parse_hotels(hotels, "Hyderabad")),
+            ("records", lambda: parse_hotel_records(hotels, "Hyderabad")),
+            ("legacy endpoint", lambda: legacy_respond(hotels=legacy_parse_hotels(hotels, "Hyderabad"))),
+            ("endpoint (ranked)",
+             lambda: respond(hotels=rank_hotels(parse_hotel_records(hotels, "Hyderabad")).options())),
+        ], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
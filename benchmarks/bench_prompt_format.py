@@ -0,0 +1,131 @@
+"""Prompt tokens and LLM latency with the default repr versus the compact, token-budgeted serializer.
+
+Builds the analyst input for every flight and hotel response (ranked top-K
+`prompt_data()`) and the itinerary input built from the selected options plus
+an AI pick, then reports estimated tokens for the previous `str()`/JSON form,
+the compact table and the compact table trimmed to each budget. Responses
+come from recorded fixtures (a PAYLOAD_CAPTURE_PATH capture file or a
+directory of `<engine>*.json`) or are synthetic. With --live and
+GOOGLE_API_KEY set, the full analyst prompt in both forms is also sent to
+Gemini and the latency is reported. Usage:
+
+    python benchmarks/bench_prompt_format.py --fixtures capture.jsonl --budgets 0 600 300 [--live]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents import AGENT_SPECS
+from prompt_format import compact_prompt, compact_text
+from records import parse_flight_records, parse_hotel_records
+from ranking import rank_flights, rank_hotels
+from synthetic import flights_response, hotels_response
+from tokens import estimate_tokens
+
+RECOMMENDATION = (
+    "The IndiGo non-stop is the best choice: it is the cheapest option, arrives in time for "
+    "check-in and avoids a layover. The Air India alternative costs more for the same duration."
+)
+
+
+def live_latency(prompt):
+    import litellm
+    started = time.perf_counter()
+    litellm.completion(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.environ["GOOGLE_API_KEY"],
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=256,
+    )
+    return time.perf_counter() - started
+
+
+def analyst_prompt(kind, formatted_data):
+    from crewai.utilities.string_utils import interpolate_only
+    return interpolate_only(AGENT_SPECS[kind].description, {"formatted_data": formatted_data})
+
+
+def rankings(fixtures, top_k):
+    """(kind, Ranking) for every recorded or synthetic response."""
+    for raw in fixtures.get("google_flights", []):
+        yield "flights", rank_flights(parse_flight_records(json.loads(raw), "2025-03-17"), top_k=top_k)
+    for raw in fixtures.get("google_hotels", []):
+        properties = json.loads(raw).get("properties") or []
+        yield "hotels", rank_hotels(parse_hotel_records(properties, "Hyderabad"), top_k=top_k)
+
+
+def selection_text(ranking, limit=3):
+    """The itinerary input /plan_trip/ builds from the top options and the AI pick."""
+    selected = [option.model_dump(exclude={"airline_logo", "link"}) for option in ranking.top_infos()[:limit]]
+    return f"{json.dumps(selected, indent=2)}\n\nAI recommendation:\n{RECOMMENDATION}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="capture file or directory of recorded SerpAPI responses")
+    parser.add_argument("--synthetic", type=int, default=50, help="results per synthetic response without --fixtures")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 600, 300, 150], help="0 means untrimmed")
+    parser.add_argument("--itinerary-budget", type=int, default=400)
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    parser.add_argument("--show", action="store_true", help="print the first compact prompt of each kind")
+    args = parser.parse_args()
+    live = args.live and bool(os.getenv("GOOGLE_API_KEY"))
+
+    if args.fixtures:
+        from stub_serpapi import load_fixtures
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = {
+            "google_flights": [json.dumps(flights_response(args.synthetic)).encode("utf-8")],
+            "google_hotels": [json.dumps(hotels_response(args.synthetic)).encode("utf-8")],
+        }
+
+    rows = {}
+    shown = set()
+    for kind, ranking in rankings(fixtures, args.top_k):
+        data = ranking.prompt_data()
+        row = rows.setdefault(kind, {"repr": [], "itinerary": [], "itinerary_compact": [], "latency": []})
+        row["repr"].append(estimate_tokens(str(data)))
+        for budget in args.budgets:
+            row.setdefault(budget, []).append(estimate_tokens(compact_prompt(data, budget or None)))
+        selection = selection_text(ranking)
+        row["itinerary"].append(estimate_tokens(selection))
+        row["itinerary_compact"].append(estimate_tokens(compact_text(selection, args.itinerary_budget or None)))
+        if args.show and kind not in shown:
+            shown.add(kind)
+            print(f"--- {kind} analyst input\n{compact_prompt(data, args.budgets[-1] or None)}")
+            print(f"--- {kind} itinerary input\n{compact_text(selection, args.itinerary_budget or None)}\n")
+        if live:
+            before = live_latency(analyst_prompt(kind, str(data)))
+            after = live_latency(analyst_prompt(kind, compact_prompt(data, args.budgets[-1] or None)))
+            row["latency"].append((before, after))
+
+    budgets = " ".join(f"{'budget ' + str(b) if b else 'compact':>11}" for b in args.budgets)
+    print(f"{'analyst':<9}{'n':>4} {'repr':>8} {budgets}   (median estimated tokens)")
+    for kind, row in rows.items():
+        repr_tokens = statistics.median(row["repr"])
+        cells = " ".join(
+            f"{statistics.median(row[b]):>5.0f} {statistics.median(row[b]) / repr_tokens:>5.0%}" for b in args.budgets
+        )
+        line = f"{kind:<9}{len(row['repr']):>4} {repr_tokens:>8.0f} {cells}"
+        if row["latency"]:
+            before = statistics.median(b for b, _ in row["latency"])
+            after = statistics.median(a for _, a in row["latency"])
+            line += f"  gemini {before:6.2f}s -> {after:6.2f}s"
+        print(line)
+
+    print(f"\n{'itinerary':<9}{'n':>4} {'json':>8} {'budget ' + str(args.itinerary_budget):>11}")
+    for kind, row in rows.items():
+        before, after = statistics.median(row["itinerary"]), statistics.median(row["itinerary_compact"])
+        print(f"{kind:<9}{len(row['itinerary']):>4} {before:>8.0f} {after:>5.0f} {after / before:>5.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Prompt size and latency for the analyst agent with and without top-K pruning.
+
+Token counts use the same estimate the service uses for prompt sizing. With
+--live and GOOGLE_API_KEY set, each prompt is also sent to Gemini once and the
+wall-clock latency is reported. Usage:
+
+    python benchmarks/bench_ranking.py --sizes 10 100 1000 --top-k 5 [--live]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import flights_response, hotels_response
+from records import parse_flight_records, parse_hotel_records
+from ranking import rank_flights, rank_hotels
+from tokens import estimate_tokens
+
+
+def live_latency(prompt):
+    import litellm
+    started = time.perf_counter()
+    litellm.completion(
+        model="gemini/gemini-2.0-flash",
+        api_key=os.environ["GOOGLE_API_KEY"],
+        messages=[{"role": "user", "content": f"Recommend the best option:\n{prompt}"}],
+        max_tokens=256,
+    )
+    return time.perf_counter() - started
+
+
+def compare(kind, n, records, rank, top_k, live):
+    started = time.perf_counter()
+    ranking = rank(records, top_k=top_k)
+    rank_ms = (time.perf_counter() - started) * 1000
+
+    # What the analyst used to get: every option's model repr
+    unpruned = str([record.to_info(score) for record, score in zip(ranking.records, ranking.scores)])
+    pruned = str(ranking.prompt_data())
+    line = (f"{kind:<8}{n:>7}  tokens {estimate_tokens(unpruned):>9} -> {estimate_tokens(pruned):>6}"
+            f"  ({estimate_tokens(pruned) / max(estimate_tokens(unpruned), 1):6.1%})  ranking {rank_ms:8.2f} ms")
+    if live:
+        line += f"  gemini {live_latency(unpruned):6.2f}s -> {live_latency(pruned):6.2f}s"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    args = parser.parse_args()
+    live = args.live and bool(os.getenv("GOOGLE_API_KEY"))
+
+    for n in args.sizes:
+        compare("flights", n, parse_flight_records(flights_response(n), "2025-03-17"), rank_flights, args.top_k, live)
+        compare("hotels", n, parse_hotel_records(hotels_response(n)["properties"], "Hyderabad"), rank_hotels, args.top_k, live)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Behaviour of the API under injected upstream faults: latency, degraded answers and errors per scenario.
+
+Runs the app in this process against the stub SerpAPI server and FakeLLM,
+then drives /search_flights/ through a series of fault scenarios: a slow
+SerpAPI tail with and without hedging, a slow and a failing LLM (answers
+should degrade to the ranked fallback, and fail fast once the breaker
+opens), a short client deadline, and a SerpAPI outage. Breakers are reset
+between scenarios. Results are written to a JSON file. Usage:
+
+    python benchmarks/bench_resilience.py --requests 200 --concurrency 20
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from stub_serpapi import StubSerpApiServer
+from bench_load import configure_environment, install_fake_llm, start_api, free_port, git_commit, percentile, request_body
+
+# name, SerpAPI faults, LLM faults, search hedging, X-Request-Timeout
+SCENARIOS = (
+    ("healthy", {}, {}, True, None),
+    ("serp slow tail", {"slow_rate": 0.03}, {}, False, None),
+    ("serp slow tail hedged", {"slow_rate": 0.03}, {}, True, None),
+    ("llm slow", {}, {"llm_slow_rate": 1.0}, True, None),
+    ("llm failing", {}, {"llm_error_rate": 1.0}, True, None),
+    ("client deadline 1s", {}, {"llm_slow_rate": 0.5}, True, 1.0),
+    ("serp outage", {"error_rate": 1.0}, {}, True, None),
+)
+
+
+def reset_upstreams(app_module, hedge):
+    """Fresh breakers and counters so scenarios do not inherit each other's state.
+
+    Latency windows are kept, so hedging can start with the first request of a scenario.
+    """
+    from resilience import Upstream
+
+    for name in ("serpapi_upstream", "llm_upstream"):
+        old = getattr(app_module, name)
+        upstream = Upstream(
+            old.name, timeout=old.timeout, failure_threshold=old.breaker.failure_threshold,
+            reset_timeout=old.breaker.reset_timeout, hedge=hedge if name == "serpapi_upstream" else old.hedge,
+            hedge_budget=old.hedge_budget, hedge_min_samples=old.hedge_min_samples, excluded=old.excluded,
+        )
+        upstream._latencies.extend(old._latencies)
+        setattr(app_module, name, upstream)
+
+
+async def drive(base_url, total, concurrency, timeout, deadline, offset):
+    limit = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], {}
+    headers = {"X-Request-Timeout": str(deadline)} if deadline else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits, headers=headers) as client:
+        async def one(i):
+            path, body = request_body("flights", offset + i)
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    outcome = str(response.status_code)
+                    if response.status_code == 200:
+                        outcome = "degraded" if response.json().get("degraded") else "ok"
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "outcomes": outcomes,
+        "wall_s": round(wall, 3),
+        "p50_s": round(percentile(latencies, 50), 4),
+        "p95_s": round(percentile(latencies, 95), 4),
+        "p99_s": round(percentile(latencies, 99), 4),
+        "max_s": round(latencies[-1], 4) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--scenarios", help="comma separated scenario names (default: all)")
+    parser.add_argument("--serp-latency", type=float, default=0.1)
+    parser.add_argument("--serp-options", type=int, default=50)
+    parser.add_argument("--serp-slow-latency", type=float, default=3.0)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=100)
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-slow-latency", type=float, default=10.0)
+    parser.add_argument("--analysis-timeout", type=float, default=3.0, help="ANALYSIS_TIMEOUT for the run")
+    parser.add_argument("--llm-timeout", type=float, default=5.0, help="LLM_TIMEOUT for the run")
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/resilience-<commit>.json)")
+    args = parser.parse_args()
+    args.cache = False
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = {name.strip() for name in args.scenarios.split(",")}
+        scenarios = [scenario for scenario in SCENARIOS if scenario[0] in wanted]
+
+    serp = StubSerpApiServer(
+        latency=args.serp_latency, options=args.serp_options, slow_latency=args.serp_slow_latency, seed=1
+    ).start()
+    configure_environment(args, serp.url)
+    os.environ.update({
+        "ANALYSIS_TIMEOUT": str(args.analysis_timeout),
+        "LLM_TIMEOUT": str(args.llm_timeout),
+        # Enough workers that time queued for one (which counts against ANALYSIS_TIMEOUT)
+        # does not make the healthy baseline look like a slow LLM
+        "ANALYSIS_WORKERS": str(args.concurrency),
+        "ANALYSIS_QUEUE": str(args.concurrency * 4),
+        "WARMUP_ENABLED": "0",
+    })
+
+    import app as app_module
+
+    port = free_port()
+    server, thread = start_api(app_module.app, port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = {}
+    print(f"{'scenario':<28} {'ok':>5} {'degr':>5} {'other':<22} {'p50':>7} {'p95':>7} {'p99':>7}  hedges  opened")
+    for offset, (name, serp_faults, llm_faults, hedge, deadline) in enumerate(scenarios):
+        serp.error_rate = serp_faults.get("error_rate", 0.0)
+        serp.slow_rate = serp_faults.get("slow_rate", 0.0)
+        fake = argparse.Namespace(**vars(args))
+        fake.llm_error_rate = llm_faults.get("llm_error_rate", 0.0)
+        fake.llm_slow_rate = llm_faults.get("llm_slow_rate", 0.0)
+        install_fake_llm(app_module, fake)
+        reset_upstreams(app_module, hedge)
+        serp_before = serp.requests
+
+        result = asyncio.run(drive(base_url, args.requests, args.concurrency, args.timeout, deadline, offset * 1000))
+        result["serpapi_requests"] = serp.requests - serp_before
+        result["upstreams"] = {"serpapi": app_module.serpapi_upstream.stats(), "gemini": app_module.llm_upstream.stats()}
+        results[name] = result
+
+        outcomes = dict(result["outcomes"])
+        ok, degraded = outcomes.pop("ok", 0), outcomes.pop("degraded", 0)
+        other = ", ".join(f"{k}:{v}" for k, v in sorted(outcomes.items())) or "-"
+        upstreams = result["upstreams"]
+        print(
+            f"{name:<28} {ok:>5} {degraded:>5} {other:<22} {result['p50_s']:>6.2f}s {result['p95_s']:>6.2f}s "
+            f"{result['p99_s']:>6.2f}s  {upstreams['serpapi']['hedges']:>6}  "
+            f"{'serp' if upstreams['serpapi']['opened'] else ''}{'llm' if upstreams['gemini']['opened'] else ''}"
+        )
+        # Let abandoned LLM calls drain so the next scenario starts with free workers
+        time.sleep(min(args.llm_timeout, args.llm_slow_latency) if llm_faults else 0)
+
+    server.should_exit = True
+    thread.join(timeout=10)
+    serp.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"resilience-{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""SerpAPI throughput: blocking GoogleSearch in a thread pool vs the pooled asyncio client.
+
+Both transports hit a local stub server with an artificial upstream latency,
+so no quota is used. Usage:
+
+    python benchmarks/bench_serpapi_client.py --requests 400 --concurrency 50 --latency 0.1
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serpapi import GoogleSearch
+from serpapi_client import AsyncSerpApiClient
+from stub_serpapi import StubSerpApiServer
+
+PARAMS = {"api_key": "stub", "engine": "google_flights", "departure_id": "BLR", "arrival_id": "HYD"}
+
+
+async def run_thread_path(total, concurrency, workers):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            return await loop.run_in_executor(executor, lambda: GoogleSearch(dict(PARAMS)).get_dict())
+
+    try:
+        return await asyncio.gather(*[one() for _ in range(total)])
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def run_async_path(total, concurrency, base_url):
+    client = AsyncSerpApiClient(base_url=base_url)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            return await client.search(PARAMS)
+
+    try:
+        return await asyncio.gather(*[one() for _ in range(total)])
+    finally:
+        await client.aclose()
+
+
+def report(label, total, elapsed, results):
+    ok = sum(1 for r in results if "best_flights" in r)
+    print(f"{label:<28} {elapsed:7.2f}s  {total / elapsed:8.1f} req/s  ok={ok}/{total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--thread-workers", type=int, default=8, help="matches the default SEARCH_WORKERS")
+    args = parser.parse_args()
+
+    server = StubSerpApiServer(latency=args.latency).start()
+    GoogleSearch.BACKEND = server.url
+    print(f"stub={server.url} latency={args.latency}s requests={args.requests} concurrency={args.concurrency}")
+
+    started = time.perf_counter()
+    results = asyncio.run(run_thread_path(args.requests, args.concurrency, args.thread_workers))
+    report(f"thread pool ({args.thread_workers} workers)", args.requests, time.perf_counter() - started, results)
+
+    started = time.perf_counter()
+    results = asyncio.run(run_async_path(args.requests, args.concurrency, server.url))
+    report("asyncio client", args.requests, time.perf_counter() - started, results)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
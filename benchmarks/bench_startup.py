@@ -0,0 +1,173 @@
+"""API cold start: import time per module and time until /healthz and /readyz answer.
+
+Imports `app` in a fresh interpreter under `-X importtime` and reports the
+slowest packages and app's own imports, plus the import cost of the
+packages the API now loads lazily. Then starts `python app.py` and measures
+how long after spawning the process the liveness and readiness probes first
+return 200. Results are written to a JSON file for comparison across
+commits. Usage:
+
+    python benchmarks/bench_startup.py --runs 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from bench_load import git_commit, free_port
+
+DEFERRED = "crewai,serpapi,streamlit,requests,uvicorn"
+
+
+def environment(**extra):
+    env = dict(os.environ)
+    env.update({
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "bench"),
+        "SERPER_API_KEY": os.getenv("SERPER_API_KEY", "bench"),
+        "WATCH_ENABLED": "0",
+        "WATCH_DB_PATH": ":memory:",
+        "LOG_LEVEL": "WARNING",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+        "PYTHONPATH": ROOT,
+    })
+    env.update(extra)
+    return env
+
+
+def import_times(module):
+    """(level, name, self_us, cumulative_us) for every import made by `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=environment(), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((level, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize(entries, module, top):
+    index = max(i for i, entry in enumerate(entries) if entry[0] == 0 and entry[1] == module)
+    # importtime lists a module's imports before the module itself
+    direct = []
+    for level, name, _, cumulative in reversed(entries[:index]):
+        if level == 0:
+            break
+        if level == 1:
+            direct.append((name, cumulative))
+    packages = {}
+    for _, name, self_us, _ in entries[:index + 1]:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return {
+        "total_s": round(entries[index][3] / 1e6, 4),
+        "direct_imports_s": {name: round(us / 1e6, 4) for name, us in sorted(direct, key=lambda d: -d[1])[:top]},
+        "packages_s": {name: round(us / 1e6, 4) for name, us in sorted(packages.items(), key=lambda p: -p[1])[:top]},
+    }
+
+
+def time_to_probes(timeout):
+    """Seconds from spawning `python app.py` until /healthz, then /readyz, first return 200."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "app.py")], cwd=ROOT, env=environment(PORT=str(port), HOST="127.0.0.1"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    times = {}
+    try:
+        for probe in ("healthz", "readyz"):
+            while probe not in times:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"app.py exited with {proc.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"/{probe} not ready after {timeout}s")
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/{probe}", timeout=1).status_code == 200:
+                        times[probe] = time.perf_counter() - started
+                        continue
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="server starts to time (median reported)")
+    parser.add_argument("--top", type=int, default=10, help="rows per import table")
+    parser.add_argument("--deferred", default=DEFERRED, help="comma separated packages the API should not import")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    entries = import_times("app")
+    summary = summarize(entries, "app", args.top)
+    print(f"import app: {summary['total_s']:.3f}s\n")
+    print(f"{'slowest packages (self time)':<40} {'s':>8}")
+    for name, seconds in summary["packages_s"].items():
+        print(f"  {name:<38} {seconds:>8.3f}")
+    print(f"\n{'app imports (cumulative)':<40} {'s':>8}")
+    for name, seconds in summary["direct_imports_s"].items():
+        print(f"  {name:<38} {seconds:>8.3f}")
+
+    deferred = {}
+    print(f"\n{'kept out of the API import':<40} {'s':>8}  loaded by app")
+    loaded = {name for _, name, _, _ in entries}
+    for package in (p.strip() for p in args.deferred.split(",") if p.strip()):
+        package_entries = import_times(package)
+        deferred[package] = {
+            "import_s": round(package_entries[-1][3] / 1e6, 4),
+            "loaded_by_app": package in loaded,
+        }
+        print(f"  {package:<38} {deferred[package]['import_s']:>8.3f}  {'yes' if package in loaded else 'no'}")
+
+    runs = [time_to_probes(args.timeout) for _ in range(args.runs)]
+    probes = {
+        probe: {
+            "median_s": round(statistics.median(run[probe] for run in runs), 3),
+            "min_s": round(min(run[probe] for run in runs), 3),
+        }
+        for probe in ("healthz", "readyz")
+    }
+    print(f"\nprocess spawn -> 200 over {args.runs} run(s)")
+    for probe, result in probes.items():
+        print(f"  /{probe:<37} {result['median_s']:>8.3f}s median, {result['min_s']:.3f}s best")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "import_app": summary,
+        "deferred": deferred,
+        "probes": probes,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"startup-{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
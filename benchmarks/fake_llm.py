@@ -0,0 +1,78 @@
+"""Stand-in for the Gemini LLM with a simple latency and token-rate model.
+
+A call takes `latency` seconds to the first token, then `output_tokens`
+tokens at `tokens_per_sec`, both with optional +/- `jitter`. When built
+with stream=True it emits CrewAI stream chunk events like the real LLM, so
+the SSE endpoints can be exercised too. For fault injection, `error_rate`
+of calls fail and `slow_rate` take `slow_latency` extra seconds; a call
+slower than the LLM's `timeout` fails after `timeout`, like a real request.
+Token usage is reported to the callbacks the way the real LLM does.
+"""
+import time
+import random
+from types import SimpleNamespace
+
+from crewai import LLM
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+from tokens import estimate_tokens
+
+WORDS = (
+    "the best option balances price duration and comfort with a short layover "
+    "and a well rated hotel close to the main attractions for a relaxed stay"
+).split()
+
+
+class FakeLLM(LLM):
+    def __init__(
+        self,
+        latency: float = 0.5,
+        tokens_per_sec: float = 100.0,
+        output_tokens: int = 200,
+        jitter: float = 0.0,
+        stream: bool = False,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 30.0,
+        **kwargs,
+    ):
+        super().__init__(model=kwargs.pop("model", "gemini/fake"), stream=stream, **kwargs)
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.calls = 0
+
+    def _vary(self, value: float) -> float:
+        return max(0.0, value * (1 + random.uniform(-self.jitter, self.jitter))) if self.jitter else value
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        self.calls += 1
+        tokens = [WORDS[i % len(WORDS)] for i in range(self.output_tokens)]
+        latency = self._vary(self.latency) + (self.slow_latency if random.random() < self.slow_rate else 0.0)
+        if self.timeout and latency > self.timeout:
+            time.sleep(self.timeout)
+            raise TimeoutError(f"Fake LLM timed out after {self.timeout}s")
+        time.sleep(latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError("Injected LLM failure")
+        per_token = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+        text = "Thought: I now know the final answer\nFinal Answer: "
+        if self.stream:
+            crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=text))
+            for token in tokens:
+                time.sleep(self._vary(per_token))
+                crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=f"{token} "))
+        else:
+            time.sleep(self._vary(per_token * len(tokens)))
+        usage = SimpleNamespace(
+            prompt_tokens=estimate_tokens(str(messages)), completion_tokens=len(tokens), prompt_tokens_details=None
+        )
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                callback.log_success_event(kwargs={}, response_obj={"usage": usage}, start_time=0, end_time=0)
+        return text + " ".join(tokens)
@@ -0,0 +1,170 @@
+"""Local stand-in for the SerpAPI /search endpoint.
+
+Serves google_flights / google_hotels payloads over keep-alive HTTP/1.1
+with a configurable artificial latency. Payloads are synthetic by default,
+or replayed from recorded fixtures: a PAYLOAD_CAPTURE_PATH capture file or a
+directory of `<engine>*.json` responses. Faults can be injected: a share
+of requests answered with an HTTP error, and a share delayed by a long
+tail latency; both are plain attributes, so a test can change them while
+the stub runs. Point the API at it with SERPAPI_BASE_URL=http://127.0.0.1:<port>.
+Run standalone with:
+
+    python benchmarks/stub_serpapi.py --port 8900 --latency 0.2 [--fixtures capture.jsonl] [--error-rate 0.1]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from logs import iter_capture
+from synthetic import flights_response, hotels_response
+
+ENGINES = ("google_flights", "google_hotels")
+
+
+def load_fixtures(path):
+    """Recorded responses per engine from a capture file or a directory of JSON files."""
+    fixtures = {}
+    if os.path.isdir(path):
+        for engine in ENGINES:
+            for file_path in sorted(glob.glob(os.path.join(path, f"{engine}*.json"))):
+                with open(file_path, "rb") as f:
+                    fixtures.setdefault(engine, []).append(f.read())
+    else:
+        for record in iter_capture(path):
+            if record.get("kind") != "serpapi" or record["response"].get("error"):
+                continue
+            engine = record["params"].get("engine")
+            fixtures.setdefault(engine, []).append(json.dumps(record["response"]).encode("utf-8"))
+    if not fixtures:
+        raise ValueError(f"No google_flights/google_hotels fixtures found in {path}")
+    return fixtures
+
+
+class StubSerpApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.requests += 1
+        if url.path != "/search":
+            return self._send(404, {"error": "Not found"})
+        payload = self.server.next_payload(params.get("engine"))
+        if payload is None:
+            return self._send(400, {"error": f"Unsupported engine: {params.get('engine')}"})
+        delay, status = self.server.fault()
+        time.sleep(delay)
+        if status != 200:
+            return self._send(status, {"error": "Injected upstream failure"})
+        self._send(200, payload)
+
+    def _send(self, status, payload):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubSerpApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, host="127.0.0.1", port=0, latency=0.0, options=50, handler=StubSerpApiHandler, fixtures=None,
+        error_rate=0.0, error_status=503, slow_rate=0.0, slow_latency=5.0, seed=None
+    ):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.payloads = fixtures or {
+            "google_flights": [json.dumps(flights_response(options)).encode("utf-8")],
+            "google_hotels": [json.dumps(hotels_response(options)).encode("utf-8")],
+        }
+        # Recorded responses are served round-robin per engine
+        self._cycles = {engine: itertools.cycle(bodies) for engine, bodies in self.payloads.items()}
+        self._cycle_lock = threading.Lock()
+
+    def next_payload(self, engine):
+        cycle = self._cycles.get(engine)
+        if cycle is None:
+            return None
+        with self._cycle_lock:
+            return next(cycle)
+
+    def serve(self, engine, *payloads):
+        """Replace the responses for `engine`, e.g. to move prices between two searches."""
+        bodies = [json.dumps(payload).encode("utf-8") for payload in payloads]
+        with self._cycle_lock:
+            self.payloads[engine] = bodies
+            self._cycles[engine] = itertools.cycle(bodies)
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on a slow response (timeouts, cancelled hedges) is expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def fault(self):
+        """(delay, status) for the next request under the configured fault rates."""
+        with self._cycle_lock:
+            slow = self._random.random() < self.slow_rate
+            failed = self._random.random() < self.error_rate
+            self.slow += slow
+            self.errors += failed
+        return (self.slow_latency if slow else self.latency), (self.error_status if failed else 200)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SerpAPI stub")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--options", type=int, default=50)
+    parser.add_argument("--fixtures", help="capture file or directory of recorded responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    args = parser.parse_args()
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    server = StubSerpApiServer(
+        port=args.port, latency=args.latency, options=args.options, fixtures=fixtures,
+        error_rate=args.error_rate, error_status=args.error_status,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+    )
+    print(f"Stub SerpAPI listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
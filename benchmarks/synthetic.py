@@ -0,0 +1,63 @@
+"""Synthetic SerpAPI google_flights / google_hotels payloads for benchmarks."""
+import random
+
+AIRPORTS = [("BLR", "Kempegowda International Airport"), ("HYD", "Rajiv Gandhi International Airport"),
+            ("BOM", "Chhatrapati Shivaji Maharaj International Airport"), ("DEL", "Indira Gandhi International Airport"),
+            ("MAA", "Chennai International Airport")]
+AIRLINES = ["IndiGo", "Air India", "Vistara", "Akasa Air", "SpiceJet"]
+AMENITIES = ["Free Wi-Fi", "Pool", "Fitness centre", "Free breakfast", "Spa", "Parking", "Airport shuttle"]
+
+
+def _leg(rng, departure, arrival):
+    return {
+        "departure_airport": {"id": departure[0], "name": departure[1], "time": "2025-03-10 06:00"},
+        "arrival_airport": {"id": arrival[0], "name": arrival[1], "time": "2025-03-10 07:25"},
+        "duration": rng.randint(55, 240),
+        "airplane": "Airbus A320",
+        "airline": rng.choice(AIRLINES),
+        "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/6E.png",
+        "travel_class": rng.choice(["Economy", "Premium economy", "Business"]),
+        "flight_number": f"6E {rng.randint(100, 9999)}",
+        "legroom": "30 in",
+        "extensions": ["Average legroom (30 in)", "In-seat USB outlet", "Carbon emissions estimate: 62 kg"],
+    }
+
+
+def flights_response(n, seed=7):
+    """A google_flights response with `n` options split across best_flights and other_flights."""
+    rng = random.Random(seed)
+    options = []
+    for _ in range(n):
+        stops = rng.choice([0, 0, 1, 1, 2])
+        route = [AIRPORTS[0]] + rng.sample(AIRPORTS[2:], stops) + [AIRPORTS[1]]
+        legs = [_leg(rng, route[i], route[i + 1]) for i in range(len(route) - 1)]
+        options.append({
+            "flights": legs,
+            "layovers": [{"duration": rng.randint(45, 300), "name": a[1], "id": a[0]} for a in route[1:-1]],
+            "total_duration": sum(leg["duration"] for leg in legs),
+            "price": rng.randint(45, 600),
+            "type": "Round trip",
+            "airline_logo": legs[0]["airline_logo"],
+        })
+    split = min(len(options), max(1, n // 10))
+    return {"best_flights": options[:split], "other_flights": options[split:]}
+
+
+def hotels_response(n, seed=7):
+    """A google_hotels response with `n` properties."""
+    rng = random.Random(seed)
+    properties = []
+    for i in range(n):
+        price = rng.randint(25, 400)
+        properties.append({
+            "type": "hotel",
+            "name": f"Hotel {i} {rng.choice(['Grand', 'Residency', 'Suites', 'Inn'])}",
+            "link": f"https://example.com/hotel/{i}",
+            "rate_per_night": {"lowest": f"${price}", "extracted_lowest": price},
+            "total_rate": {"lowest": f"${price * 7}", "extracted_lowest": price * 7},
+            "overall_rating": round(rng.uniform(3.0, 5.0), 1),
+            "reviews": rng.randint(10, 5000),
+            "extracted_hotel_class": rng.randint(2, 5),
+            "amenities": rng.sample(AMENITIES, rng.randint(1, len(AMENITIES))),
+        })
+    return {"properties": properties}
@@ -0,0 +1,512 @@
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import functools
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - only needed for redis:// cache URLs
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Per-engine freshness windows (seconds). Flight fares move faster than hotel rates.
+DEFAULT_ENGINE_TTLS = {
+    "google_flights": 300,
+    "google_hotels": 900,
+}
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache instance."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_hits = 0
+        self.purged = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_hits": self.disk_hits,
+            "purged": self.purged,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteBackend:
+    """On-disk key/value store so cached entries survive restarts.
+
+    In WAL mode one file can be shared by several worker processes on the
+    same host, each reading while another writes.
+    """
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float):
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisBackend:
+    """Key/value store on Redis, shared by workers across processes and hosts.
+
+    Entries are stored under `<table>:<key>` with a Redis expiry matching the
+    cache TTL, so expired entries never need purging.
+    """
+
+    def __init__(self, url: str, table: str = "cache"):
+        if redis is None:
+            raise ImportError("A redis:// cache URL needs the redis package (pip install redis)")
+        self.url = url
+        self.table = table
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.table}:{key}"
+
+    def get(self, key: str):
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], entry["expires_at"]
+
+    def set(self, key: str, value: Any, expires_at: float):
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms > 0:
+            payload = json.dumps({"value": value, "expires_at": expires_at})
+            self._client.set(self._key(key), payload, px=ttl_ms)
+
+    def delete(self, key: str):
+        self._client.delete(self._key(key))
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=f"{self.table}:*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def close(self):
+        self._client.close()
+
+
+# Errors from the disk/shared tier; the in-memory tier keeps working without it
+BACKEND_ERRORS = (sqlite3.Error,) + ((redis.RedisError,) if redis is not None else ())
+
+
+def open_backend(location: str, table: str):
+    """Backend for a cache location: a redis:// URL or a SQLite file path."""
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(location, table=table)
+    return SQLiteBackend(location, table=table)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking backend call in the default executor so the event loop keeps serving requests."""
+    if kwargs:
+        fn = functools.partial(fn, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+class TTLCache:
+    """Bounded in-memory LRU cache with per-entry expiry and an optional disk tier.
+
+    The `*_async` methods answer memory hits inline and run backend reads and
+    writes (SQLite with its busy timeout, or Redis) in a thread; use them
+    from the event loop. Expired backend rows are otherwise only dropped when
+    their key is read again, so they are purged every `purge_every` writes.
+    """
+
+    def __init__(self, maxsize: int = 1024, backend=None, purge_every: int = 200):
+        self.maxsize = maxsize
+        self.backend = backend
+        self.purge_every = purge_every
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None and self.backend is not None:
+            value = self._get_backend(key, now)
+        if value is None:
+            with self._lock:
+                self.stats.misses += 1
+        return value
+
+    async def get_async(self, key: str):
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None and self.backend is not None:
+            value = await run_blocking(self._get_backend, key, now)
+        if value is None:
+            with self._lock:
+                self.stats.misses += 1
+        return value
+
+    def _get_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            del self._entries[key]
+            self.stats.expirations += 1
+        return None
+
+    def _get_backend(self, key: str, now: float):
+        value = self._load(key, now)
+        if value is not None:
+            with self._lock:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+        return value
+
+    def peek(self, key: str):
+        """Like `get`, but without counting a hit or miss; used while polling for another worker's result."""
+        now = time.time()
+        value = self._peek_memory(key, now)
+        if value is None and self.backend is not None:
+            value = self._load(key, now)
+        return value
+
+    async def peek_async(self, key: str):
+        now = time.time()
+        value = self._peek_memory(key, now)
+        if value is None and self.backend is not None:
+            value = await run_blocking(self._load, key, now)
+        return value
+
+    def _peek_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None and entry[1] > now else None
+
+    def _load(self, key: str, now: float):
+        """Fresh value from the backend, promoted into memory."""
+        try:
+            stored = self.backend.get(key)
+            if stored is None:
+                return None
+            value, expires_at = stored
+            if expires_at <= now:
+                self.backend.delete(key)
+                return None
+        except BACKEND_ERRORS as e:
+            logger.warning(f"Could not read cache entry {key}: {e}")
+            return None
+        self._store(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        expires_at = time.time() + ttl
+        self._store(key, value, expires_at)
+        if self.backend is not None:
+            self._persist(key, value, expires_at)
+
+    async def set_async(self, key: str, value: Any, ttl: float):
+        expires_at = time.time() + ttl
+        self._store(key, value, expires_at)
+        if self.backend is not None:
+            await run_blocking(self._persist, key, value, expires_at)
+
+    def _persist(self, key: str, value: Any, expires_at: float):
+        try:
+            self.backend.set(key, value, expires_at)
+        except (TypeError, ValueError) + BACKEND_ERRORS as e:
+            logger.warning(f"Could not persist cache entry {key}: {e}")
+        with self._lock:
+            self._writes += 1
+            due = self.purge_every > 0 and self._writes % self.purge_every == 0
+        if due:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the backend; returns how many were removed."""
+        if self.backend is None:
+            return 0
+        try:
+            purged = self.backend.purge_expired()
+        except BACKEND_ERRORS as e:
+            logger.warning(f"Could not purge expired cache entries: {e}")
+            return 0
+        with self._lock:
+            self.stats.purged += purged
+        return purged
+
+    def _store(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+
+class SearchCache:
+    """Response cache for SerpAPI searches keyed on the normalized request params.
+
+    `path` adds a second tier behind memory: a SQLite file, or a redis:// URL
+    to share entries between worker processes.
+    """
+
+    IGNORED_PARAMS = ("api_key",)
+
+    def __init__(
+        self,
+        engine_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300,
+        maxsize: int = 512,
+        path: Optional[str] = None,
+    ):
+        self.engine_ttls = {**DEFAULT_ENGINE_TTLS, **(engine_ttls or {})}
+        self.default_ttl = default_ttl
+        backend = open_backend(path, table="search_cache") if path else None
+        self.cache = TTLCache(maxsize=maxsize, backend=backend)
+        self._upstream_seconds = 0.0
+        self._upstream_calls = 0
+
+    @classmethod
+    def make_key(cls, params: Dict[str, Any]) -> str:
+        """Stable hash of the search params with credentials left out."""
+        normalized = {
+            str(k): str(v).strip()
+            for k, v in params.items()
+            if k not in cls.IGNORED_PARAMS and v is not None and str(v).strip() != ""
+        }
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, params: Dict[str, Any]) -> float:
+        return self.engine_ttls.get(params.get("engine"), self.default_ttl)
+
+    def get(self, params: Dict[str, Any]):
+        return self.cache.get(self.make_key(params))
+
+    async def get_async(self, params: Dict[str, Any]):
+        return await self.cache.get_async(self.make_key(params))
+
+    def peek(self, params: Dict[str, Any]):
+        return self.cache.peek(self.make_key(params))
+
+    async def peek_async(self, params: Dict[str, Any]):
+        return await self.cache.peek_async(self.make_key(params))
+
+    def set(self, params: Dict[str, Any], result: Dict[str, Any], elapsed: Optional[float] = None):
+        """Store a search result. SerpAPI error payloads are never cached."""
+        if self._cacheable(result, elapsed):
+            self.cache.set(self.make_key(params), result, self.ttl_for(params))
+
+    async def set_async(self, params: Dict[str, Any], result: Dict[str, Any], elapsed: Optional[float] = None):
+        if self._cacheable(result, elapsed):
+            await self.cache.set_async(self.make_key(params), result, self.ttl_for(params))
+
+    def purge_expired(self) -> int:
+        return self.cache.purge_expired()
+
+    def _cacheable(self, result: Dict[str, Any], elapsed: Optional[float]) -> bool:
+        if elapsed is not None:
+            self._upstream_seconds += elapsed
+            self._upstream_calls += 1
+        return isinstance(result, dict) and not result.get("error")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats.as_dict()
+        avg_latency = self._upstream_seconds / self._upstream_calls if self._upstream_calls else 0.0
+        stats.update({
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "avg_upstream_latency_s": round(avg_latency, 4),
+            "estimated_latency_saved_s": round(avg_latency * stats["hits"], 2),
+            "api_calls_saved": stats["hits"],
+        })
+        return stats
+
+    def close(self):
+        self.cache.close()
+
+
+# Includes the ranking summary's min/median/max spreads, which are bucketed value by value
+_PRICE_FIELDS = ("price", "rate_per_night", "extracted_price", "extracted_lowest", "price_usd", "price_per_night_usd")
+# Derived from prices, so they move with fare jitter; left out of bucketed keys
+_DERIVED_FIELDS = ("score",)
+_CURRENCY_AMOUNT = re.compile(r"\$\s?(\d+(?:\.\d+)?)")
+
+
+def bucket_price(value: Any, bucket: float) -> Any:
+    """Round a numeric or "$123"-style price (or a dict of them) to the nearest bucket."""
+    if isinstance(value, dict):
+        return {str(k): bucket_price(v, bucket) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    try:
+        amount = float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return value
+    return int(round(amount / bucket) * bucket)
+
+
+def canonicalize(data: Any, price_bucket: float = 0) -> Any:
+    """Turn LLM input data into a plain, order-stable structure for hashing.
+
+    Pydantic models are dumped to dicts and dict keys are sorted. With a
+    non-zero `price_bucket`, price fields and dollar amounts in free text are
+    rounded and option scores dropped, so that minor fare jitter still maps
+    to the same key.
+    """
+    if hasattr(data, "model_dump"):
+        data = data.model_dump()
+    if isinstance(data, dict):
+        return {
+            str(k): bucket_price(v, price_bucket) if price_bucket and k in _PRICE_FIELDS else canonicalize(v, price_bucket)
+            for k, v in sorted(data.items(), key=lambda item: str(item[0]))
+            if not (price_bucket and k in _DERIVED_FIELDS)
+        }
+    if isinstance(data, (list, tuple)):
+        return [canonicalize(item, price_bucket) for item in data]
+    if isinstance(data, str):
+        text = " ".join(data.split())
+        if price_bucket:
+            text = _CURRENCY_AMOUNT.sub(lambda m: f"${bucket_price(m.group(1), price_bucket)}", text)
+        return text
+    return data
+
+
+class LLMCache:
+    """Content-addressed cache for agent outputs (recommendations, itineraries)."""
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        maxsize: int = 256,
+        path: Optional[str] = None,
+        price_bucket: float = 0,
+    ):
+        self.ttl = ttl
+        self.price_bucket = price_bucket
+        backend = open_backend(path, table="llm_cache") if path else None
+        self.cache = TTLCache(maxsize=maxsize, backend=backend)
+
+    def make_key(self, role: str, template_version: str, data: Any, model: str) -> str:
+        payload = {
+            "role": role,
+            "template_version": template_version,
+            "model": model,
+            "data": canonicalize(data, self.price_bucket),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        return await self.cache.get_async(key)
+
+    def peek(self, key: str) -> Optional[str]:
+        return self.cache.peek(key)
+
+    async def peek_async(self, key: str) -> Optional[str]:
+        return await self.cache.peek_async(key)
+
+    def set(self, key: str, output: str):
+        if output:
+            self.cache.set(key, output, self.ttl)
+
+    async def set_async(self, key: str, output: str):
+        if output:
+            await self.cache.set_async(key, output, self.ttl)
+
+    def purge_expired(self) -> int:
+        return self.cache.purge_expired()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats.as_dict()
+        stats.update({
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "near_duplicate_bucket": self.price_bucket,
+        })
+        return stats
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,266 @@
+"""Local destination knowledge: curated POIs, opening hours and visit durations.
+
+The curated source is `data/destinations.json`; it is compiled into a
+compact SQLite file that is opened lazily, read-only and memory-mapped.
+Rebuild it offline after editing the source with:
+
+    python destinations.py build [--source data/destinations.json] [--output data/destinations.db]
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_SOURCE = os.path.join(DATA_DIR, "destinations.json")
+DEFAULT_INDEX = os.path.join(DATA_DIR, "destinations.db")
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.casefold().replace(",", " ").split())
+
+
+def build_index(source: str = DEFAULT_SOURCE, output: str = DEFAULT_INDEX) -> Dict[str, int]:
+    """Compile the curated JSON into the SQLite index, replacing any previous build atomically."""
+    with open(source, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+
+    # A unique temp file, so workers building at the same time never touch each other's
+    fd, tmp = tempfile.mkstemp(
+        prefix=f"{os.path.basename(output)}.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(output))
+    )
+    os.close(fd)
+    try:
+        counts = _write_index(tmp, data, raw)
+        os.replace(tmp, output)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return counts
+
+
+def _write_index(path: str, data: Dict, raw: bytes) -> Dict[str, int]:
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE destinations (key TEXT PRIMARY KEY, name TEXT NOT NULL, country TEXT, transport TEXT);
+        CREATE TABLE aliases (alias TEXT PRIMARY KEY, key TEXT NOT NULL);
+        CREATE TABLE pois (
+            key TEXT NOT NULL, rank INTEGER NOT NULL, name TEXT NOT NULL, category TEXT NOT NULL,
+            area TEXT, hours TEXT, visit_minutes INTEGER, tip TEXT
+        );
+        CREATE INDEX pois_key ON pois (key, rank);
+    """)
+    counts = {"destinations": 0, "pois": 0}
+    for destination in data["destinations"]:
+        key = normalize(destination["name"])
+        conn.execute(
+            "INSERT INTO destinations VALUES (?, ?, ?, ?)",
+            (key, destination["name"], destination.get("country"), destination.get("transport")),
+        )
+        for alias in {key, *(normalize(a) for a in destination.get("aliases", []))}:
+            conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?)", (alias, key))
+        for rank, poi in enumerate(destination.get("pois", [])):
+            conn.execute(
+                "INSERT INTO pois VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, rank, poi["name"], poi["category"], poi.get("area"), poi.get("hours"),
+                 poi.get("visit_minutes"), poi.get("tip")),
+            )
+            counts["pois"] += 1
+        counts["destinations"] += 1
+    conn.execute("INSERT INTO meta VALUES ('version', ?)", (hashlib.sha256(raw).hexdigest()[:12],))
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return counts
+
+
+class Poi:
+    __slots__ = ("name", "category", "area", "hours", "visit_minutes", "tip")
+
+    def __init__(self, name, category, area, hours, visit_minutes, tip):
+        self.name = name
+        self.category = category
+        self.area = area or ""
+        self.hours = hours or ""
+        self.visit_minutes = visit_minutes
+        self.tip = tip or ""
+
+    def line(self) -> str:
+        """One compact prompt line, e.g. `Red Fort [landmark, Old Delhi] Tue-Sun 09:30-16:30; ~2h; tip`."""
+        parts = [f"{self.name} [{self.category}, {self.area}]" if self.area else f"{self.name} [{self.category}]"]
+        if self.hours:
+            parts.append(self.hours)
+        if self.visit_minutes:
+            hours, minutes = divmod(self.visit_minutes, 60)
+            parts.append(f"~{hours}h{minutes:02d}" if hours and minutes else f"~{hours}h" if hours else f"~{minutes}min")
+        if self.tip:
+            parts.append(self.tip)
+        return "; ".join(parts)
+
+
+class DestinationIndex:
+    """Read-only lookups over the compiled index, opened on first use.
+
+    If `source` is newer than the compiled file (or the file is missing) the
+    index is rebuilt once before opening. Per-destination POI lists are
+    cached in memory after the first query.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX, source: Optional[str] = DEFAULT_SOURCE, mmap_size: int = 16 * 1024 * 1024):
+        self.path = path
+        self.source = source
+        self.mmap_size = mmap_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pois: Dict[str, List[Poi]] = {}
+        self._keys: Dict[str, Optional[str]] = {}
+        self.version: Optional[str] = None
+        self.lookups = 0
+        self.hits = 0
+
+    def _stale(self) -> bool:
+        if not os.path.exists(self.path):
+            return True
+        return bool(self.source) and os.path.exists(self.source) and os.path.getmtime(self.source) > os.path.getmtime(self.path)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None:
+            return self._conn
+        if self.source and os.path.exists(self.source) and self._stale():
+            try:
+                counts = build_index(self.source, self.path)
+                logger.info(f"Built destination index {self.path}: {counts}")
+            except (OSError, sqlite3.Error, ValueError, KeyError) as e:
+                logger.warning(f"Could not build destination index {self.path}: {e!r}")
+        if not os.path.exists(self.path):
+            logger.warning(f"Destination index {self.path} not found; itineraries run without local knowledge")
+            return None
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        self.version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        self._conn = conn
+        return conn
+
+    def open(self) -> bool:
+        """Open the index now (building it first if stale) instead of on the first itinerary."""
+        with self._lock:
+            return self._connection() is not None
+
+    def resolve(self, destination: str) -> Optional[str]:
+        """Index key for a free-text destination such as "New Delhi, India" or "BLR"."""
+        name = normalize(destination)
+        with self._lock:
+            if name in self._keys:
+                return self._keys[name]
+            conn = self._connection()
+            key = None
+            if conn is not None:
+                # Whole name or a whole comma-separated part; a first word alone ("Del Mar") is not enough
+                candidates = [name] + [normalize(part) for part in destination.split(",")]
+                for candidate in candidates:
+                    row = conn.execute("SELECT key FROM aliases WHERE alias = ?", (candidate,)).fetchone()
+                    if row:
+                        key = row[0]
+                        break
+            self._keys[name] = key
+            return key
+
+    def pois(self, key: str) -> List[Poi]:
+        with self._lock:
+            if key not in self._pois:
+                rows = self._connection().execute(
+                    "SELECT name, category, area, hours, visit_minutes, tip FROM pois WHERE key = ? ORDER BY rank", (key,)
+                ).fetchall()
+                self._pois[key] = [Poi(*row) for row in rows]
+            return self._pois[key]
+
+    def transport(self, key: str) -> str:
+        with self._lock:
+            row = self._connection().execute("SELECT transport FROM destinations WHERE key = ?", (key,)).fetchone()
+        return row[0] if row and row[0] else ""
+
+    def relevant(self, destination: str, area: str = "", theme: str = "", limit: int = 6) -> List[Poi]:
+        """POIs for one day: those in the day's area first, then those matching the theme, then by curated rank."""
+        self.lookups += 1
+        key = self.resolve(destination)
+        if key is None:
+            return []
+        self.hits += 1
+        pois = self.pois(key)
+        area_words = set(_WORD.findall(area.casefold()))
+        theme_words = set(_WORD.findall(theme.casefold()))
+
+        def score(item):
+            rank, poi = item
+            poi_area = set(_WORD.findall(poi.area.casefold()))
+            poi_words = set(_WORD.findall(f"{poi.name} {poi.category} {poi.tip}".casefold()))
+            return (-2 * bool(area_words & poi_area) - bool(theme_words & poi_words), rank)
+
+        return [poi for _, poi in sorted(enumerate(pois), key=score)[:limit]]
+
+    def day_knowledge(self, destination: str, area: str = "", theme: str = "", limit: int = 6) -> str:
+        pois = self.relevant(destination, area, theme, limit)
+        if not pois:
+            return ""
+        lines = "\n".join(f"        - {poi.line()}" for poi in pois)
+        return (
+            "Curated places (use these names, opening hours and visit times rather than guessing; "
+            f"keep descriptions under 15 words):\n{lines}"
+        )
+
+    def trip_knowledge(self, destination: str, limit: int = 12) -> str:
+        """Areas with their POIs plus transport tips, for outlining or writing a whole trip."""
+        self.lookups += 1
+        key = self.resolve(destination)
+        if key is None:
+            return ""
+        self.hits += 1
+        by_area: Dict[str, List[str]] = {}
+        for poi in self.pois(key)[:limit]:
+            by_area.setdefault(poi.area or "Other", []).append(f"{poi.name} ({poi.hours})" if poi.hours else poi.name)
+        lines = [f"        - {area}: {', '.join(names)}" for area, names in by_area.items()]
+        transport = self.transport(key)
+        if transport:
+            lines.append(f"        - Getting around: {transport}")
+        return "Curated local knowledge (prefer these places and opening hours):\n" + "\n".join(lines)
+
+    def find(self, destination: str, title: str) -> Optional[Poi]:
+        """The POI an activity title refers to, if any."""
+        key = self.resolve(destination)
+        if key is None:
+            return None
+        title = title.casefold()
+        for poi in self.pois(key):
+            if poi.name.casefold() in title:
+                return poi
+        return None
+
+    def stats(self) -> Dict[str, object]:
+        return {"loaded": self._conn is not None, "version": self.version, "lookups": self.lookups, "hits": self.hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the destination knowledge index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="compile the curated JSON into the SQLite index")
+    build.add_argument("--source", default=DEFAULT_SOURCE)
+    build.add_argument("--output", default=DEFAULT_INDEX)
+    args = parser.parse_args()
+    counts = build_index(args.source, args.output)
+    print(f"Wrote {args.output}: {counts['destinations']} destinations, {counts['pois']} POIs")
+
+
+if __name__ == "__main__":
+    main()
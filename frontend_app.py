@@ -1,7 +1,11 @@
 import streamlit as st
 import requests
+import json
+import time
 import re
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 def clean_raw_markdown_string(raw_text: str) -> str:
 
@@ -16,144 +20,413 @@ def fix_unicode_issues(text: str) -> str:
     return text.encode('latin1').decode('utf-8', 'ignore')
 
 
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+def render_highlight(placeholder, title: str, raw_text: str):
+    try:
+        fixed_md = fix_unicode_issues(clean_raw_markdown_string(raw_text))
+    except UnicodeError:
+        # A partially streamed escape sequence; show the text as-is until more arrives
+        fixed_md = raw_text
+    placeholder.markdown(f"""
+            <div style="border: 3px solid #FF6347; padding: 20px; background-color: #FFF0F5; border-radius: 10px; color: black;">
+            <h2 style="color: #FF6347;">{title}</h2>
+            <p style="font-size: 16px; color: black;">
+            {fixed_md}
+             </p>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+def render_plan_progress(placeholder, title: str, days: dict, planned: set):
+    """Outline of a structured itinerary while its days are being planned."""
+    lines = []
+    for number in sorted(days):
+        day = days[number]
+        lines += ["", f"**Day {number} ({day['date']}): {day['theme']}**"]
+        if number not in planned:
+            lines.append("- _Planning..._")
+        for activity in day["activities"]:
+            time_label = f"**{activity['time']}** " if activity["time"] else ""
+            lines.append(f"- {time_label}{activity['title']}")
+    render_highlight(placeholder, title, "\n".join(lines))
+
+
+DEGRADED_NOTE = "AI analysis is unavailable right now, so this answer is a fallback built from the search results."
+
+
+def render_stream(response, results_event, result_event: str, title: str):
+    """Render structured results as soon as they arrive, then the AI text token by token,
+    or a structured itinerary's outline filled in day by day.
+
+    Returns the final results, text, error and whether the text is a degraded
+    fallback, so the response can be shown again on later reruns without
+    calling the backend.
+    """
+    results_placeholder = st.empty()
+    text_placeholder = st.empty()
+    outcome = {"results": None, "text": "", "error": None, "degraded": False}
+    streamed = ""
+    days, planned = {}, set()
+    for event, data in iter_sse_events(response):
+        if results_event and event == results_event:
+            if data:
+                for item in data:
+                    item.pop("airline_logo", None)
+                results_placeholder.dataframe(data, use_container_width=True)
+            else:
+                results_placeholder.warning(f"No {results_event} found.")
+            outcome["results"] = data
+        elif event == "skeleton":
+            days = {day["day"]: day for day in data["days"]}
+            render_plan_progress(text_placeholder, title, days, planned)
+        elif event == "day":
+            days[data["day"]] = data
+            planned.add(data["day"])
+            render_plan_progress(text_placeholder, title, days, planned)
+        elif event == "token":
+            streamed += data["text"]
+            render_highlight(text_placeholder, title, streamed)
+        elif event == result_event:
+            if data.get("degraded"):
+                st.warning(DEGRADED_NOTE)
+                outcome["degraded"] = True
+            render_highlight(text_placeholder, title, data["text"])
+            outcome["text"] = data["text"]
+        elif event == "error":
+            st.error(data["detail"])
+            outcome["error"] = data["detail"]
+    return outcome
+
+
+def render_outcome(outcome, results_name, title: str):
+    """Show a remembered response the way render_stream showed it live."""
+    if results_name:
+        if outcome["results"]:
+            st.dataframe(outcome["results"], use_container_width=True)
+        else:
+            st.warning(f"No {results_name} found.")
+    if outcome.get("degraded"):
+        st.warning(DEGRADED_NOTE)
+    if outcome["text"]:
+        render_highlight(st.empty(), title, outcome["text"])
+
+
+# Responses are reused for identical requests within RESPONSE_TTL seconds
+RESPONSE_TTL = 600
+MAX_REMEMBERED = 20
+REQUEST_TIMEOUT = (10, 300)
+
+
+@st.cache_resource
+def http_session() -> requests.Session:
+    """One keep-alive connection pool shared by every rerun and browser session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(connect=2, read=0, backoff_factor=0.3))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=RESPONSE_TTL, max_entries=64, show_spinner=False)
+def cached_post_json(url: str, payload: dict) -> dict:
+    response = http_session().post(url, json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def post_json(url: str, payload: dict) -> dict:
+    """POST through the shared response cache, dropping answers with degraded fields from it.
+
+    A fallback is shown once; the next identical request asks the backend again.
+    """
+    result = cached_post_json(url, payload)
+    if result.get("degraded"):
+        cached_post_json.clear(url, payload)
+    return result
+
+
+def request_key(url: str, payload: dict) -> str:
+    return json.dumps([url, payload], sort_keys=True)
+
+
+def remember(url: str, payload: dict, outcome):
+    """Keep a streamed response for this browser session.
+
+    Streams render while they arrive, which st.cache_data cannot replay, so
+    they are remembered in session state instead. Degraded fallbacks are not
+    kept, so a repeat request asks the backend again.
+    """
+    if outcome.get("degraded"):
+        return
+    memo = st.session_state.setdefault("responses", {})
+    key = request_key(url, payload)
+    memo.pop(key, None)
+    memo[key] = (time.time() + RESPONSE_TTL, outcome)
+    while len(memo) > MAX_REMEMBERED:
+        memo.pop(next(iter(memo)))
+
+
+def recall(url: str, payload: dict):
+    entry = st.session_state.get("responses", {}).get(request_key(url, payload))
+    if entry is None or entry[0] < time.time():
+        return None
+    return entry[1]
+
+
+def fetch_stream(url: str, payload: dict, results_event, result_event: str, title: str):
+    """(outcome, streamed): a remembered outcome for a repeated request, else a freshly streamed one."""
+    outcome = recall(url, payload)
+    if outcome is not None:
+        return outcome, False
+    with http_session().post(url, json=payload, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        outcome = render_stream(response, results_event, result_event, title)
+    if outcome["error"] is None:
+        remember(url, payload, outcome)
+    return outcome, True
+
+
+def flight_label(flight) -> str:
+    return f"{flight['airline']} · {flight['departure']} → {flight['arrival']} · {flight['duration']} · {flight['stops']} · {flight['price']}"
+
+
+def hotel_label(hotel) -> str:
+    return f"{hotel['name']} · {hotel['price']} · ⭐ {hotel['rating']} · {hotel['location']}"
+
+
+def choose_for_itinerary(kind: str, options, label):
+    """Pick one result; a new pick pre-fills the itinerary step, keeping edits made there otherwise."""
+    if not options:
+        return
+    index = st.selectbox(
+        "Use for the itinerary", range(len(options)), format_func=lambda i: label(options[i]), key=f"{kind}_choice"
+    )
+    picked = json.dumps([{k: v for k, v in options[index].items() if k not in ("airline_logo", "link")}], indent=2)
+    if st.session_state.get(f"{kind}_picked") != picked:
+        st.session_state[f"{kind}_picked"] = picked
+        st.session_state[f"itinerary_{kind}"] = picked
+
+
+def show_results(kind: str, outcome, streamed: bool, title: str, label):
+    if not streamed:
+        render_outcome(outcome, kind, title)
+    choose_for_itinerary(kind, outcome["results"], label)
+
+
+def carry_to_itinerary(destination=None, check_in=None, check_out=None):
+    """Copy trip details into the itinerary step (it is rendered last, so its widgets take them this run)."""
+    if destination:
+        st.session_state["itinerary_dest"] = destination
+    if check_in:
+        st.session_state["itinerary_checkin"] = datetime.strptime(check_in, "%Y-%m-%d").date()
+    if check_out:
+        st.session_state["itinerary_checkout"] = datetime.strptime(check_out, "%Y-%m-%d").date()
+
+
+def new_results(kind: str, outcome):
+    """Keep the latest results across reruns; the selection starts over at the top-ranked option."""
+    if outcome is None or outcome["error"] is not None:
+        st.session_state.pop(kind, None)
+    else:
+        st.session_state[kind] = outcome
+    st.session_state.pop(f"{kind}_choice", None)
+
+
 # API URLs
 API_BASE_URL = "https://multi-agent-ai-travel-planner.onrender.com:8000"
 API_URL_FLIGHTS = f"{API_BASE_URL}/search_flights/"
 API_URL_HOTELS = f"{API_BASE_URL}/search_hotels/"
 API_URL_ITINERARY = f"{API_BASE_URL}/generate_itinerary/"
+API_URL_PLAN_TRIP = f"{API_BASE_URL}/plan_trip/"
+API_URL_FLIGHTS_STREAM = f"{API_URL_FLIGHTS}stream"
+API_URL_HOTELS_STREAM = f"{API_URL_HOTELS}stream"
+API_URL_ITINERARY_STREAM = f"{API_URL_ITINERARY}stream"
 
 st.set_page_config(layout="wide")
 st.title("✈️🏨 AI-Powered Travel Planner")
 st.markdown("Find flights, hotels, and generate a smart itinerary – all in one place!")
 
+# Widget values live in session state so results and selections can fill other tabs
+for key, value in {
+    "plan_origin": "BLR", "plan_destination": "HYD", "plan_city": "Hyderabad",
+    "plan_start": datetime.strptime("2025-03-10", "%Y-%m-%d").date(),
+    "plan_end": datetime.strptime("2025-03-17", "%Y-%m-%d").date(),
+    "dep_airport": "BLR", "dest_airport": "HYD",
+    "dep_date": datetime.strptime("2025-03-10", "%Y-%m-%d").date(),
+    "ret_date": datetime.strptime("2025-03-17", "%Y-%m-%d").date(),
+    "hotel_loc": "Bangalore",
+    "in_date": datetime.strptime("2025-03-10", "%Y-%m-%d").date(),
+    "out_date": datetime.strptime("2025-03-17", "%Y-%m-%d").date(),
+    "itinerary_dest": "Hyderabad", "itinerary_flights": "", "itinerary_hotels": "",
+    "itinerary_checkin": datetime.strptime("2025-03-10", "%Y-%m-%d").date(),
+    "itinerary_checkout": datetime.strptime("2025-03-17", "%Y-%m-%d").date(),
+}.items():
+    st.session_state.setdefault(key, value)
+
 # Tabs
-tabs = st.tabs(["✈️ Search Flights", "🏨 Search Hotels", "🗺️ Generate Itinerary"])
+tabs = st.tabs(["🧳 Plan Trip", "✈️ Search Flights", "🏨 Search Hotels", "🗺️ Generate Itinerary"])
 
-# --- Flights Tab ---
+# --- Plan Trip Tab ---
 with tabs[0]:
-    st.subheader("✈️ Flight Details")
-    departure_airport = st.text_input("DEPARTURE AIRPORT (IATA CODE)", value="BLR", key="dep_airport")
-    destination_airport = st.text_input("DESTINATION AIRPORT (IATA CODE)", value="HYD", key="dest_airport")
-    departure_date = st.date_input("DEPARTURE DATE", value=datetime.strptime("2025-03-10", "%Y-%m-%d"), key="dep_date")
-    return_date = st.date_input("RETURN DATE", value=datetime.strptime("2025-03-17", "%Y-%m-%d"), key="ret_date")
+    st.subheader("🧳 Plan a Trip")
+    st.caption("Searches flights and hotels concurrently, analyzes both and drafts an itinerary in one request.")
+    plan_origin = st.text_input("DEPARTURE AIRPORT (IATA CODE)", key="plan_origin")
+    plan_destination = st.text_input("DESTINATION AIRPORT (IATA CODE)", key="plan_destination")
+    plan_city = st.text_input("DESTINATION CITY", key="plan_city")
+    plan_start = st.date_input("DEPARTURE / CHECK IN DATE", key="plan_start")
+    plan_end = st.date_input("RETURN / CHECK OUT DATE", key="plan_end")
 
-    if st.button("🔍 Search Flights"):
+    if st.button("🧳 Plan Trip"):
         flight_request = {
-            "origin": departure_airport,
-            "destination": destination_airport,
-            "outbound_date": departure_date.strftime("%Y-%m-%d"),
-            "return_date": return_date.strftime("%Y-%m-%d"),
+            "origin": plan_origin,
+            "destination": plan_destination,
+            "outbound_date": plan_start.strftime("%Y-%m-%d"),
+            "return_date": plan_end.strftime("%Y-%m-%d"),
             "type": "1"
         }
-
+        hotel_request = {
+            "location": plan_city,
+            "check_in_date": plan_start.strftime("%Y-%m-%d"),
+            "check_out_date": plan_end.strftime("%Y-%m-%d")
+        }
         try:
-            response = requests.post(API_URL_FLIGHTS, json=flight_request)
-            response.raise_for_status()
-            flight_data = response.json()
-
-            st.subheader("Flight Results")
-            flights = flight_data.get("flights", [])
-            if flights:
-                for flight in flights:
-                    flight.pop("airline_logo", None)
-                st.dataframe(flights, use_container_width=True)
-            else:
-                st.warning("No flights found.")
+            with st.spinner("Planning your trip..."):
+                trip = post_json(API_URL_PLAN_TRIP, {
+                    "flight_request": flight_request, "hotel_request": hotel_request, "destination": plan_city
+                })
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error planning trip: {str(e)}")
+        else:
+            # The search tabs show the same results and answer a repeat search from them
+            flights = [{k: v for k, v in flight.items() if k != "airline_logo"} for flight in trip["flights"]]
+            degraded = trip.get("degraded") or []
+            flights = {
+                "results": flights, "text": trip["ai_flight_recommendation"], "error": None,
+                "degraded": "ai_flight_recommendation" in degraded,
+            }
+            hotels = {
+                "results": trip["hotels"], "text": trip["ai_hotel_recommendation"], "error": None,
+                "degraded": "ai_hotel_recommendation" in degraded,
+            }
+            remember(API_URL_FLIGHTS_STREAM, flight_request, flights)
+            remember(API_URL_HOTELS_STREAM, hotel_request, hotels)
+            new_results("flights", flights)
+            new_results("hotels", hotels)
+            st.session_state["trip_itinerary"] = trip["itinerary"]
+            st.session_state["trip_itinerary_degraded"] = "itinerary" in degraded
+            st.session_state.update({
+                "dep_airport": plan_origin, "dest_airport": plan_destination, "dep_date": plan_start,
+                "ret_date": plan_end, "hotel_loc": plan_city, "in_date": plan_start, "out_date": plan_end,
+            })
+            carry_to_itinerary(plan_city, hotel_request["check_in_date"], hotel_request["check_out_date"])
 
-            raw_text = flight_data.get("ai_flight_recommendation", "No recommendation available.")
-            parsed_md = clean_raw_markdown_string(raw_text)
-            fixed_md = fix_unicode_issues(parsed_md)
-            highlighted_md = f"""
-            <div style="border: 3px solid #FF6347; padding: 20px; background-color: #FFF0F5; border-radius: 10px; color: black;">
-            <h2 style="color: #FF6347;">🏨 AI Recommendation:</h2>
-            <p style="font-size: 16px; color: black;">
-            {fixed_md}
-             </p>
-            </div>
-            """
-            st.markdown(highlighted_md, unsafe_allow_html=True)
+    if st.session_state.get("trip_itinerary"):
+        st.success("Flights and hotels are ready in their tabs; pick options there to refine the itinerary.")
+        if st.session_state.get("trip_itinerary_degraded"):
+            st.warning(DEGRADED_NOTE)
+        render_highlight(st.empty(), "📝 AI Generated Itinerary", st.session_state["trip_itinerary"])
+
+# --- Flights Tab ---
+with tabs[1]:
+    st.subheader("✈️ Flight Details")
+    departure_airport = st.text_input("DEPARTURE AIRPORT (IATA CODE)", key="dep_airport")
+    destination_airport = st.text_input("DESTINATION AIRPORT (IATA CODE)", key="dest_airport")
+    departure_date = st.date_input("DEPARTURE DATE", key="dep_date")
+    return_date = st.date_input("RETURN DATE", key="ret_date")
 
+    flight_request = {
+        "origin": departure_airport,
+        "destination": destination_airport,
+        "outbound_date": departure_date.strftime("%Y-%m-%d"),
+        "return_date": return_date.strftime("%Y-%m-%d"),
+        "type": "1"
+    }
+    streamed = False
+    if st.button("🔍 Search Flights"):
+        st.subheader("Flight Results")
+        outcome = None
+        try:
+            outcome, streamed = fetch_stream(
+                API_URL_FLIGHTS_STREAM, flight_request, "flights", "ai_flight_recommendation", "🏨 AI Recommendation:"
+            )
+            carry_to_itinerary(check_in=flight_request["outbound_date"], check_out=flight_request["return_date"])
         except requests.exceptions.RequestException as e:
             st.error(f"Error searching flights: {str(e)}")
+        new_results("flights", outcome)
+    elif st.session_state.get("flights"):
+        st.subheader("Flight Results")
+
+    if st.session_state.get("flights"):
+        show_results("flights", st.session_state["flights"], streamed, "🏨 AI Recommendation:", flight_label)
 
 # --- Hotels Tab ---
-with tabs[1]:
+with tabs[2]:
     st.subheader("🏨 Hotel Details")
-    hotel_location = st.text_input("HOTEL LOCATION", value="Bangalore", key="hotel_loc")
-    check_in_date = st.date_input("CHECK IN DATE", value=datetime.strptime("2025-03-10", "%Y-%m-%d"), key="in_date")
-    check_out_date = st.date_input("CHECK OUT DATE", value=datetime.strptime("2025-03-17", "%Y-%m-%d"), key="out_date")
+    hotel_location = st.text_input("HOTEL LOCATION", key="hotel_loc")
+    check_in_date = st.date_input("CHECK IN DATE", key="in_date")
+    check_out_date = st.date_input("CHECK OUT DATE", key="out_date")
 
+    hotel_request = {
+        "location": hotel_location,
+        "check_in_date": check_in_date.strftime("%Y-%m-%d"),
+        "check_out_date": check_out_date.strftime("%Y-%m-%d")
+    }
+    streamed = False
     if st.button("🔍 Search Hotels"):
-        hotel_request = {
-            "location": hotel_location,
-            "check_in_date": check_in_date.strftime("%Y-%m-%d"),
-            "check_out_date": check_out_date.strftime("%Y-%m-%d")
-        }
-
+        st.subheader("Hotel Results")
+        outcome = None
         try:
-            response = requests.post(API_URL_HOTELS, json=hotel_request)
-            response.raise_for_status()
-            hotel_data = response.json()
-
-            st.subheader("Hotel Results")
-            hotels = hotel_data.get("hotels", [])
-            if hotels:
-                st.dataframe(hotels, use_container_width=True)
-            else:
-                st.warning("No hotels found.")
-
-            raw_text = hotel_data.get("ai_hotel_recommendation", "No recommendation available.")
-            parsed_md = clean_raw_markdown_string(raw_text)
-            fixed_md = fix_unicode_issues(parsed_md)
-            highlighted_md = f"""
-            <div style="border: 3px solid #FF6347; padding: 20px; background-color: #FFF0F5; border-radius: 10px; color: black;">
-            <h2 style="color: #FF6347;">🏨 AI Recommendation:</h2>
-            <p style="font-size: 16px; color: black;">
-            {fixed_md}
-             </p>
-            </div>
-            """
-            st.markdown(highlighted_md, unsafe_allow_html=True)
-
+            outcome, streamed = fetch_stream(
+                API_URL_HOTELS_STREAM, hotel_request, "hotels", "ai_hotel_recommendation", "🏨 AI Recommendation:"
+            )
+            carry_to_itinerary(hotel_location, hotel_request["check_in_date"], hotel_request["check_out_date"])
         except requests.exceptions.RequestException as e:
             st.error(f"Error searching hotels: {str(e)}")
+        new_results("hotels", outcome)
+    elif st.session_state.get("hotels"):
+        st.subheader("Hotel Results")
+
+    if st.session_state.get("hotels"):
+        show_results("hotels", st.session_state["hotels"], streamed, "🏨 AI Recommendation:", hotel_label)
 
 # --- Generate Itinerary Tab ---
-with tabs[2]:
+with tabs[3]:
     st.subheader("🗺️ Generate Itinerary")
-    destination = st.text_input("Destination", value="Hyderabad", key="itinerary_dest")
+    destination = st.text_input("Destination", key="itinerary_dest")
 
-    itinerary_flights = st.text_area("Paste your selected flight details (JSON format)", height=100)
-    itinerary_hotels = st.text_area("Paste your selected hotel details (JSON format)", height=100)
+    itinerary_flights = st.text_area("Selected flight details (filled in from the flight search)", height=100, key="itinerary_flights")
+    itinerary_hotels = st.text_area("Selected hotel details (filled in from the hotel search)", height=100, key="itinerary_hotels")
 
-    itinerary_checkin = st.date_input("Check-in Date", value=datetime.strptime("2025-03-10", "%Y-%m-%d"))
-    itinerary_checkout = st.date_input("Check-out Date", value=datetime.strptime("2025-03-17", "%Y-%m-%d"))
+    itinerary_checkin = st.date_input("Check-in Date", key="itinerary_checkin")
+    itinerary_checkout = st.date_input("Check-out Date", key="itinerary_checkout")
 
+    request_body = {
+        "destination": destination,
+        "flights": itinerary_flights,
+        "hotels": itinerary_hotels,
+        "check_in_date": itinerary_checkin.strftime("%Y-%m-%d"),
+        "check_out_date": itinerary_checkout.strftime("%Y-%m-%d")
+    }
     if st.button("🧠 Generate Itinerary"):
         try:
-            request_body = {
-                "destination": destination,
-                "flights": itinerary_flights,   # use json.loads() instead for production!
-                "hotels": itinerary_hotels,
-                "check_in_date": itinerary_checkin.strftime("%Y-%m-%d"),
-                "check_out_date": itinerary_checkout.strftime("%Y-%m-%d")
-            }
-
-            response = requests.post(API_URL_ITINERARY, json=request_body)
-            response.raise_for_status()
-            itinerary_data = response.json()
-            raw_text = itinerary_data.get("itinerary", "No itinerary generated.")
-            parsed_md = clean_raw_markdown_string(raw_text)
-            fixed_md = fix_unicode_issues(parsed_md)
-            highlighted_md = f"""
-            <div style="border: 3px solid #FF6347; padding: 20px; background-color: #FFF0F5; border-radius: 10px; color: black;">
-            <h2 style="color: #FF6347;">📝 AI Generated Itinerary</h2>
-            <p style="font-size: 16px; color: black;">
-            {fixed_md}
-             </p>
-            </div>
-            """
-            st.markdown(highlighted_md, unsafe_allow_html=True)
-
+            outcome, streamed = fetch_stream(API_URL_ITINERARY_STREAM, request_body, None, "itinerary", "📝 AI Generated Itinerary")
+            if not streamed:
+                render_outcome(outcome, None, "📝 AI Generated Itinerary")
+            st.session_state["itinerary"] = outcome
         except Exception as e:
             st.error(f"Failed to generate itinerary: {e}")
+    elif st.session_state.get("itinerary"):
+        render_outcome(st.session_state["itinerary"], None, "📝 AI Generated Itinerary")
@@ -0,0 +1,352 @@
+import re
+import json
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models import Activity, DayPlan, ItineraryPlan
+from prompt_format import truncate_words
+from scheduler import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_EMOJI = {
+    "landmark": "🏛️",
+    "food": "🍽️",
+    "nature": "🌳",
+    "shopping": "🛍️",
+    "culture": "🎭",
+    "transport": "🚕",
+    "hotel": "🏨",
+    "flight": "✈️",
+    "leisure": "☕",
+}
+
+# Used when the skeleton agent returns fewer days than the trip has
+FALLBACK_THEMES = (
+    "City highlights", "Culture and history", "Local food and markets",
+    "Nature and views", "Neighbourhood walks", "Shopping and leisure",
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+_TIME = re.compile(r"^(\d{1,2}):(\d{2})(?:\s*([AaPp])\.?[Mm]\b)?")
+
+
+def trip_dates(check_in_date: str, check_out_date: str, max_days: Optional[int] = None) -> List[str]:
+    """One date per itinerary day; a same-day trip still gets one day.
+
+    Raises ValueError for malformed dates, a check-out before the check-in,
+    or a trip longer than `max_days` (each day is its own LLM call).
+    """
+    try:
+        check_in = datetime.strptime(check_in_date, "%Y-%m-%d")
+        check_out = datetime.strptime(check_out_date, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("check_in_date and check_out_date must be YYYY-MM-DD") from None
+    if check_out < check_in:
+        raise ValueError("check_out_date must not be before check_in_date")
+    days = max(1, (check_out - check_in).days)
+    if max_days is not None and days > max_days:
+        raise ValueError(f"Trip has {days} days, the limit is {max_days}")
+    return [(check_in + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """First JSON object in an LLM answer, tolerating code fences and surrounding prose."""
+    match = _JSON_OBJECT.search(text or "")
+    if match is None:
+        return None
+    try:
+        value = json.loads(match.group(0))
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def default_theme(index: int, total: int) -> str:
+    if index == 0:
+        return "Arrival and first impressions"
+    if index == total - 1 and total > 1:
+        return "Last highlights and departure"
+    return FALLBACK_THEMES[(index - 1) % len(FALLBACK_THEMES)]
+
+
+def parse_skeleton(text: str, dates: List[str]) -> List[DayPlan]:
+    """DayPlans without activities, one per date; missing or malformed days get a default theme."""
+    data = parse_json_object(text) or {}
+    entries = data.get("days") if isinstance(data.get("days"), list) else []
+    days = []
+    for i, date in enumerate(dates):
+        entry = entries[i] if i < len(entries) and isinstance(entries[i], dict) else {}
+        days.append(DayPlan(
+            day=i + 1,
+            date=date,
+            theme=str(entry.get("theme") or default_theme(i, len(dates))).strip(),
+            area=str(entry.get("area") or "").strip()
+        ))
+    return days
+
+
+def start_minutes(time: str) -> Optional[int]:
+    """Minutes after midnight of a time starting with HH:MM (optionally AM/PM), or None."""
+    match = _TIME.match(time)
+    if match is None:
+        return None
+    hour, minute, half = int(match.group(1)), int(match.group(2)), (match.group(3) or "").lower()
+    if half:
+        hour = hour % 12 + (12 if half == "p" else 0)
+    return hour * 60 + minute
+
+
+def parse_activities(text: str) -> List[Activity]:
+    data = parse_json_object(text) or {}
+    activities = []
+    for entry in data.get("activities") or []:
+        if not isinstance(entry, dict) or not entry.get("title"):
+            continue
+        category = str(entry.get("category") or "leisure").strip().lower()
+        activities.append(Activity(
+            time=str(entry.get("time") or "").strip(),
+            title=str(entry["title"]).strip(),
+            description=str(entry.get("description") or "").strip(),
+            category=category if category in CATEGORY_EMOJI else "leisure"
+        ))
+    # Keep the schedule in time order when the model returns HH:MM times, otherwise in its order
+    starts = [start_minutes(a.time) for a in activities]
+    if None not in starts:
+        activities = [a for _, a in sorted(zip(starts, activities), key=lambda pair: pair[0])]
+    return activities
+
+
+def day_notes(index: int, total: int, flights_text: str, hotels_text: str) -> str:
+    """Extra instructions for the arrival and departure days; middle days get none so they can be reused."""
+    notes = []
+    if index == 0:
+        notes.append("This is the arrival day: plan around the arrival flight and hotel check-in.")
+    if index == total - 1 and total > 1:
+        notes.append("This is the departure day: leave time for hotel check-out and the return flight.")
+    if notes:
+        notes.append(f"Flight details: {flights_text}")
+        notes.append(f"Hotel details: {hotels_text}")
+    return "\n        ".join(notes)
+
+
+def selected_option(text: str, max_chars: int = 300) -> str:
+    """One line for the flight or hotel the trip is planned around.
+
+    Details that start with the selected options as JSON (the UI's pick, or
+    /plan_trip/'s top-ranked options plus the AI analysis) give the first
+    option; pasted text is whitespace-normalized and shortened.
+    """
+    text = (text or "").strip()
+    data = None
+    if text[:1] in "[{":
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text)
+        except ValueError:
+            data = None
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        return truncate_words(" ".join(text.split()), max_chars)
+    if "airline" in data:
+        route = " → ".join(str(data[key]) for key in ("departure", "arrival") if data.get(key))
+        parts = [data.get("airline"), route, data.get("duration"), data.get("stops"), data.get("price")]
+    elif "name" in data:
+        price = f"${str(data['price']).lstrip('$')}/night" if data.get("price") else ""
+        rating = f"rated {data['rating']}" if data.get("rating") else ""
+        parts = [data.get("name"), price, rating]
+    else:
+        parts = list(data.values())
+    return " · ".join(str(part) for part in parts if part)
+
+
+def render_markdown(plan: ItineraryPlan, flights_text: str, hotels_text: str) -> str:
+    lines = [
+        f"# 🗺️ {len(plan.days)}-Day Itinerary for {plan.destination}",
+        f"**Travel Dates**: {plan.check_in_date} to {plan.check_out_date}",
+        "",
+        "## ✈️ Flight Details",
+        selected_option(flights_text),
+        "",
+        "## 🏨 Hotel Details",
+        selected_option(hotels_text),
+    ]
+    for day in plan.days:
+        lines += ["", f"## Day {day.day} ({day.date}): {day.theme}"]
+        if day.area:
+            lines.append(f"📍 *{day.area}*")
+        lines += ["", "### Activities"]
+        if not day.activities:
+            lines.append("- Free time to explore at your own pace")
+        for activity in day.activities:
+            emoji = CATEGORY_EMOJI.get(activity.category, "")
+            time = f"**{activity.time}** " if activity.time else ""
+            description = f" – {activity.description}" if activity.description else ""
+            lines.append(f"- {time}{emoji} {activity.title}{description}")
+    return "\n".join(lines) + "\n"
+
+
+class ItineraryPipeline:
+    """Skeleton first, then every day planned by its own bounded LLM call.
+
+    `run_agent(name, cache_data, inputs)` runs an agent and returns its text;
+    `cache_data` identifies the output for caching. Day plans are keyed on
+    the destination and day theme (plus arrival/departure notes), so common
+    days such as "Old town and markets" in a popular city are reused across
+    trips.
+    """
+
+    def __init__(
+        self,
+        run_agent: Callable[[str, Dict, Dict], Awaitable[str]],
+        concurrency: int = 4,
+        index=None,
+        max_days: Optional[int] = None,
+    ):
+        self.run_agent = run_agent
+        self.concurrency = concurrency
+        self.index = index
+        self.max_days = max_days
+
+    def enrich(self, destination: str, activities: List[Activity]) -> List[Activity]:
+        """Fill opening hours and visit times for activities the destination index knows."""
+        if self.index is None:
+            return activities
+        enriched = []
+        for activity in activities:
+            poi = self.index.find(destination, activity.title)
+            if poi is not None and poi.hours and poi.hours not in activity.description:
+                details = "; ".join(part for part in (poi.hours, f"~{poi.visit_minutes} min" if poi.visit_minutes else "") if part)
+                description = f"{activity.description} ({details})" if activity.description else details
+                activity = activity.model_copy(update={"description": description})
+            enriched.append(activity)
+        return enriched
+
+    async def skeleton(self, destination, flights_text, hotels_text, check_in_date, check_out_date) -> List[DayPlan]:
+        dates = trip_dates(check_in_date, check_out_date, self.max_days)
+        inputs = {
+            "days": len(dates),
+            "destination": destination,
+            "flights_text": flights_text,
+            "hotels_text": hotels_text,
+            "check_in_date": check_in_date,
+            "check_out_date": check_out_date,
+            "local_knowledge": self.index.trip_knowledge(destination) if self.index is not None else "",
+        }
+        text = await self.run_agent("itinerary_skeleton", inputs, inputs)
+        return parse_skeleton(text, dates)
+
+    async def plan_day(self, destination: str, day: DayPlan, notes: str) -> DayPlan:
+        knowledge = self.index.day_knowledge(destination, day.area, day.theme) if self.index is not None else ""
+        cache_data = {
+            "destination": " ".join(destination.casefold().split()),
+            "theme": " ".join(day.theme.casefold().split()),
+            "notes": notes,
+            "local_knowledge": knowledge,
+        }
+        inputs = {
+            "destination": destination,
+            "theme": day.theme,
+            "area": day.area or destination,
+            "notes": notes,
+            "local_knowledge": knowledge,
+        }
+        text = await self.run_agent("itinerary_day", cache_data, inputs)
+        return day.model_copy(update={"activities": self.enrich(destination, parse_activities(text))})
+
+    def fallback_day(self, destination: str, day: DayPlan, used: set, limit: int = 4) -> DayPlan:
+        """The day filled from curated places for its area and theme, skipping places already planned."""
+        pois = self.index.relevant(destination, day.area, day.theme, limit=100) if self.index is not None else []
+        activities = []
+        for poi in pois:
+            if poi.name in used or len(activities) == limit:
+                continue
+            used.add(poi.name)
+            details = "; ".join(part for part in (poi.hours, f"~{poi.visit_minutes} min" if poi.visit_minutes else "") if part)
+            activities.append(Activity(
+                time="",
+                title=poi.name,
+                description=details,
+                category=poi.category if poi.category in CATEGORY_EMOJI else "leisure"
+            ))
+        return day.model_copy(update={"activities": activities})
+
+    def fallback_plan(self, destination, check_in_date, check_out_date) -> ItineraryPlan:
+        """A plan built without any LLM call: default day themes filled from the destination index."""
+        used: set = set()
+        days = [self.fallback_day(destination, day, used) for day in parse_skeleton("", trip_dates(check_in_date, check_out_date, self.max_days))]
+        return ItineraryPlan(
+            destination=destination,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            days=days,
+            degraded=True
+        )
+
+    async def stream(
+        self, destination, flights_text, hotels_text, check_in_date, check_out_date
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("skeleton", days) once the trip is outlined, ("day", day) as each day is planned, then ("plan", plan).
+
+        Days arrive in completion order. Days whose LLM call failed are filled
+        from curated places after the others, in day order, so the fallback is
+        deterministic and does not repeat places; failed steps mark the plan
+        degraded.
+        """
+        degraded = False
+        try:
+            days = await self.skeleton(destination, flights_text, hotels_text, check_in_date, check_out_date)
+        except QueueFullError:
+            raise
+        except Exception as e:
+            logger.warning(f"Outlining the trip failed, using default day themes: {e!r}")
+            days = parse_skeleton("", trip_dates(check_in_date, check_out_date, self.max_days))
+            degraded = True
+        yield "skeleton", days
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(index, day):
+            async with semaphore:
+                notes = day_notes(index, len(days), flights_text, hotels_text)
+                try:
+                    return index, await self.plan_day(destination, day, notes)
+                except QueueFullError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Planning day {day.day} failed, using curated places: {e!r}")
+                    return index, None
+
+        planned: List[Optional[DayPlan]] = [None] * len(days)
+        tasks = [asyncio.ensure_future(bounded(i, day)) for i, day in enumerate(days)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, day = await next_done
+                if day is not None:
+                    planned[index] = day
+                    yield "day", day
+        finally:
+            # A failed day or a consumer that went away leaves nothing to wait for
+            for task in tasks:
+                task.cancel()
+
+        used = {activity.title for day in planned if day is not None for activity in day.activities}
+        for i, day in enumerate(planned):
+            if day is None:
+                planned[i] = self.fallback_day(destination, days[i], used)
+                degraded = True
+                yield "day", planned[i]
+        yield "plan", ItineraryPlan(
+            destination=destination,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            days=planned,
+            degraded=degraded
+        )
+
+    async def generate(self, destination, flights_text, hotels_text, check_in_date, check_out_date) -> ItineraryPlan:
+        """Outline, then plan the days concurrently; failed LLM steps fall back to defaults and curated places."""
+        async for kind, value in self.stream(destination, flights_text, hotels_text, check_in_date, check_out_date):
+            if kind == "plan":
+                return value
@@ -0,0 +1,175 @@
+import os
+import glob
+import json
+import queue
+import atexit
+import random
+import hashlib
+import logging
+import logging.handlers
+from typing import Any, Dict, Iterator, Optional
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+PAYLOAD_MODES = ("off", "summary", "truncate", "hash")
+REDACTED_KEYS = {"api_key"}
+
+CAPTURE_LOGGER = "travel.capture"
+
+logger = logging.getLogger(__name__)
+
+_listeners = []
+_payload_mode = "summary"
+_payload_sample_rate = 1.0
+_payload_max_chars = 2000
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler renders `msg % args` in the caller, which would
+    serialize large payloads on the event loop. Records with exception info
+    are still prepared eagerly so their traceback text is captured.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+
+def _redact(payload: Any) -> Any:
+    if isinstance(payload, dict) and REDACTED_KEYS.intersection(payload):
+        return {k: ("***" if k in REDACTED_KEYS else v) for k, v in payload.items()}
+    return payload
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+class Payload:
+    """Lazily rendered payload; `str()` runs in the log listener thread, never in the caller."""
+
+    __slots__ = ("value", "mode", "max_chars")
+
+    def __init__(self, value: Any, mode: str, max_chars: int):
+        self.value = value
+        self.mode = mode
+        self.max_chars = max_chars
+
+    def __str__(self):
+        value = self.value
+        if self.mode == "hash":
+            text = _dumps(value)
+            return f"<{type(value).__name__} sha256={hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]} chars={len(text)}>"
+        if self.mode == "truncate":
+            text = _dumps(value)
+            return text if len(text) <= self.max_chars else f"{text[:self.max_chars]}... ({len(text)} chars)"
+        if isinstance(value, dict):
+            keys = ", ".join(list(map(str, value))[:8])
+            return f"<dict with {len(value)} keys: {keys}{', ...' if len(value) > 8 else ''}>"
+        if isinstance(value, (list, tuple)):
+            return f"<{type(value).__name__} of {len(value)} items>"
+        if isinstance(value, str):
+            return f"<str of {len(value)} chars>"
+        return f"<{type(value).__name__}>"
+
+
+def log_payload(log: logging.Logger, label: str, payload: Any, level: int = logging.INFO):
+    """Log a large payload according to PAYLOAD_LOG_MODE and sample rate; cheap when skipped."""
+    if _payload_mode == "off" or not log.isEnabledFor(level):
+        return
+    if _payload_sample_rate < 1.0 and random.random() >= _payload_sample_rate:
+        return
+    log.log(level, "%s: %s", label, Payload(_redact(payload), _payload_mode, _payload_max_chars))
+
+
+class CaptureFormatter(logging.Formatter):
+    """One JSON line per captured payload, read back by `iter_capture`."""
+
+    def format(self, record):
+        return _dumps({"ts": record.created, "kind": record.msg, **record.capture})
+
+
+def capture(kind: str, **fields):
+    """Write the full raw payload to the capture file when capture is enabled."""
+    capture_logger = logging.getLogger(CAPTURE_LOGGER)
+    if not capture_logger.handlers:
+        return
+    capture_logger.info(kind, extra={"capture": {k: _redact(v) for k, v in fields.items()}})
+
+
+def iter_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield captured records from `path` and its rotated backups, oldest first."""
+    backups = [p for p in glob.glob(f"{glob.escape(path)}.*") if p.rsplit(".", 1)[1].isdigit()]
+    backups.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    for file_path in backups + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _start_listener(target: logging.Logger, *handlers: logging.Handler):
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    target.addHandler(DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def setup_logging(
+    level: str = "INFO",
+    payload_mode: str = "summary",
+    payload_sample_rate: float = 1.0,
+    payload_max_chars: int = 2000,
+    capture_path: Optional[str] = None,
+    capture_max_bytes: int = 50 * 1024 * 1024,
+    capture_backups: int = 3,
+):
+    """Route all logging through a background listener thread.
+
+    Callers only enqueue records. Payloads logged with `log_payload` are
+    sampled and summarized, truncated or hashed per `payload_mode`. With
+    `capture_path` set, `capture()` also writes full raw payloads to a
+    rotating JSON-lines file for replay.
+    """
+    global _payload_mode, _payload_sample_rate, _payload_max_chars
+    if payload_mode not in PAYLOAD_MODES:
+        raise ValueError(f"payload_mode must be one of {PAYLOAD_MODES}, got {payload_mode!r}")
+    _payload_mode = payload_mode
+    _payload_sample_rate = payload_sample_rate
+    _payload_max_chars = payload_max_chars
+
+    stop_logging()
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    _start_listener(root, console)
+
+    capture_logger = logging.getLogger(CAPTURE_LOGGER)
+    capture_logger.propagate = False
+    for handler in list(capture_logger.handlers):
+        capture_logger.removeHandler(handler)
+    if capture_path:
+        capture_logger.setLevel(logging.INFO)
+        capture_file = logging.handlers.RotatingFileHandler(
+            capture_path, maxBytes=capture_max_bytes, backupCount=capture_backups, encoding="utf-8"
+        )
+        capture_file.setFormatter(CaptureFormatter())
+        _start_listener(capture_logger, capture_file)
+        logger.warning(f"Capturing raw payloads to {capture_path}")
+
+
+def stop_logging():
+    """Flush and stop the listener threads."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_logging)
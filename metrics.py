@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry()
+
+# Seconds; SerpAPI and Gemini calls sit in the 0.5-30s range, parsing well under 10ms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    "travel_request_seconds", "HTTP request latency until the response starts",
+    ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+STAGE_LATENCY = Histogram(
+    "travel_stage_seconds", "Latency of internal pipeline stages",
+    ["stage"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+STAGE_ERRORS = Counter(
+    "travel_stage_errors_total", "Pipeline stages that raised", ["stage"], registry=REGISTRY,
+)
+LLM_CALLS = Counter(
+    "travel_llm_calls_total", "Agent kickoffs", ["agent"], registry=REGISTRY,
+)
+LLM_PROMPT_CHARS = Counter(
+    "travel_llm_prompt_chars_total", "Characters of task prompt sent to the LLM", ["agent"], registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "travel_llm_tokens_total", "LLM tokens as reported by the provider, or estimated when it reports none",
+    ["agent", "kind"], registry=REGISTRY,
+)
+
+_tracer = None
+
+
+def setup_tracing(service_name: str = "travel-planner-api") -> bool:
+    """Export spans over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set and the SDK is installed."""
+    global _tracer
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not endpoint:
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk is not installed")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(__name__)
+    logger.info(f"Exporting traces to {endpoint}")
+    return True
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Time a pipeline stage into STAGE_LATENCY and, when tracing is on, an OpenTelemetry span."""
+    otel_span = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else None
+    if otel_span is not None:
+        otel_span.__enter__()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        STAGE_ERRORS.labels(stage).inc()
+        if otel_span is not None:
+            otel_span.__exit__(type(e), e, e.__traceback__)
+            otel_span = None
+        raise
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started)
+        if otel_span is not None:
+            otel_span.__exit__(None, None, None)
+
+
+def record_llm_call(agent: str, prompt: str, output: Any):
+    """Count prompt size and tokens for one kickoff, preferring the provider's token usage."""
+    LLM_CALLS.labels(agent).inc()
+    LLM_PROMPT_CHARS.labels(agent).inc(len(prompt))
+    usage = getattr(output, "token_usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or estimate_tokens(prompt)
+    completion_tokens = getattr(usage, "completion_tokens", 0) or estimate_tokens(str(output))
+    LLM_TOKENS.labels(agent, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(agent, "completion").inc(completion_tokens)
+
+
+class StatsCollector:
+    """Expose existing `stats()` dicts as gauges at scrape time.
+
+    `source()` returns `{label_value: {metric: number}}`, e.g. scheduler
+    stats per pool, and becomes `travel_<name>_<metric>{<label>="..."}`.
+    Non-numeric values are skipped.
+    """
+
+    def __init__(self, name: str, label: str, source: Callable[[], Dict[str, Dict[str, Any]]]):
+        self.name = name
+        self.label = label
+        self.source = source
+
+    def collect(self):
+        families: Dict[str, GaugeMetricFamily] = {}
+        try:
+            groups = self.source()
+        except Exception:
+            logger.exception(f"Collecting {self.name} stats failed")
+            return
+        for group, values in groups.items():
+            if not isinstance(values, dict):
+                continue
+            for metric, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                family = families.get(metric)
+                if family is None:
+                    family = families[metric] = GaugeMetricFamily(
+                        f"travel_{self.name}_{metric}", f"{self.name} {metric}", labels=[self.label]
+                    )
+                family.add_metric([group], value)
+        yield from families.values()
+
+
+def register_stats(name: str, label: str, source: Callable[[], Dict[str, Dict[str, Any]]]):
+    REGISTRY.register(StatsCollector(name, label, source))
+
+
+def render_latest(registry: Optional[CollectorRegistry] = None):
+    """Prometheus text exposition body and its content type."""
+    return generate_latest(registry or REGISTRY), CONTENT_TYPE_LATEST
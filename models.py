@@ -0,0 +1,125 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class FlightRequest(BaseModel):
+    origin: str
+    destination: str
+    outbound_date: str
+    return_date: str
+    type: str
+
+
+class HotelRequest(BaseModel):
+    location: str
+    check_in_date: str
+    check_out_date: str
+
+
+class ItineraryRequest(BaseModel):
+    destination: str
+    check_in_date: str
+    check_out_date: str
+    flights: str
+    hotels: str
+
+
+class TripRequest(BaseModel):
+    flight_request: FlightRequest
+    hotel_request: HotelRequest
+    destination: Optional[str] = None
+
+
+class Route(BaseModel):
+    origin: str
+    destination: str
+
+
+class BatchFlightRequest(BaseModel):
+    routes: List[Route]
+    outbound_date: str
+    return_date: str
+    type: str
+    flex_days: int = 0
+
+
+class WatchRequest(BaseModel):
+    flight_request: Optional[FlightRequest] = None
+    hotel_request: Optional[HotelRequest] = None
+    interval_minutes: float = 60
+
+
+class FlightInfo(BaseModel):
+    airline: str
+    price: str
+    duration: str
+    stops: str
+    departure: str
+    arrival: str
+    travel_class: str
+    return_date: str
+    airline_logo: str
+    score: Optional[float] = None
+
+
+class HotelInfo(BaseModel):
+    name: str
+    price: str
+    rating: float
+    location: str
+    link: str
+    score: Optional[float] = None
+
+
+class Activity(BaseModel):
+    time: str
+    title: str
+    description: str = ""
+    category: str = "leisure"
+
+
+class DayPlan(BaseModel):
+    day: int
+    date: str
+    theme: str
+    area: str = ""
+    activities: List[Activity] = []
+
+
+class ItineraryPlan(BaseModel):
+    destination: str
+    check_in_date: str
+    check_out_date: str
+    days: List[DayPlan] = []
+    # True when the outline or some days were filled in without the LLM
+    degraded: bool = False
+
+
+class AIResponse(BaseModel):
+    flights: List[FlightInfo] = []
+    hotels: List[HotelInfo] = []
+    ai_flight_recommendation: str = ""
+    ai_hotel_recommendation: str = ""
+    itinerary: str = ""
+    itinerary_plan: Optional[ItineraryPlan] = None
+    # Fields holding a deterministic fallback because the AI step timed out or was unavailable
+    degraded: List[str] = []
+
+
+class PriceCell(BaseModel):
+    origin: str
+    destination: str
+    outbound_date: str
+    return_date: str
+    options: int = 0
+    cheapest_price: Optional[float] = None
+    shortest_duration: Optional[int] = None
+    best_airline: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchFlightResponse(BaseModel):
+    cells: List[PriceCell] = []
+    cheapest: Optional[PriceCell] = None
+    ai_recommendation: str = ""
+    degraded: List[str] = []
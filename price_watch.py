@@ -0,0 +1,345 @@
+import json
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cache import run_blocking
+from scheduler import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+WATCH_KINDS = ("flights", "hotels")
+
+
+def option_label(record) -> str:
+    """Stable identity of a flight or hotel option across refreshes."""
+    if hasattr(record, "airline"):
+        return f"{record.airline} {record.departure} -> {record.arrival} ({record.stops} stops)"
+    return " ".join(record.name.split())
+
+
+def take_snapshot(ranking, limit: int = 3) -> Dict[str, Any]:
+    """Reduce a Ranking to what the diff needs: the top options and the lowest price."""
+    prices = [float(r.price) for r in ranking.records if r.price is not None]
+    return {
+        "top": [
+            {"label": option_label(ranking.records[i]), "price": ranking.records[i].price}
+            for i in ranking.top_indices[:limit]
+        ],
+        "min_price": min(prices) if prices else None,
+        "options": len(ranking.records),
+    }
+
+
+def diff_snapshots(previous: Optional[Dict], current: Dict, price_change_pct: float = 5.0) -> List[Dict[str, Any]]:
+    """Material changes between two snapshots; an empty list means nothing worth re-analyzing."""
+    if previous is None:
+        return []
+    changes = []
+    old_price, new_price = previous.get("min_price"), current.get("min_price")
+    if old_price and new_price is not None:
+        delta_pct = (new_price - old_price) / old_price * 100
+        if abs(delta_pct) >= price_change_pct:
+            changes.append({
+                "type": "price_drop" if delta_pct < 0 else "price_rise",
+                "from": old_price,
+                "to": new_price,
+                "change_pct": round(delta_pct, 2),
+            })
+    elif (old_price is None) != (new_price is None):
+        changes.append({"type": "availability", "from": old_price, "to": new_price})
+
+    old_top = [option["label"] for option in previous.get("top", [])]
+    new_top = [option["label"] for option in current.get("top", [])]
+    if old_top != new_top:
+        changes.append({
+            "type": "top_options",
+            "added": [label for label in new_top if label not in old_top],
+            "removed": [label for label in old_top if label not in new_top],
+        })
+    return changes
+
+
+class WatchStore:
+    """SQLite persistence for watches, their last snapshot and change alerts.
+
+    The database is opened on first use, so importing the app (tests,
+    benchmarks, WATCH_ENABLED=0) does not create the file. Every method
+    blocks (claim_due may wait on another process's write lock); async
+    callers run them through `run_blocking`.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The connection, opened and migrated on first access; callers hold `_lock`."""
+        if self._db is None:
+            self._db = self._open()
+        return self._db
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watches (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                request TEXT NOT NULL,
+                interval_s REAL NOT NULL,
+                created_at REAL NOT NULL,
+                next_run_at REAL NOT NULL,
+                last_checked_at REAL,
+                snapshot TEXT,
+                recommendation TEXT,
+                checks INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS alerts (
+                watch_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                changes TEXT NOT NULL,
+                recommendation TEXT
+            );
+            CREATE INDEX IF NOT EXISTS watches_next_run ON watches (next_run_at);
+            CREATE INDEX IF NOT EXISTS alerts_watch ON alerts (watch_id, created_at);
+        """)
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _watch(row) -> Dict[str, Any]:
+        watch = dict(row)
+        watch["request"] = json.loads(watch["request"])
+        watch["snapshot"] = json.loads(watch["snapshot"]) if watch["snapshot"] else None
+        return watch
+
+    def add(self, kind: str, request: Dict[str, Any], interval_s: float, next_run_at: float) -> Dict[str, Any]:
+        watch_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO watches (id, kind, request, interval_s, created_at, next_run_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (watch_id, kind, json.dumps(request), interval_s, time.time(), next_run_at),
+            )
+            self._conn.commit()
+        return self.get(watch_id)
+
+    def get(self, watch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM watches WHERE id = ?", (watch_id,)).fetchone()
+        return self._watch(row) if row else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM watches ORDER BY created_at").fetchall()
+        return [self._watch(row) for row in rows]
+
+    def claim_due(self, now: float, limit: int, next_run: Callable[[float], float]) -> List[Dict[str, Any]]:
+        """Due watches, rescheduled in the same transaction so another worker process cannot claim them too."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM watches WHERE next_run_at <= ? ORDER BY next_run_at LIMIT ?", (now, limit)
+                ).fetchall()
+                for row in rows:
+                    self._conn.execute(
+                        "UPDATE watches SET next_run_at = ? WHERE id = ?", (next_run(row["interval_s"]), row["id"])
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return [self._watch(row) for row in rows]
+
+    def record_check(
+        self, watch_id: str, checked_at: float, next_run_at: float,
+        snapshot: Optional[Dict] = None, recommendation: Optional[str] = None, error: Optional[str] = None
+    ):
+        """Store a check result; the snapshot and recommendation are kept unless new ones are given.
+
+        `failures` counts consecutive failed checks and resets on the first success.
+        """
+        with self._lock:
+            self._conn.execute(
+                """UPDATE watches SET last_checked_at = ?, next_run_at = ?, checks = checks + 1, error = ?,
+                       failures = CASE WHEN ? IS NULL THEN 0 ELSE failures + 1 END,
+                       snapshot = COALESCE(?, snapshot), recommendation = COALESCE(?, recommendation)
+                   WHERE id = ?""",
+                (checked_at, next_run_at, error, error, json.dumps(snapshot) if snapshot else None, recommendation,
+                 watch_id),
+            )
+            self._conn.commit()
+
+    def add_alert(self, watch_id: str, changes: List[Dict], recommendation: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO alerts (watch_id, created_at, changes, recommendation) VALUES (?, ?, ?, ?)",
+                (watch_id, time.time(), json.dumps(changes), recommendation),
+            )
+            self._conn.commit()
+
+    def alerts(self, watch_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM alerts WHERE watch_id = ? ORDER BY created_at DESC LIMIT ?", (watch_id, limit)
+            ).fetchall()
+        return [{**dict(row), "changes": json.loads(row["changes"])} for row in rows]
+
+    def delete(self, watch_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM watches WHERE id = ?", (watch_id,))
+            self._conn.execute("DELETE FROM alerts WHERE watch_id = ?", (watch_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class PriceWatcher:
+    """Background loop that refreshes due watches and re-analyzes only on material change.
+
+    `search_fn(kind, request)` returns a Ranking (and raises when the search
+    failed, which keeps the previous snapshot) and `recommend_fn(kind, ranking)`
+    the AI text; both are injected so the watcher can run against a stub
+    backend. Every refresh takes a token from `budget`, a rate limiter shared
+    by all watches, and the next run is spread by +/- `jitter` of the interval
+    so watches created together do not keep firing together. A watch whose
+    refreshes keep failing waits twice as long after each further failure, up
+    to `max_backoff` intervals, so it does not drain the shared budget.
+    """
+
+    def __init__(
+        self,
+        store: WatchStore,
+        search_fn: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+        recommend_fn: Callable[[str, Any], Awaitable[str]],
+        budget: Optional[RateLimiter] = None,
+        tick: float = 30.0,
+        jitter: float = 0.1,
+        concurrency: int = 4,
+        price_change_pct: float = 5.0,
+        max_backoff: float = 8.0,
+    ):
+        self.store = store
+        self.search_fn = search_fn
+        self.recommend_fn = recommend_fn
+        self.budget = budget or RateLimiter(rate=1.0, burst=1)
+        self.tick = tick
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.price_change_pct = price_change_pct
+        self.max_backoff = max_backoff
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.llm_calls = 0
+        self.alerts = 0
+        self.failures = 0
+
+    def next_run(self, interval_s: float, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        return now + interval_s * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def retry_interval(self, watch: Dict[str, Any]) -> float:
+        """Wait after a failed refresh, given the failures recorded before it."""
+        return watch["interval_s"] * min(2 ** watch["failures"], self.max_backoff)
+
+    async def add(self, kind: str, request: Dict[str, Any], interval_s: float) -> Dict[str, Any]:
+        if kind not in WATCH_KINDS:
+            raise ValueError(f"Unknown watch kind: {kind}")
+        # First check lands within one tick, spread so a batch of new watches is staggered
+        return await run_blocking(self.store.add, kind, request, interval_s, time.time() + random.uniform(0, self.tick))
+
+    async def check(self, watch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Refresh one watch and return its material changes."""
+        await self.budget.acquire()
+        self.checks += 1
+        now = time.time()
+        try:
+            ranking = await self.search_fn(watch["kind"], watch["request"])
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Price watch {watch['id']} refresh failed: {e!r}")
+            await run_blocking(
+                self.store.record_check, watch["id"], now, self.next_run(self.retry_interval(watch), now), error=str(e)
+            )
+            return []
+
+        snapshot = take_snapshot(ranking)
+        previous = watch["snapshot"]
+        changes = diff_snapshots(previous, snapshot, self.price_change_pct)
+
+        recommendation = None
+        if previous is None or changes:
+            self.llm_calls += 1
+            recommendation = await self.recommend_fn(watch["kind"], ranking)
+        if changes:
+            self.alerts += 1
+            logger.info(f"Price watch {watch['id']} changed: {[c['type'] for c in changes]}")
+            await run_blocking(self.store.add_alert, watch["id"], changes, recommendation)
+
+        await run_blocking(
+            self.store.record_check, watch["id"], now, self.next_run(watch["interval_s"], now),
+            snapshot=snapshot, recommendation=recommendation,
+        )
+        return changes
+
+    async def run_due(self) -> int:
+        """Check every watch that is due, at most `concurrency` at a time."""
+        # Claim the batch so a slow check is not picked up again by the next tick or another worker
+        due = await run_blocking(self.store.claim_due, time.time(), self.concurrency * 4, self.next_run)
+        if not due:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(watch):
+            async with semaphore:
+                await self.check(watch)
+
+        await asyncio.gather(*(bounded(watch) for watch in due))
+        return len(due)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_due()
+            except Exception:
+                logger.exception("Price watch loop error")
+            await asyncio.sleep(self.tick * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "checks": self.checks,
+            "llm_calls": self.llm_calls,
+            "alerts": self.alerts,
+            "failures": self.failures,
+        }
@@ -0,0 +1,208 @@
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+from tokens import estimate_tokens
+
+# Shorter column and field names for prompts; chosen to read naturally without a legend
+HEADER_ABBREVIATIONS = {
+    "duration": "dur",
+    "departure": "dep",
+    "arrival": "arr",
+    "travel_class": "class",
+    "return_date": "return",
+    "location": "loc",
+    "distinct_options": "distinct",
+    "non_stop_options": "nonstop",
+    "duration_minutes": "dur_min",
+    "price_per_night_usd": "usd_per_night",
+}
+
+VALUE_ABBREVIATIONS = (
+    (re.compile(r"^(\d+) minutes$"), r"\1m"),
+    (re.compile(r"^Non-stop$"), "0"),
+    (re.compile(r"^(\d+) stop\(s\)$"), r"\1"),
+)
+
+# Columns given up, in this order, when a table does not fit its token budget
+TRIM_COLUMNS = ("link", "return_date", "travel_class", "location", "score", "arrival", "departure")
+
+SHORT_TEXT_CHARS = 24
+
+
+class _Table:
+    __slots__ = ("name", "columns", "rows")
+
+    def __init__(self, name: str, columns: List[str], rows: List[List[Any]]):
+        self.name = name
+        self.columns = columns
+        self.rows = rows
+
+
+def format_value(value: Any, short: bool = False) -> str:
+    """One cell: rounded numbers, abbreviated units, no separators or line breaks."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, dict):
+        return ",".join(f"{k}={format_value(v, short)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return ",".join(format_value(v, short) for v in value)
+    text = " ".join(str(value).split()).replace("|", "/")
+    for pattern, replacement in VALUE_ABBREVIATIONS:
+        text = pattern.sub(replacement, text)
+    if short:
+        # "BLR - Kempegowda International Airport" -> "BLR", "Banjara Hills, Hyderabad" -> "Banjara Hills"
+        text = re.split(r" - |, ", text, maxsplit=1)[0]
+        if len(text) > SHORT_TEXT_CHARS:
+            text = text[:SHORT_TEXT_CHARS - 1].rstrip() + "…"
+    return text
+
+
+def _header(name: str) -> str:
+    return HEADER_ABBREVIATIONS.get(name, name)
+
+
+def _is_records(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def _table_from_records(name: str, records: List[Dict]) -> _Table:
+    columns: List[str] = []
+    for record in records:
+        columns.extend(key for key in record if key not in columns)
+    return _Table(name, columns, [[record.get(column) for column in columns] for record in records])
+
+
+def _sections(data: Any) -> List[Any]:
+    """Split prompt data into tables (lists of records) and `name: value` lines."""
+    if hasattr(data, "model_dump"):
+        data = data.model_dump()
+    if _is_records(data):
+        return [_table_from_records("options", [getattr(item, "model_dump", lambda: item)() for item in data])]
+    if isinstance(data, dict) and set(data) == {"columns", "rows"}:
+        columns = list(data["columns"])
+        rows = [list(row) + [None] * (len(columns) - len(row)) for row in data["rows"]]
+        return [_Table("", columns, rows)]
+    if not isinstance(data, dict):
+        return [("", data)]
+    sections = []
+    for key, value in data.items():
+        if _is_records(value):
+            sections.append(_table_from_records(key, value))
+        else:
+            sections.append((key, value))
+    return sections
+
+
+def _render_fields(name: str, value: Any, short: bool) -> str:
+    if not isinstance(value, dict):
+        text = format_value(value, short) or "none"
+        return f"{_header(name)}: {text}" if name else text
+    parts = []
+    for key, item in value.items():
+        if isinstance(item, dict) and item:
+            # {"min": 46, "median": 322, "max": 589} -> price_usd(min/median/max)=46/322/589
+            keys = "/".join(str(k) for k in item)
+            values = "/".join(format_value(v, short) for v in item.values())
+            parts.append(f"{_header(key)}({keys})={values}")
+        else:
+            parts.append(f"{_header(key)}={format_value(item, short)}")
+    return f"{_header(name)}: {' '.join(parts)}" if name else " ".join(parts)
+
+
+def _render_table(table: _Table, short: bool, dropped: set, max_rows: Optional[int]) -> str:
+    indices = [i for i, column in enumerate(table.columns) if column not in dropped]
+    rows = [[format_value(row[i], short) for i in indices] for row in table.rows[:max_rows]]
+    # Columns with one value across several rows are stated once above the table
+    shared = []
+    if len(rows) > 1:
+        shared = [n for n in range(len(indices)) if len({row[n] for row in rows}) == 1]
+        shared = [n for n in shared if rows[0][n]] + [n for n in shared if not rows[0][n]]
+    kept = [n for n in range(len(indices)) if n not in shared]
+    title = f"{table.name} " if table.name else ""
+    count = f"{len(rows)} of {len(table.rows)}" if len(rows) < len(table.rows) else str(len(rows))
+    count += " row" if len(table.rows) == 1 else " rows"
+    same = "; ".join(f"{_header(table.columns[indices[n]])}={rows[0][n]}" for n in shared if rows[0][n])
+    lines = [f"{title}({count}{'; all: ' + same if same else ''})"]
+    lines.append("|".join(_header(table.columns[indices[n]]) for n in kept))
+    lines.extend("|".join(row[n] for n in kept) for row in rows)
+    return "\n".join(lines)
+
+
+def _render(sections: List[Any], short: bool = False, dropped: Optional[set] = None, max_rows: Optional[int] = None) -> str:
+    dropped = dropped or set()
+    parts = []
+    for section in sections:
+        if isinstance(section, _Table):
+            parts.append(_render_table(section, short, dropped, max_rows))
+        else:
+            parts.append(_render_fields(section[0], section[1], short))
+    return "\n".join(part for part in parts if part)
+
+
+def compact_prompt(data: Any, max_tokens: Optional[int] = None) -> str:
+    """Serialize prompt data as pipe-separated tables with shared values hoisted.
+
+    Lists of records (and `{"columns", "rows"}` matrices) become tables whose
+    rows keep their ranked order; other fields become `name: k=v` lines. With
+    `max_tokens`, text cells are shortened, then the columns in TRIM_COLUMNS
+    dropped, then the lowest-ranked rows, until the estimate fits. Non-table
+    lines are never trimmed, and at least one row is kept.
+    """
+    sections = _sections(data)
+    text = _render(sections)
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+
+    dropped: set = set()
+    text = _render(sections, short=True)
+    for column in TRIM_COLUMNS:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        dropped.add(column)
+        text = _render(sections, short=True, dropped=dropped)
+
+    rows = max((len(s.rows) for s in sections if isinstance(s, _Table)), default=1)
+    while rows > 1 and estimate_tokens(text) > max_tokens:
+        rows -= 1
+        text = _render(sections, short=True, dropped=dropped, max_rows=rows)
+    return text
+
+
+def truncate_words(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(0, max_chars - 1)]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+
+
+def compact_text(text: str, max_tokens: Optional[int] = None) -> str:
+    """Prompt form of free text such as pasted flight/hotel details.
+
+    A leading JSON value (e.g. selected options) is serialized with
+    `compact_prompt`; whatever follows is whitespace-normalized. With
+    `max_tokens`, the table gets at most half the budget when prose follows
+    it, and the prose is cut at a word boundary to fit the rest.
+    """
+    text = (text or "").strip()
+    data, end = None, 0
+    if text[:1] in "[{":
+        try:
+            data, end = json.JSONDecoder().raw_decode(text)
+        except ValueError:
+            data, end = None, 0
+    prose = " ".join(text[end:].split())
+    if data is None:
+        return truncate_words(prose, max_tokens * 4) if max_tokens else prose
+
+    table_budget = max_tokens // 2 if max_tokens and prose else max_tokens
+    table = compact_prompt(data, table_budget)
+    if not prose:
+        return table
+    if max_tokens:
+        prose = truncate_words(prose, max(0, max_tokens - estimate_tokens(table)) * 4)
+    return f"{table}\n{prose}"
@@ -0,0 +1,177 @@
+import statistics
+from typing import Dict, List, Optional, Sequence
+
+from records import FlightRecord, HotelRecord
+
+DEFAULT_FLIGHT_WEIGHTS = {"price": 0.5, "duration": 0.3, "stops": 0.2}
+DEFAULT_HOTEL_WEIGHTS = {"price": 0.4, "rating": 0.45, "amenities": 0.15}
+
+# Fields that cost prompt tokens without helping the analyst
+PROMPT_EXCLUDED_FIELDS = {"airline_logo", "link", "score"}
+
+
+def _normalize(values: Sequence[Optional[float]], higher_is_better: bool = False) -> List[float]:
+    """Min-max scale to 0..1 where 1 is best; missing values score 0."""
+    present = [v for v in values if v is not None]
+    if not present:
+        return [0.0] * len(values)
+    low, high = min(present), max(present)
+    span = high - low
+    if span == 0:
+        return [0.0 if value is None else 1.0 for value in values]
+    if higher_is_better:
+        return [0.0 if value is None else (value - low) / span for value in values]
+    return [0.0 if value is None else 1.0 - (value - low) / span for value in values]
+
+
+def _weighted(columns: Dict[str, List[float]], weights: Dict[str, float]) -> List[float]:
+    total = sum(weights.values()) or 1.0
+    # Column at a time: one list pass per criterion instead of a generator per option
+    sums = [0.0] * len(next(iter(columns.values()), []))
+    for name, weight in weights.items():
+        sums = [acc + weight * value for acc, value in zip(sums, columns[name])]
+    return [round(acc / total, 4) for acc in sums]
+
+
+def _price(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _spread(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+class Ranking:
+    """Scores for every parsed option plus the deduplicated top-K for the prompt."""
+
+    def __init__(
+        self, records: list, scores: List[float], top_indices: List[int], summary: Dict,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.records = records
+        self.scores = scores
+        self.top_indices = top_indices
+        self.summary = summary
+        self.weights = weights or {}
+
+    def options(self) -> List[Dict]:
+        """Every option as API model fields, in SerpAPI order, with its score attached.
+
+        Plain dicts: the response model validates them once, which is cheaper than
+        building a model per option first.
+        """
+        return [record.as_dict(score) for record, score in zip(self.records, self.scores)]
+
+    def top_infos(self) -> list:
+        return [self.records[i].to_info(self.scores[i]) for i in self.top_indices]
+
+    def prompt_data(self) -> Dict:
+        """What the analyst agent sees: the top-K options and statistics over all of them."""
+        return {
+            "top_options": [
+                {
+                    "score": self.scores[i],
+                    **{k: v for k, v in self.records[i].as_dict().items() if k not in PROMPT_EXCLUDED_FIELDS},
+                }
+                for i in self.top_indices
+            ],
+            "summary": self.summary,
+        }
+
+
+def _top_unique(keys: List[tuple], scores: List[float], top_k: int) -> List[int]:
+    seen = set()
+    top = []
+    for i in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True):
+        if keys[i] in seen:
+            continue
+        seen.add(keys[i])
+        top.append(i)
+        if len(top) == top_k:
+            break
+    return top
+
+
+def rank_flights(
+    records: List[FlightRecord], top_k: int = 5, weights: Optional[Dict[str, float]] = None
+) -> Ranking:
+    weights = weights or DEFAULT_FLIGHT_WEIGHTS
+    prices = [_price(r.price) for r in records]
+    durations = [float(r.duration) if r.duration else None for r in records]
+    scores = _weighted({
+        "price": _normalize(prices),
+        "duration": _normalize(durations),
+        "stops": _normalize([float(r.stops) for r in records]),
+    }, weights) if records else []
+
+    # Same carrier, route and stops with ~equal duration and fare count as one option
+    keys = [
+        (r.airline, r.departure, r.arrival, r.stops, round((r.duration or 0) / 15), round((prices[i] or 0) / 5))
+        for i, r in enumerate(records)
+    ]
+    top = _top_unique(keys, scores, top_k)
+    summary = {
+        "options": len(records),
+        "distinct_options": len(set(keys)),
+        "price_usd": _spread([p for p in prices if p is not None]),
+        "duration_minutes": _spread([d for d in durations if d is not None]),
+        "non_stop_options": sum(1 for r in records if r.stops == 0),
+    }
+    return Ranking(records, scores, top, summary, weights)
+
+
+def rank_hotels(
+    records: List[HotelRecord], top_k: int = 5, weights: Optional[Dict[str, float]] = None
+) -> Ranking:
+    weights = weights or DEFAULT_HOTEL_WEIGHTS
+    prices = [_price(r.price) for r in records]
+    ratings = [float(r.rating) if r.rating else None for r in records]
+    scores = _weighted({
+        "price": _normalize(prices),
+        "rating": _normalize(ratings, higher_is_better=True),
+        "amenities": _normalize([float(len(r.amenities)) for r in records], higher_is_better=True),
+    }, weights) if records else []
+
+    keys = [(" ".join(r.name.casefold().split()),) for r in records]
+    top = _top_unique(keys, scores, top_k)
+    summary = {
+        "options": len(records),
+        "distinct_options": len(set(keys)),
+        "price_per_night_usd": _spread([p for p in prices if p is not None]),
+        "rating": _spread([r for r in ratings if r is not None]),
+    }
+    return Ranking(records, scores, top, summary, weights)
+
+
+def _headline(kind: str, info) -> str:
+    if kind == "flights":
+        return f"{info.airline} – {info.price}, {info.duration}, {info.stops}"
+    return f"{info.name} – ${info.price}/night, rated {info.rating:g}"
+
+
+def fallback_recommendation(kind: str, ranking: Ranking, runners_up: int = 2) -> str:
+    """Deterministic recommendation from the scores alone, for when the AI analyst is unavailable."""
+    infos = ranking.top_infos()
+    if not infos:
+        return f"No {kind} were found for this search."
+    weights = ", ".join(f"{name} {weight:.0%}" for name, weight in ranking.weights.items())
+    prices = ranking.summary.get("price_usd") or ranking.summary.get("price_per_night_usd") or {}
+    lines = [
+        f"**Top pick by score: {_headline(kind, infos[0])}**",
+        "",
+        f"AI analysis is unavailable right now, so this pick comes from the option scores ({weights}).",
+    ]
+    if prices:
+        lines.append(
+            f"Across {ranking.summary['options']} options prices range from ${prices['min']:g} "
+            f"to ${prices['max']:g} (median ${prices['median']:g})."
+        )
+    if len(infos) > 1:
+        lines += ["", "Also worth a look:"]
+        lines += [f"- {_headline(kind, info)} (score {info.score:.2f})" for info in infos[1:runners_up + 1]]
+    return "\n".join(lines)
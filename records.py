@@ -0,0 +1,140 @@
+import logging
+from typing import Dict, List, Optional
+
+from models import FlightInfo, HotelInfo
+
+logger = logging.getLogger(__name__)
+
+
+class FlightRecord:
+    """Compact internal flight option with numeric price, duration and stop count.
+
+    Parsing produces these instead of pydantic models. `as_dict` gives the
+    `FlightInfo` fields for a response, which its model validates once;
+    `to_info` builds the model for the few options read as attributes.
+    """
+
+    __slots__ = (
+        "airline", "airline_logo", "price", "duration", "stops",
+        "departure", "arrival", "travel_class", "return_date",
+    )
+
+    def __init__(self, airline, airline_logo, price, duration, stops, departure, arrival, travel_class, return_date):
+        self.airline = airline
+        self.airline_logo = airline_logo
+        self.price = price            # USD, None when SerpAPI has no fare
+        self.duration = duration      # total minutes in the air
+        self.stops = stops            # number of layovers
+        self.departure = departure
+        self.arrival = arrival
+        self.travel_class = travel_class
+        self.return_date = return_date
+
+    def as_dict(self, score: Optional[float] = None) -> Dict:
+        return {
+            "airline": self.airline,
+            "price": f"${self.price if self.price is not None else 'N/A'}",
+            "duration": f"{self.duration} minutes",
+            "stops": f"{self.stops} stop(s)" if self.stops else "Non-stop",
+            "departure": self.departure,
+            "arrival": self.arrival,
+            "travel_class": self.travel_class,
+            "return_date": self.return_date,
+            "airline_logo": self.airline_logo,
+            "score": score,
+        }
+
+    def to_info(self, score: Optional[float] = None) -> FlightInfo:
+        return FlightInfo(**self.as_dict(score))
+
+
+class HotelRecord:
+    """Compact internal hotel option with numeric price and rating."""
+
+    __slots__ = ("name", "link", "location", "price", "rating", "hotel_class", "amenities")
+
+    def __init__(self, name, link, location, price, rating, hotel_class=None, amenities=()):
+        self.name = name
+        self.link = link
+        self.location = location
+        self.price = price            # lowest nightly rate, None when unknown
+        self.rating = rating
+        self.hotel_class = hotel_class
+        self.amenities = amenities
+
+    def as_dict(self, score: Optional[float] = None) -> Dict:
+        return {
+            "name": self.name,
+            "price": str(self.price if self.price is not None else "0"),
+            "rating": self.rating,
+            "location": self.location,
+            "link": self.link,
+            "score": score,
+        }
+
+    def to_info(self, score: Optional[float] = None) -> HotelInfo:
+        return HotelInfo(**self.as_dict(score))
+
+
+def _airport_label(airport: Dict) -> str:
+    return f"{airport['id']} - {airport['name']}"
+
+
+def parse_flight_record(data: Dict, return_date: Optional[str] = "") -> FlightRecord:
+    flights = data.get("flights", [])
+    layovers = data.get("layovers", [])
+
+    if flights:
+        first, last = flights[0], flights[-1]
+        # Airline and logo from the first flight (can be extended for multi-leg)
+        airline = first["airline"]
+        airline_logo = first["airline_logo"]
+        departure = _airport_label(first["departure_airport"])
+        arrival = _airport_label(last["arrival_airport"])
+        travel_class = first.get("travel_class", "N/A")
+    else:
+        airline, airline_logo = "N/A", ""
+        departure = arrival = travel_class = "N/A"
+
+    # Return date (only if type is not one-way)
+    flight_type = data.get("type", "oneway").lower()
+
+    return FlightRecord(
+        airline=airline,
+        airline_logo=airline_logo,
+        price=data.get("price"),
+        duration=sum(flight.get("duration", 0) for flight in flights),
+        stops=len(layovers),
+        departure=departure,
+        arrival=arrival,
+        travel_class=travel_class,
+        return_date=return_date if flight_type != "oneway" else "N/A"
+    )
+
+
+def parse_flight_records(response: Dict, return_date: Optional[str] = "") -> List[FlightRecord]:
+    """Parse `best_flights` followed by `other_flights` from a google_flights response."""
+    records = [parse_flight_record(flight, return_date) for flight in response.get("best_flights", [])]
+    records.extend(parse_flight_record(flight, return_date) for flight in response.get("other_flights", []))
+    return records
+
+
+def parse_hotel_records(hotel_data_list: List[dict], location: str = "Unknown") -> List[HotelRecord]:
+    records = []
+    for hotel_data in hotel_data_list:
+        if not isinstance(hotel_data, dict):
+            logger.warning(f"Skipping non-dict hotel_data: {hotel_data}")
+            continue
+        records.append(
+            HotelRecord(
+                name=hotel_data.get("name", "No name"),
+                link=hotel_data.get("link") or hotel_data.get("serpapi_property_details_link", ""),
+                location=location,
+                price=(hotel_data.get("rate_per_night") or {}).get("extracted_lowest"),
+                rating=hotel_data.get("overall_rating") or 0.0,
+                hotel_class=hotel_data.get("extracted_hotel_class"),
+                amenities=tuple(hotel_data.get("amenities") or ())
+            )
+        )
+    return records
+
@@ -0,0 +1,301 @@
+"""Upstream resilience: circuit breakers, request deadlines and hedged calls.
+
+Every SerpAPI and Gemini call goes through an `Upstream`, which fails fast
+with CircuitOpenError while that upstream's breaker is open, bounds the call
+by its own timeout and by the deadline of the HTTP request it serves (set
+with `deadline_scope`), and can send one duplicate request when the first is
+slower than the recent p95, returning whichever answers first.
+"""
+import math
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current request must be answered; copied into tasks and worker threads
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} is unavailable, retry in {retry_after}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """Raised when an upstream call does not finish within its timeout or the request deadline."""
+
+    def __init__(self, upstream: str, timeout: float):
+        super().__init__(f"{upstream} did not answer within {max(timeout, 0):.1f}s")
+        self.upstream = upstream
+        self.timeout = timeout
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Bound upstream calls made inside to `seconds` from now; an outer, earlier deadline still wins."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def clear_deadline():
+    """Drop the request deadline for the rest of the current task, e.g. work shared by several requests."""
+    _deadline.set(None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current request's deadline, or None when it has none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout`.
+
+    Then one trial call is let through (half-open): success closes the
+    circuit, failure opens it again for another `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.reset_timeout - (time.monotonic() - self._opened_at)))
+
+    def allow(self):
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after())
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"{self.name} circuit closed")
+            self.state = "closed"
+            self._failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                    logger.warning(f"{self.name} circuit opened after {self._failures} failure(s)")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """The admitted call ended without telling us anything about the upstream (e.g. it was shed)."""
+        with self._lock:
+            self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "open": int(self.state != "closed"),
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class Upstream:
+    """Circuit breaker, timeout/deadline and optional hedging around calls to one upstream.
+
+    `fn` passed to `call` must start a fresh request each time it is called.
+    With `hedge`, once `hedge_min_samples` latencies are known, a call still
+    running after the recent p95 gets one duplicate, as long as hedges stay
+    under `hedge_budget` of all calls.
+
+    Errors and calls exceeding `timeout` count towards opening the breaker,
+    so a hanging upstream stops tying up workers after a few calls. Timeouts
+    caused by a shorter request deadline do not, and neither do exceptions
+    in `excluded` (e.g. local load shedding).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge: bool = False,
+        hedge_budget: float = 0.1,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.05,
+        excluded: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.hedge = hedge
+        self.hedge_budget = hedge_budget
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.excluded = excluded
+        self._latencies = deque(maxlen=200)
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def _hedge_delay(self, limit: Optional[float]) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = self.p95()
+        if p95 is None:
+            return None
+        delay = max(p95, self.hedge_min_delay)
+        return delay if limit is None or delay < limit else None
+
+    def _limit(self, timeout: Optional[float]) -> Tuple[Optional[float], bool]:
+        """The tighter of the call's timeout and the request deadline, and whether the deadline is tighter."""
+        timeout = self.timeout if timeout is None else timeout
+        left = remaining()
+        if left is not None and (timeout is None or left < timeout):
+            return left, True
+        return timeout, False
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        limit, from_deadline = self._limit(timeout)
+        if limit is not None and limit <= 0:
+            self.timeouts += 1
+            raise DeadlineExceededError(self.name, 0)
+        self.breaker.allow()
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            result = await self._attempts(fn, limit)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if from_deadline:
+                self.breaker.release()
+            else:
+                self.failures += 1
+                self.breaker.record_failure()
+            raise DeadlineExceededError(self.name, limit) from None
+        except self.excluded:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self._latencies.append(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+    async def _attempts(self, fn: Callable[[], Awaitable[Any]], limit: Optional[float]) -> Any:
+        """First successful result of the original request and at most one hedge."""
+        ends = None if limit is None else time.monotonic() + limit
+        first = asyncio.ensure_future(fn())
+        pending = {first}
+        try:
+            delay = self._hedge_delay(limit)
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self.hedges + 1 <= self.hedge_budget * self.calls:
+                    self.hedges += 1
+                    pending.add(asyncio.ensure_future(fn()))
+            error: Optional[BaseException] = None
+            while pending:
+                left = None if ends is None else ends - time.monotonic()
+                if left is not None and left <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Pass an async iterator through under the breaker; an error before it ends counts as a failure.
+
+        Streams are not timed out: the client sees progress, and the
+        transport's own timeout bounds a stalled upstream.
+        """
+        self.breaker.allow()
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            async for item in open_stream():
+                yield item
+        except self.excluded:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self._latencies.append(time.monotonic() - started)
+        self.breaker.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            **self.breaker.stats(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_s": round(p95, 4) if p95 is not None else None,
+        }
@@ -0,0 +1,208 @@
+import math
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a workload queue is at capacity and new work must be shed."""
+
+    def __init__(self, workload: str, retry_after: int, status_code: int = 503):
+        super().__init__(f"{workload} queue is full, retry in {retry_after}s")
+        self.workload = workload
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class WorkloadPool:
+    """Dedicated bounded thread pool for one class of blocking work.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may
+    wait for a worker; anything beyond that is rejected immediately with a
+    QueueFullError carrying a Retry-After estimate.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, status_code: int = 503):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.status_code = status_code
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._service_total = 0.0
+        self._recent_waits = deque(maxlen=512)
+        self._slots = asyncio.Semaphore(max_workers)
+
+    @property
+    def queued(self) -> int:
+        return self._pending - self._running
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up, from the average service time."""
+        avg_service = self._service_total / self.completed if self.completed else 1.0
+        return max(1, math.ceil(avg_service * max(self.queued, 1) / self.max_workers))
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(self.name, self.retry_after(), self.status_code)
+            self._pending += 1
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run blocking `fn(*args)` on this pool's worker threads."""
+        self._admit()
+
+        enqueued = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self._record_wait(started - enqueued)
+            try:
+                return context.run(fn, *args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._service_total += time.perf_counter() - started
+
+        future = self._executor.submit(job)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def run_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a coroutine under the same concurrency, queue and wait-time accounting."""
+        self._admit()
+        enqueued = time.perf_counter()
+        completed = False
+        try:
+            async with self._slots:
+                started = time.perf_counter()
+                with self._lock:
+                    self._running += 1
+                    self._record_wait(started - enqueued)
+                try:
+                    result = await fn()
+                    completed = True
+                    return result
+                finally:
+                    with self._lock:
+                        self._running -= 1
+                        self._service_total += time.perf_counter() - started
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if completed:
+                    self.completed += 1
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    def _record_wait(self, waited: float):
+        self.started += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._recent_waits.append(waited)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_avg_s": round(self._wait_total / self.started, 4) if self.started else 0.0,
+                "wait_p95_s": round(waits[int(0.95 * (len(waits) - 1))], 4) if waits else 0.0,
+                "wait_max_s": round(self._wait_max, 4),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class WorkloadScheduler:
+    """Routes blocking work to a separate bounded pool per workload class.
+
+    Keeping SerpAPI searches, LLM analyses and itinerary generation in
+    isolated pools means a burst of slow itinerary jobs cannot occupy the
+    workers that cheap flight searches need.
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, WorkloadPool] = {}
+
+    def add_pool(self, name: str, max_workers: int, max_queue: int, status_code: int = 503) -> WorkloadPool:
+        pool = WorkloadPool(name, max_workers, max_queue, status_code)
+        self.pools[name] = pool
+        return pool
+
+    async def run(self, workload: str, fn: Callable[..., Any], *args) -> Any:
+        return await self.pools[workload].run(fn, *args)
+
+    async def run_async(self, workload: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await self.pools[workload].run_async(fn)
+
+    def pool(self, workload: str) -> Optional[WorkloadPool]:
+        return self.pools.get(workload)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = False):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per second with bursts up to `burst`.
+
+    A `rate` of 0 turns the limit off.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate < 0:
+            raise ValueError(f"rate must be >= 0 (0 disables the limit), got {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,132 @@
+import json
+import random
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx when installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class SerpApiError(Exception):
+    """Raised when SerpAPI cannot be reached or returns a non-JSON error."""
+
+
+def _decode(body: bytes) -> Dict[str, Any]:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class AsyncSerpApiClient:
+    """Native asyncio SerpAPI client over one shared keep-alive connection pool.
+
+    Returns the same dict as `GoogleSearch(params).get_dict()`, including
+    SerpAPI's `{"error": ...}` payloads, so callers do not need to change.
+    Connection errors, timeouts and 429/5xx responses are retried with full
+    jitter exponential backoff, honouring Retry-After when present; if they
+    persist, SerpApiError is raised.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://serpapi.com",
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: Optional[bool] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.retries = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the serving event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _fetch(self, params: Dict[str, Any], timeout: Optional[float]):
+        request_timeout = httpx.Timeout(timeout, connect=self.timeout.connect) if timeout else self.timeout
+        async with self.client.stream("GET", "/search", params=params, timeout=request_timeout) as response:
+            # Read the body incrementally and decode the bytes directly, skipping the str copy
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+            return response.status_code, response.headers.get("Retry-After"), bytes(body)
+
+    async def search(self, params: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        query = {k: v for k, v in params.items() if v is not None}
+        query.update({"source": "python", "output": "json"})
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+            self.requests += 1
+            try:
+                status, retry_after, body = await self._fetch(query, timeout)
+            except httpx.TransportError as e:
+                last_error = e
+                logger.warning(f"SerpAPI transport error (attempt {attempt + 1}): {e!r}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if status in RETRYABLE_STATUS:
+                last_error = SerpApiError(f"SerpAPI returned {status}")
+                if attempt < self.max_retries:
+                    logger.warning(f"SerpAPI returned {status} (attempt {attempt + 1}), retrying")
+                    await asyncio.sleep(self._backoff(attempt, retry_after))
+                continue
+            try:
+                return _decode(body)
+            except ValueError as e:
+                raise SerpApiError(f"SerpAPI returned {status} with a non-JSON body") from e
+
+        raise SerpApiError(f"SerpAPI failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "retries": self.retries, "http2": self.http2}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
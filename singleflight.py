@@ -0,0 +1,223 @@
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cache import run_blocking
+from resilience import DeadlineExceededError, clear_deadline, remaining
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - only needed for redis:// lease URLs
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteLeases:
+    """Named, expiring locks in a SQLite file shared by worker processes on one host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        """Token if the lease was free or had expired, else None."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO leases (name, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ?",
+                (name, token, now + ttl, now),
+            )
+            self._conn.commit()
+        return token if cursor.rowcount == 1 else None
+
+    def release(self, name: str, token: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND token = ?", (name, token))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisLeases:
+    """Named, expiring locks on Redis (SET NX PX), shared across processes and hosts."""
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise ImportError("A redis:// lease URL needs the redis package (pip install redis)")
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._release = self._client.register_script(self._RELEASE)
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self._client.set(f"lease:{name}", token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release(self, name: str, token: str):
+        self._release(keys=[f"lease:{name}"], args=[token])
+
+    def close(self):
+        self._client.close()
+
+
+# Lease store failures fall back to running the call without cross-process coalescing
+LEASE_ERRORS = (sqlite3.Error,) + ((redis.RedisError,) if redis is not None else ())
+
+
+def open_leases(location: str):
+    """Lease store for a shared cache location: a redis:// URL or a SQLite file path."""
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisLeases(location)
+    return SQLiteLeases(location)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls so they share one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive the same result or exception.
+    A caller being cancelled only detaches that caller. The shared task is
+    cancelled once every waiter has gone away. The task runs without any
+    caller's request deadline; each caller waits at most until its own
+    deadline, then gets DeadlineExceededError and detaches.
+
+    With `leases` (shared by several worker processes) and a `lookup` passed
+    to `do`, calls are also coalesced across processes: the process that
+    takes the lease for a key does the work, the others poll `lookup` (an
+    async read of the shared cache) until the result shows up. If the lease
+    is released or expires without a cached result, the next waiter takes
+    over. Lease store calls run in a thread, off the event loop.
+    """
+
+    def __init__(self, leases=None, lease_ttl: float = 120.0, poll_interval: float = 0.05):
+        self._calls: Dict[str, _Call] = {}
+        self.leases = leases
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.started = 0
+        self.coalesced = 0
+        self.shared_waits = 0
+        self.shared_hits = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[Any]], lookup: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        if self.leases is not None and lookup is not None:
+            work = fn
+            fn = lambda: self._leased(key, work, lookup)
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(self._shared(fn)))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            budget = remaining()
+            if budget is not None:
+                await asyncio.wait({call.task}, timeout=max(budget, 0))
+                if not call.task.done():
+                    raise DeadlineExceededError(key.split(":", 1)[0], budget)
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                logger.info(f"All waiters cancelled, cancelling in-flight call {key[:12]}")
+                self._forget(key, call)
+                call.task.cancel()
+
+    @staticmethod
+    async def _shared(fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Started in the first caller's context; without this its deadline would bind every waiter
+        clear_deadline()
+        return await fn()
+
+    async def _leased(
+        self, key: str, fn: Callable[[], Awaitable[Any]], lookup: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        delay = self.poll_interval
+        waiting = False
+        while True:
+            try:
+                token = await run_blocking(self.leases.acquire, key, self.lease_ttl)
+            except LEASE_ERRORS as e:
+                logger.warning(f"Lease store unavailable, running {key[:12]} unshared: {e}")
+                return await fn()
+            if token is not None:
+                try:
+                    # Another worker may have stored the result between our miss and the lease
+                    value = await lookup()
+                    if value is not None:
+                        self.shared_hits += 1
+                        return value
+                    return await fn()
+                finally:
+                    try:
+                        await run_blocking(self.leases.release, key, token)
+                    except LEASE_ERRORS as e:
+                        logger.warning(f"Could not release lease {key[:12]}; it expires in {self.lease_ttl}s: {e}")
+            if not waiting:
+                waiting = True
+                self.shared_waits += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, self.poll_interval * 10)
+            value = await lookup()
+            if value is not None:
+                self.shared_hits += 1
+                return value
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finish(self, key: str, call: _Call):
+        self._forget(key, call)
+        # Mark the exception as retrieved when nobody is left to await it
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "shared_waits": self.shared_waits,
+            "shared_hits": self.shared_hits,
+        }
+
+    def close(self):
+        if self.leases is not None:
+            self.leases.close()
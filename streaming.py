@@ -0,0 +1,99 @@
+import json
+import asyncio
+import logging
+import contextvars
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set around a streaming Crew kickoff; the worker pool copies it into the worker thread
+_chunk_sink: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "chunk_sink", default=None
+)
+_handler_installed = False
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def install_stream_handler():
+    """Route CrewAI LLM stream chunks to the sink of the kickoff that produced them."""
+    global _handler_installed
+    if _handler_installed:
+        return
+    from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _on_chunk(source, event):
+        sink = _chunk_sink.get()
+        if sink is not None:
+            sink(event.chunk)
+
+    _handler_installed = True
+
+
+class FinalAnswerFilter:
+    """Hold back the agent's "Thought:" preamble and pass through only the answer text."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        if self._started:
+            return chunk
+        self._buffer += chunk
+        index = self._buffer.find(FINAL_ANSWER_MARKER)
+        if index == -1:
+            return ""
+        self._started = True
+        return self._buffer[index + len(FINAL_ANSWER_MARKER):].lstrip()
+
+
+async def stream_kickoff(
+    kickoff_fn: Callable[[], Any], run_blocking: Callable[[Callable], Awaitable[Any]] = asyncio.to_thread
+) -> AsyncIterator[tuple]:
+    """Run a blocking Crew kickoff in a worker thread, yielding ("token", text) then ("result", text)."""
+    install_stream_handler()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    answer_filter = FinalAnswerFilter()
+
+    def sink(chunk: str):
+        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+
+    token = _chunk_sink.set(sink)
+    try:
+        kickoff = asyncio.ensure_future(run_blocking(kickoff_fn))
+    finally:
+        _chunk_sink.reset(token)
+
+    try:
+        while not kickoff.done() or not queue.empty():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, kickoff}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                continue
+            text = answer_filter.feed(getter.result())
+            if text:
+                yield "token", text
+        yield "result", str(kickoff.result())
+    finally:
+        if not kickoff.done():
+            logger.info("Stream consumer went away; kickoff continues in its worker thread")
+
+
+async def event_stream(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap an SSE generator so failures become an `error` event and every stream ends with `done`."""
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        logger.exception(f"Streaming error: {str(e)}")
+        yield sse_event("error", {"detail": str(getattr(e, "detail", e))})
+    yield sse_event("done", {})
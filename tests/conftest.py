@@ -0,0 +1,41 @@
+"""The API under test, pointed at a local SerpAPI stub; shared by the test modules.
+
+app reads its settings at import, so it is imported once per session.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stub_serpapi import StubSerpApiServer
+
+
+@pytest.fixture(scope="session")
+def api():
+    serp = StubSerpApiServer(latency=0.01, options=20, seed=1).start()
+    os.environ.update({
+        "GOOGLE_API_KEY": "test",
+        "SERPAPI_BASE_URL": serp.url,
+        "SERPAPI_MAX_RETRIES": "0",
+        "WATCH_ENABLED": "0",
+        "WATCH_DB_PATH": ":memory:",
+        "WARMUP_ENABLED": "0",
+        "SEARCH_CACHE_MAXSIZE": "0",
+        "LLM_CACHE_MAXSIZE": "0",
+        "ANALYSIS_TIMEOUT": "1",
+        "ITINERARY_TIMEOUT": "1",
+        "BREAKER_FAILURES": "2",
+        "LOG_LEVEL": "ERROR",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+    import app
+    from fastapi.testclient import TestClient
+
+    with TestClient(app.app) as client:
+        yield app, client, serp
+    serp.shutdown()
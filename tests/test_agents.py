@@ -0,0 +1,51 @@
+"""Agent pool reuse and per-kickoff LLM metrics, against FakeLLM.
+
+Usage:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from agents import AgentRegistry
+from fake_llm import FakeLLM
+from metrics import REGISTRY
+
+
+def completion_tokens(agent):
+    return REGISTRY.get_sample_value("travel_llm_tokens_total", {"agent": agent, "kind": "completion"}) or 0
+
+
+def test_token_counter_counts_each_kickoff_once_on_a_reused_crew():
+    factory = lambda: FakeLLM(latency=0, output_tokens=100, tokens_per_sec=0)
+    registry = AgentRegistry(llm_factory=factory, streaming_llm_factory=factory, pool_size=1)
+    inputs = {"formatted_data": "IndiGo | $83 | non-stop"}
+
+    increments = []
+    for _ in range(3):
+        before = completion_tokens("flights")
+        registry.kickoff("flights", inputs)
+        increments.append(completion_tokens("flights") - before)
+
+    assert registry.pools[("flights", False)].stats()["reused"] == 2
+    assert increments == [100, 100, 100]
+
+
+def test_per_agent_factories_override_the_defaults():
+    default = lambda: FakeLLM(latency=0, timeout=30)
+    itinerary = lambda: FakeLLM(latency=0, timeout=120)
+    registry = AgentRegistry(
+        llm_factory=default, streaming_llm_factory=default, pool_size=1,
+        llm_factories={"itinerary": (itinerary, itinerary)},
+    )
+
+    assert registry.pools[("itinerary", False)].llm_factory is itinerary
+    assert registry.pools[("itinerary", True)].llm_factory is itinerary
+    assert registry.pools[("flights", False)].llm_factory is default
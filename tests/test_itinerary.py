@@ -0,0 +1,51 @@
+"""Itinerary rendering from a structured plan.
+
+Usage:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from itinerary import render_markdown, selected_option
+from models import DayPlan, ItineraryPlan
+
+FLIGHT = {
+    "airline": "IndiGo", "price": "$83", "duration": "85 minutes", "stops": "Non-stop",
+    "departure": "BLR - Kempegowda International Airport", "arrival": "HYD - Rajiv Gandhi International Airport",
+    "travel_class": "Economy", "return_date": "2025-06-15", "score": 0.91,
+}
+HOTEL = {"name": "Taj Krishna", "price": "120", "rating": 4.5, "location": "Hyderabad", "score": 0.8}
+
+
+def plan_trip_selection(option):
+    """What /plan_trip/ hands the planner: the top options as JSON, then the AI analysis."""
+    return f"{json.dumps([option, dict(option, price='$999')], indent=2)}\n\nAI recommendation:\n" + "Long analysis. " * 200
+
+
+def test_selected_option_summarizes_the_first_option_and_drops_the_analysis():
+    assert selected_option(plan_trip_selection(FLIGHT)) == (
+        "IndiGo · BLR - Kempegowda International Airport → HYD - Rajiv Gandhi International Airport"
+        " · 85 minutes · Non-stop · $83"
+    )
+    assert selected_option(json.dumps([HOTEL])) == "Taj Krishna · $120/night · rated 4.5"
+
+
+def test_selected_option_shortens_pasted_text():
+    summary = selected_option("IndiGo   6E 123, leaves 06:00 " * 50, max_chars=60)
+    assert len(summary) <= 60 and summary.endswith("…")
+    assert "  " not in summary
+
+
+def test_markdown_shows_the_selected_options_not_the_raw_details():
+    plan = ItineraryPlan(
+        destination="Hyderabad", check_in_date="2025-06-10", check_out_date="2025-06-11",
+        days=[DayPlan(day=1, date="2025-06-10", theme="Old city")],
+    )
+    markdown = render_markdown(plan, plan_trip_selection(FLIGHT), plan_trip_selection(HOTEL))
+    assert "IndiGo · " in markdown and "Taj Krishna · $120/night" in markdown
+    assert "AI recommendation" not in markdown and "$999" not in markdown
@@ -0,0 +1,118 @@
+"""Price watches: threshold alerts, failed refreshes, rescheduling and backoff, against the stub SerpAPI server.
+
+Usage:
+
+    python -m pytest tests
+"""
+import json
+import time
+
+import pytest
+
+from price_watch import PriceWatcher, WatchStore
+from scheduler import RateLimiter
+from synthetic import flights_response
+
+FLIGHT_REQUEST = {
+    "origin": "BLR", "destination": "HYD", "outbound_date": "2025-06-10", "return_date": "2025-06-15", "type": "1"
+}
+HOUR = 3600
+
+
+def priced(factor):
+    """The stub's flights payload with every fare scaled by `factor`."""
+    payload = flights_response(20)
+    for option in payload["best_flights"] + payload["other_flights"]:
+        option["price"] = round(option["price"] * factor, 2)
+    return payload
+
+
+@pytest.fixture
+def serp(api):
+    serp = api[2]
+    original = [json.loads(body) for body in serp.payloads["google_flights"]]
+    yield serp
+    serp.error_rate, serp.error_status = 0.0, 503
+    serp.serve("google_flights", *original)
+
+
+@pytest.fixture
+def watcher(api):
+    app, client, _ = api
+    recommendations = []
+
+    async def recommend(kind, ranking):
+        recommendations.append(kind)
+        return f"recommendation {len(recommendations)}"
+
+    watcher = PriceWatcher(
+        WatchStore(), search_fn=app.watch_search, recommend_fn=recommend,
+        budget=RateLimiter(rate=1000, burst=100), jitter=0, max_backoff=4,
+    )
+    watcher.recommendations = recommendations
+    # Checks run on the app's event loop, where its SerpAPI client lives
+    watcher.run = lambda fn, *args: client.portal.call(fn, *args)
+    yield watcher
+    watcher.store.close()
+
+
+def check(watcher, watch_id):
+    watcher.run(watcher.check, watcher.store.get(watch_id))
+    return watcher.store.get(watch_id)
+
+
+def test_alert_only_when_the_lowest_fare_moves_past_the_threshold(serp, watcher):
+    watch = watcher.run(watcher.add, "flights", FLIGHT_REQUEST, HOUR)
+    first = check(watcher, watch["id"])
+    assert first["snapshot"]["min_price"] is not None
+    assert watcher.recommendations == ["flights"]
+
+    serp.serve("google_flights", priced(0.98))
+    check(watcher, watch["id"])
+    assert watcher.store.alerts(watch["id"]) == []
+    assert len(watcher.recommendations) == 1
+
+    serp.serve("google_flights", priced(0.5))
+    latest = check(watcher, watch["id"])
+    [alert] = watcher.store.alerts(watch["id"])
+    assert alert["changes"][0]["type"] == "price_drop"
+    assert alert["changes"][0]["change_pct"] == pytest.approx((0.5 / 0.98 - 1) * 100, abs=0.01)
+    assert latest["recommendation"] == alert["recommendation"] == "recommendation 2"
+
+
+def test_error_payload_is_a_failed_refresh_that_keeps_the_snapshot(serp, watcher):
+    watch = watcher.run(watcher.add, "flights", FLIGHT_REQUEST, HOUR)
+    before = check(watcher, watch["id"])
+
+    serp.error_rate, serp.error_status = 1.0, 400
+    after = check(watcher, watch["id"])
+    assert watcher.stats()["failures"] == 1
+    assert after["error"] and after["failures"] == 1
+    assert after["snapshot"] == before["snapshot"]
+    assert watcher.store.alerts(watch["id"]) == []
+
+
+def test_failed_refreshes_back_off_until_one_succeeds(serp, watcher):
+    watch = watcher.run(watcher.add, "flights", FLIGHT_REQUEST, HOUR)
+    serp.error_rate, serp.error_status = 1.0, 400
+    waits = []
+    for _ in range(4):
+        latest = check(watcher, watch["id"])
+        waits.append(round((latest["next_run_at"] - latest["last_checked_at"]) / HOUR, 3))
+    assert waits == [1, 2, 4, 4]
+
+    serp.error_rate = 0.0
+    latest = check(watcher, watch["id"])
+    assert (latest["failures"], latest["error"]) == (0, None)
+    assert latest["next_run_at"] - latest["last_checked_at"] == pytest.approx(HOUR)
+
+
+def test_claimed_watches_are_rescheduled_so_they_run_once():
+    store = WatchStore()
+    now = time.time()
+    watch = store.add("flights", FLIGHT_REQUEST, HOUR, next_run_at=now - 1)
+
+    [claimed] = store.claim_due(now, 10, lambda interval_s: now + interval_s)
+    assert claimed["id"] == watch["id"]
+    assert store.claim_due(now, 10, lambda interval_s: now + interval_s) == []
+    assert store.get(watch["id"])["next_run_at"] == now + HOUR
@@ -0,0 +1,238 @@
+"""Circuit breakers, deadlines, hedging and degraded fallbacks, against the stub SerpAPI server and FakeLLM.
+
+Usage:
+
+    python -m pytest tests
+"""
+import os
+import json
+import sys
+import time
+import asyncio
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceededError, Upstream, deadline_scope
+
+FLIGHT_REQUEST = {
+    "origin": "BLR", "destination": "HYD", "outbound_date": "2025-06-10", "return_date": "2025-06-15", "type": "1"
+}
+ITINERARY_REQUEST = {
+    "destination": "Hyderabad", "flights": "IndiGo non-stop", "hotels": "Taj Krishna",
+    "check_in_date": "2025-06-10", "check_out_date": "2025-06-12",
+}
+
+
+def test_breaker_opens_after_consecutive_failures_and_lets_one_trial_through():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    time.sleep(0.06)
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.allow()
+
+
+def test_call_timeout_counts_against_the_breaker_but_request_deadline_does_not():
+    upstream = Upstream("test", timeout=0.05, failure_threshold=1)
+    slow = lambda: asyncio.sleep(1)
+
+    async def within_deadline():
+        with deadline_scope(0.02):
+            await upstream.call(slow)
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(within_deadline())
+    assert upstream.breaker.state == "closed"
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(upstream.call(slow))
+    assert upstream.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(upstream.call(slow))
+
+
+def test_excluded_errors_do_not_open_the_breaker():
+    upstream = Upstream("test", failure_threshold=1, excluded=(LookupError,))
+
+    async def shed():
+        raise LookupError("queue full")
+
+    with pytest.raises(LookupError):
+        asyncio.run(upstream.call(shed))
+    assert upstream.breaker.state == "closed"
+
+
+def test_hedge_answers_when_the_first_request_stalls():
+    upstream = Upstream("test", timeout=2, hedge=True, hedge_budget=1.0, hedge_min_samples=1, hedge_min_delay=0.01)
+    upstream._latencies.append(0.01)
+    attempts = []
+
+    async def fetch():
+        attempts.append(len(attempts) + 1)
+        number = attempts[-1]
+        await asyncio.sleep(1 if number == 1 else 0.01)
+        return number
+
+    started = time.monotonic()
+    assert asyncio.run(upstream.call(fetch)) == 2
+    assert time.monotonic() - started < 0.5
+    assert (upstream.hedges, upstream.hedge_wins) == (1, 1)
+
+
+def test_hedges_stay_within_the_budget():
+    upstream = Upstream("test", timeout=2, hedge=True, hedge_budget=0.1, hedge_min_samples=1, hedge_min_delay=0.01)
+    upstream._latencies.append(0.001)
+
+    async def many():
+        await asyncio.gather(*(upstream.call(lambda: asyncio.sleep(0.05)) for _ in range(20)))
+
+    asyncio.run(many())
+    assert upstream.hedges <= 2
+
+
+def use_llm(app, **faults):
+    """Route every agent to a FakeLLM with the given fault injection."""
+    from agents import AgentRegistry
+    from fake_llm import FakeLLM
+
+    def factory(stream=False):
+        return lambda: FakeLLM(latency=0.01, output_tokens=20, stream=stream, timeout=app.LLM_TIMEOUT, **faults)
+
+    app.agent_registry = AgentRegistry(llm_factory=factory(), streaming_llm_factory=factory(stream=True), pool_size=1)
+
+
+@pytest.fixture
+def client(api):
+    app, client, serp = api
+    serp.error_rate = serp.slow_rate = 0.0
+    for upstream in (app.serpapi_upstream, app.llm_upstream):
+        upstream.breaker = CircuitBreaker(upstream.name, upstream.breaker.failure_threshold, upstream.breaker.reset_timeout)
+    use_llm(app)
+    return client
+
+
+def test_search_answers_with_the_llm_when_healthy(api, client):
+    response = client.post("/search_flights/", json=FLIGHT_REQUEST)
+    assert response.status_code == 200
+    assert response.json()["degraded"] == []
+    assert "Final Answer" not in response.json()["ai_flight_recommendation"]
+
+
+def test_failing_llm_degrades_to_the_ranked_pick_then_fails_fast(api, client):
+    app = api[0]
+    use_llm(app, error_rate=1.0)
+    for _ in range(2):
+        body = client.post("/search_flights/", json=FLIGHT_REQUEST).json()
+        assert body["degraded"] == ["ai_flight_recommendation"]
+        assert body["ai_flight_recommendation"].startswith("**Top pick by score")
+    assert app.llm_upstream.breaker.state == "open"
+
+    started = time.monotonic()
+    body = client.post("/search_flights/", json=FLIGHT_REQUEST).json()
+    assert body["degraded"] == ["ai_flight_recommendation"]
+    assert time.monotonic() - started < 0.5
+
+
+def test_slow_llm_falls_back_at_the_analysis_timeout(api, client):
+    use_llm(api[0], slow_rate=1.0, slow_latency=10)
+    started = time.monotonic()
+    body = client.post("/search_flights/", json=FLIGHT_REQUEST).json()
+    assert body["degraded"] == ["ai_flight_recommendation"]
+    assert time.monotonic() - started < 3
+
+
+def test_client_deadline_bounds_the_request(api, client):
+    use_llm(api[0], slow_rate=1.0, slow_latency=10)
+    started = time.monotonic()
+    response = client.post("/search_flights/", json=FLIGHT_REQUEST, headers={"X-Request-Timeout": "0.3"})
+    assert response.json()["degraded"] == ["ai_flight_recommendation"]
+    assert time.monotonic() - started < 0.9
+    assert api[0].llm_upstream.breaker.state == "closed"
+
+
+def test_failing_llm_itinerary_falls_back_to_a_degraded_plan(api, client):
+    use_llm(api[0], error_rate=1.0)
+    body = client.post("/generate_itinerary/", json=ITINERARY_REQUEST).json()
+    assert body["degraded"] == ["itinerary"]
+    assert body["itinerary_plan"]["degraded"]
+    assert len(body["itinerary_plan"]["days"]) == 2
+
+
+def test_serpapi_outage_returns_502_then_503_with_retry_after(api, client):
+    api[2].error_rate = 1.0
+    statuses = [client.post("/search_flights/", json=FLIGHT_REQUEST) for _ in range(3)]
+    assert [r.status_code for r in statuses] == [502, 502, 503]
+    assert int(statuses[-1].headers["Retry-After"]) >= 1
+
+
+def sse_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_streamed_itinerary_sends_the_outline_then_each_day(api, client):
+    events = sse_events(client.post("/generate_itinerary/stream", json=ITINERARY_REQUEST))
+    names = [name for name, _ in events]
+    assert names == ["skeleton", "day", "day", "itinerary", "done"]
+    assert [day["day"] for day in events[0][1]["days"]] == [1, 2]
+    assert sorted(data["day"] for name, data in events if name == "day") == [1, 2]
+    assert events[3][1]["degraded"] is False
+    assert len(events[3][1]["plan"]["days"]) == 2
+
+
+def test_failing_llm_streamed_itinerary_ends_with_a_degraded_plan(api, client):
+    use_llm(api[0], error_rate=1.0)
+    events = dict(sse_events(client.post("/generate_itinerary/stream", json=ITINERARY_REQUEST)))
+    assert events["itinerary"]["degraded"] is True
+    assert len(events["itinerary"]["plan"]["days"]) == 2
+
+
+def test_rate_limiter_treats_zero_as_unlimited_and_rejects_bad_settings():
+    from scheduler import RateLimiter
+
+    async def burst(limiter, count):
+        started = time.monotonic()
+        for _ in range(count):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(burst(RateLimiter(rate=0), 100)) < 0.1
+    for rate, burst_size in ((-1, 1), (1, 0)):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=rate, burst=burst_size)
+
+
+def test_batch_takes_rate_tokens_only_for_uncached_cells(api, client, monkeypatch):
+    from cache import SearchCache
+    from scheduler import RateLimiter
+
+    app = api[0]
+
+    class CountingLimiter(RateLimiter):
+        acquired = 0
+
+        async def acquire(self):
+            CountingLimiter.acquired += 1
+            await super().acquire()
+
+    monkeypatch.setattr(app, "search_cache", SearchCache(maxsize=64))
+    monkeypatch.setattr(app, "batch_rate_limiter", CountingLimiter(rate=0))
+    batch = {**FLIGHT_REQUEST, "routes": [{"origin": "BLR", "destination": "HYD"}], "flex_days": 1}
+    for _ in range(2):
+        assert client.post("/batch_search_flights/", json=batch).status_code == 200
+    assert CountingLimiter.acquired == 3
@@ -0,0 +1,130 @@
+"""Coalescing, cancellation, deadlines and lease fallback of SingleFlight.
+
+Usage:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import asyncio
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import DeadlineExceededError, deadline_scope
+from singleflight import SingleFlight
+
+
+def test_waiters_keep_their_own_deadline():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return "result"
+
+    async def caller(seconds):
+        with deadline_scope(seconds):
+            return await flight.do("search:key", work)
+
+    async def main():
+        # The short deadline starts the shared task; the longer one joins it
+        return await asyncio.gather(caller(0.1), caller(5), return_exceptions=True)
+
+    short, long = asyncio.run(main())
+    assert isinstance(short, DeadlineExceededError)
+    assert long == "result"
+    assert calls == [1]
+
+
+def test_cancelled_waiter_detaches_while_the_others_get_the_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", work))
+        others = [asyncio.ensure_future(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        results = await asyncio.gather(*others)
+        return first, results
+
+    first, results = asyncio.run(main())
+    assert first.cancelled()
+    assert results == ["result", "result"]
+    assert calls == [1]
+
+
+def test_shared_task_is_cancelled_once_every_waiter_is_gone():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        waiters = [asyncio.ensure_future(flight.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+    assert len(flight) == 0
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert flight.stats()["started"] == 1
+    assert len(flight) == 0
+
+
+class BrokenLeases:
+    def acquire(self, name, ttl):
+        raise sqlite3.OperationalError("database is locked")
+
+    def release(self, name, token):
+        raise AssertionError("nothing was acquired")
+
+    def close(self):
+        pass
+
+
+def test_unavailable_lease_store_runs_the_call_unshared():
+    flight = SingleFlight(leases=BrokenLeases())
+    lookups = []
+
+    async def work():
+        return "result"
+
+    async def lookup():
+        lookups.append(1)
+        return None
+
+    assert asyncio.run(flight.do("key", work, lookup)) == "result"
+    assert lookups == []
+    assert flight.stats()["shared_waits"] == 0
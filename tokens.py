@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count for prompt sizing (~4 characters per token for English and JSON)."""
+    return (len(text) + 3) // 4
@@ -0,0 +1,55 @@
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Loads slow components in a background thread once the server is up.
+
+    Health checks are answered while the steps run; requests that arrive
+    earlier still work, they just pay the load cost themselves. `ready` turns
+    true when every step has finished and no required step failed. Optional
+    steps only degrade a feature, so their failures are reported but do not
+    hold readiness back.
+    """
+
+    def __init__(self):
+        self.steps: List[Tuple[str, Callable[[], Any], bool]] = []
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Future] = None
+
+    def add(self, name: str, fn: Callable[[], Any], required: bool = True):
+        self.steps.append((name, fn, required))
+
+    def _run(self):
+        for name, fn, required in self.steps:
+            started = time.perf_counter()
+            error = None
+            try:
+                fn()
+            except Exception as e:
+                logger.exception(f"Warm-up step {name} failed")
+                error = repr(e)
+            elapsed = time.perf_counter() - started
+            self.results[name] = {"seconds": round(elapsed, 3), "required": required, "error": error}
+            logger.info(f"Warm-up step {name} finished in {elapsed:.2f}s")
+
+    def start(self):
+        if self._task is None and self.steps:
+            self._task = asyncio.ensure_future(asyncio.to_thread(self._run))
+
+    @property
+    def ready(self) -> bool:
+        if len(self.results) < len(self.steps):
+            return False
+        return not any(result["error"] and result["required"] for result in self.results.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "pending": [name for name, _, _ in self.steps if name not in self.results],
+            "steps": dict(self.results),
+        }